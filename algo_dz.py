@@ -1,65 +1,46 @@
-import yfinance as yf
 import pandas as pd
 import plotly.graph_objs as go
 from plotly.subplots import make_subplots
+import ohlcv_cache
+from candles import CandleSeries
+import zone_outcomes
 
 # Fetch historical data for Bank Nifty on a 1-hour interval
 symbol = "^NSEBANK"
-data = yf.download(symbol, start="2023-01-01", end="2023-12-31", interval="1h")
+data = ohlcv_cache.download(symbol, start="2023-01-01", end="2023-12-31", interval="1h")
 
-# Convert data to a list of Candle objects
-class Candle:
-    def __init__(self, open_price, high, low, close):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        return self.high - self.low
-
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
-
-    @property
-    def is_bearish(self):
-        return self.close < self.open_price
-
-def is_legin_candle(candle):
+def is_legin_candle(candles):
     # Consider any candle with significant movement as a leg-in candle
-    return candle.body_size > candle.candle_range * 0.5
+    return candles.body_size > candles.candle_range * 0.5
 
-def is_base_candle(candle):
+def is_base_candle(candles):
     # Base candle is a candle with smaller body size, showing consolidation
-    return candle.body_size < candle.candle_range * 0.5
+    return candles.body_size < candles.candle_range * 0.5
 
-def is_legout_candle(candle):
+def is_legout_candle(candles):
     # Consider a leg-out candle as one that shows a strong directional move (bullish)
-    return candle.body_size > candle.candle_range * 0.7
+    return candles.body_size > candles.candle_range * 0.7
 
 def detect_demand_zones(candles):
+    # Classify every candle once
+    legin = is_legin_candle(candles)
+    base = is_base_candle(candles)
+    legout = is_legout_candle(candles)
+
     demand_zones = []
     i = 0
     while i < len(candles) - 4:  # Ensure there are enough candles after legin for validation
-        if is_legin_candle(candles[i]):
-            base_candles = []
+        if legin[i]:
             j = i + 1
-            while j < len(candles) and len(base_candles) < 4 and is_base_candle(candles[j]):
-                base_candles.append(candles[j])
+            while j < len(candles) and j - i - 1 < 4 and base[j]:
                 j += 1
+            base_candles = candles[i + 1:j]
 
-            legout_candles = []
-            while j < len(candles) and is_legout_candle(candles[j]):
-                legout_candles.append(candles[j])
+            legout_start = j
+            while j < len(candles) and legout[j]:
                 j += 1
 
-            if len(legout_candles) > 1 and base_candles:
+            if j - legout_start > 1 and base_candles:
                 # We found significant leg-out move with more than 1 bullish candle
                 demand_zones.append((i, j, base_candles))
             i = j  # Skip to the next possible pattern after the legout candle
@@ -68,35 +49,12 @@ def detect_demand_zones(candles):
 
     return demand_zones
 
-def check_zone_tested_and_target(demand_zone, candles, start_index):
-    base_candles = demand_zone[2]
+def check_zones_tested_and_target(demand_zones, candles):
+    # Every zone is checked from the candle after its leg-out, all of them in one pass
+    return zone_outcomes.zone_statuses(demand_zones, candles, zone_outcomes.STATUS_COLORS)
 
-    # Ensure base_candles is not empty before calculating highest_high and lowest_low
-    if base_candles:
-        highest_high = max(candle.high for candle in base_candles)
-        lowest_low = min(candle.low for candle in base_candles)
-        
-        # Determine the target for a 1:2 risk-reward ratio
-        risk = highest_high - lowest_low
-        target_price = highest_high + 2 * risk
-
-        for k in range(start_index, len(candles)):
-            if candles[k].low <= highest_high and candles[k].high >= lowest_low:
-                # Check if the price hits the 1:2 target after entering the zone
-                for m in range(k, len(candles)):
-                    if candles[m].high >= target_price:
-                        return 'pink'  # Zone achieved 1:2 target
-                    if candles[m].low < lowest_low:
-                        return 'blue'  # Zone was broken before achieving target
-                break
-        
-        return 'green'  # Zone has not been tested
-    return None  # No valid zone found
-
-# Convert fetched data to Candle objects
-candles = []
-for idx, row in data.iterrows():
-    candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close']))
+# Convert fetched data to a CandleSeries
+candles = CandleSeries.from_frame(data)
 
 # Detect demand zones
 demand_zones = detect_demand_zones(candles)
@@ -119,15 +77,14 @@ candlestick = go.Candlestick(
 fig.add_trace(candlestick)
 
 # Add horizontal lines for demand zones
-for dz in demand_zones:
+colors = check_zones_tested_and_target(demand_zones, candles)
+for dz, color in zip(demand_zones, colors):
     base_candles = dz[2]
     
     # Find the highest high and lowest low of the base candles
-    color = check_zone_tested_and_target(dz, candles, dz[1] + 1)
-    
     if color:
-        highest_high = max(candle.high for candle in base_candles)
-        lowest_low = min(candle.low for candle in base_candles)
+        highest_high = base_candles.high.max()
+        lowest_low = base_candles.low.min()
     
         if color == 'green':
             fresh_zones += 1
@@ -0,0 +1,151 @@
+import numpy as np
+import pandas as pd
+
+from range_index import RangeIndex
+
+# -----------------------------
+# Candle Series
+# -----------------------------
+
+class Candle:
+    """
+    A single candlestick, as read out of a CandleSeries.
+    """
+    def __init__(self, open_price, high, low, close, date=None):
+        self.open_price = open_price
+        self.high = high
+        self.low = low
+        self.close = close
+        self.date = date
+
+    @property
+    def body_size(self):
+        return abs(self.close - self.open_price)
+
+    @property
+    def candle_range(self):
+        return self.high - self.low
+
+    @property
+    def body_percentage(self):
+        if self.candle_range == 0:
+            return 0
+        return (self.body_size / self.candle_range) * 100
+
+    @property
+    def is_bullish(self):
+        return self.close > self.open_price
+
+    @property
+    def is_bearish(self):
+        return self.close < self.open_price
+
+    @property
+    def upper_body(self):
+        return max(self.open_price, self.close)
+
+
+class CandleSeries:
+    """
+    A run of candles stored as one NumPy array per field.
+
+    body_size, candle_range, body_pct (body as a percentage of the range, 0 for a flat
+    candle) and direction (+1 bullish, -1 bearish, 0 flat) are computed once for the whole
+    series, so detectors compare arrays instead of recomputing properties per candle.
+
+    Slicing returns a CandleSeries of views into the same arrays; indexing a single
+    position returns a Candle. range_index is built on first use and kept with the series.
+    """
+    def __init__(self, open_price, high, low, close, time=None):
+        self.open_price = np.asarray(open_price, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.time = time
+
+        self.body_size = np.abs(self.close - self.open_price)
+        self.candle_range = self.high - self.low
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.body_pct = np.where(self.candle_range == 0, 0.0, (self.body_size / self.candle_range) * 100)
+        self.direction = np.where(self.close > self.open_price, 1,
+                                  np.where(self.close < self.open_price, -1, 0)).astype(np.int8)
+        self._range_index = None
+
+    @classmethod
+    def from_frame(cls, data):
+        """
+        Builds a series from a DataFrame with Open/High/Low/Close columns, without iterating rows.
+        """
+        return cls(_column(data, 'Open'), _column(data, 'High'), _column(data, 'Low'), _column(data, 'Close'),
+                   pd.DatetimeIndex(data.index))
+
+    @classmethod
+    def from_bars(cls, bars):
+        """
+        Builds a series from universe_loader.SymbolBars, reusing its arrays.
+        """
+        return cls(bars.open_price, bars.high, bars.low, bars.close, bars.index)
+
+    @classmethod
+    def from_store(cls, stored):
+        """
+        Builds a series over an ohlcv_store.StoredBars; the price arrays stay memory-mapped.
+        """
+        return cls(stored.open_price, stored.high, stored.low, stored.close, stored.index())
+
+    def __len__(self):
+        return len(self.close)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return self._slice(key)
+        date = self.time[key] if self.time is not None else None
+        return Candle(self.open_price[key], self.high[key], self.low[key], self.close[key], date)
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self[k]
+
+    def _slice(self, key):
+        # Views of every array, derived ones included, so nothing is copied or recomputed
+        series = CandleSeries.__new__(CandleSeries)
+        for name in ('open_price', 'high', 'low', 'close', 'body_size', 'candle_range', 'body_pct', 'direction'):
+            setattr(series, name, getattr(self, name)[key])
+        series.time = self.time[key] if self.time is not None else None
+        series._range_index = None
+        return series
+
+    @property
+    def range_index(self):
+        """
+        RangeIndex over the lows and highs, built on first use.
+        """
+        if self._range_index is None:
+            self._range_index = RangeIndex(self.low, self.high)
+        return self._range_index
+
+    @property
+    def is_bullish(self):
+        return self.direction > 0
+
+    @property
+    def is_bearish(self):
+        return self.direction < 0
+
+    @property
+    def upper_body(self):
+        return np.maximum(self.open_price, self.close)
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'Open': self.open_price,
+            'High': self.high,
+            'Low': self.low,
+            'Close': self.close,
+        }, index=self.time)
+
+
+def _column(data, field):
+    if field not in data.columns:
+        return np.full(len(data), np.nan)
+    return data[field].to_numpy(dtype=np.float64)
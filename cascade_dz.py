@@ -0,0 +1,46 @@
+import pandas as pd
+
+import zone_cascade
+import zone_refresh
+import zone_store
+from universe_scanner import UniverseScanner
+
+# -----------------------------
+# Load Symbols from CSV
+# -----------------------------
+
+# Read the stock symbols from the CSV file 'yf_symbols.csv'
+symbols_df = pd.read_csv('yf_symbols.csv')
+nifty50_stocks = symbols_df['Symbol'].tolist()
+
+start_date = "2020-01-01"
+end_date = "2024-12-31"
+
+# -----------------------------
+# Cascade Levels
+# -----------------------------
+
+# Coarsest first; each level only searches inside the bases of the zones of the level above.
+# The 1h level is limited to the provider's lookback (730 days on Yahoo) within the range
+levels = zone_cascade.DEFAULT_LEVELS
+
+# -----------------------------
+# Cascade Scan and Zone Store Saving
+# -----------------------------
+
+# Worker processes import this module, so the scan only runs as a script
+if __name__ == "__main__":
+    scanner = UniverseScanner()
+    jobs = ((symbol, (levels, start_date, end_date)) for symbol in nifty50_stocks)
+
+    with zone_store.ZoneStore() as store:
+        for symbol, records in scanner.run(jobs, zone_cascade.scan_symbol):
+            store.upsert(records)
+            print(f"{symbol}: {len(records)} zones")
+
+        # Statuses are resolved from every bar since each leg-out, not just the windows the
+        # cascade loaded; 1h zones only load the sessions the daily bars show they can change in
+        counts = zone_refresh.refresh_zones(store, symbols=nifty50_stocks, timeframe=[interval for interval, _ in levels])
+
+    print(", ".join(f"{label}: {count}" for label, count in counts.items()))
+    print(scanner.failure_report())
@@ -1,10 +1,15 @@
-import yfinance as yf
-import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
 import customtkinter as ctk
-import csv
-import os
+import fetch_scheduler
+import scan_jobs
+import timeframes
+import universe_scanner
+from candles import CandleSeries
+import zone_detector
+import zone_mapping
+import zone_outcomes
+import zone_store
 
 # Define the main application class
 class DemandZoneApp(ctk.CTk):
@@ -106,13 +111,13 @@ class DemandZoneApp(ctk.CTk):
         min_legout_pct = float(self.min_legout_entry.get() or "50")
         max_legout_pct = float(self.max_legout_entry.get() or "100")
 
-        # Fetch monthly data for the given symbol
-        monthly_data = yf.download(symbol, start=start_date, end=end_date, interval="1mo")
+        # Fetch daily data once and build the monthly candles from it
+        monthly_data, daily_data = timeframes.load_with_higher_timeframe(
+            symbol, "1d", start_date, end_date, "1mo", start_date, end_date
+        )
 
-        # Convert monthly data to a list of Candle objects
-        monthly_candles = []
-        for idx, row in monthly_data.iterrows():
-            monthly_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
+        # Convert monthly data to a CandleSeries
+        monthly_candles = CandleSeries.from_frame(monthly_data)
 
         # Detect monthly demand zones using user-defined or default parameters
         monthly_demand_zones = self.detect_demand_zones(monthly_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
@@ -121,36 +126,24 @@ class DemandZoneApp(ctk.CTk):
             self.output_label.configure(text="No monthly demand zones detected.")
             return
 
-        # Fetch daily data for the given symbol
-        daily_data = yf.download(symbol, start=start_date, end=end_date, interval="1d")
+        # Bar ranges of the daily series inside the monthly demand zones; windows that share bars
+        # are merged, the others stay apart so no daily zone is built across two of them
+        segments = timeframes.window_segments(
+            daily_data.index, [(monthly_data.index[dz[0]], monthly_data.index[dz[1]]) for dz in monthly_demand_zones]
+        )
 
-        # Filter daily data based on the detected monthly demand zones
-        filtered_daily_data = pd.DataFrame()
-        for dz in monthly_demand_zones:
-            first_base_date = monthly_data.index[dz[0]]
-            last_base_date = monthly_data.index[dz[1]]
-
-            filtered_data = daily_data.loc[first_base_date:last_base_date]
-            
-            # Ensure the filtered data has a DatetimeIndex
-            filtered_data.index = pd.to_datetime(filtered_data.index)
-            
-            filtered_daily_data = pd.concat([filtered_daily_data, filtered_data])
-
-        # Reset the index to ensure it's a proper DatetimeIndex after filtering
-        filtered_daily_data.index = pd.to_datetime(filtered_daily_data.index)
-
-        if filtered_daily_data.empty:
+        if not segments:
             self.output_label.configure(text="No data available for the selected date range or criteria.")
             return
 
-        # Convert filtered daily data to Candle objects
-        filtered_candles = []
-        for idx, row in filtered_daily_data.iterrows():
-            filtered_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
+        # The daily bars inside the windows, for the chart
+        filtered_daily_data = daily_data[timeframes.segment_mask(len(daily_data), segments)]
 
-        # Detect demand zones in the filtered daily data
-        demand_zones = self.detect_demand_zones(filtered_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+        # Convert daily data to a CandleSeries
+        daily_candles = CandleSeries.from_frame(daily_data)
+
+        # Detect demand zones inside each window of the daily data
+        demand_zones = zone_detector.detect_demand_zones_in_segments(daily_candles, segments, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
 
         if not demand_zones:
             self.output_label.configure(text="No demand zones detected in the selected time range.")
@@ -174,16 +167,18 @@ class DemandZoneApp(ctk.CTk):
 
         # Add horizontal rays for demand zones and prepare CSV data
         zone_info = []
-        for dz in demand_zones:
+        # Check if the zones have been tested and if they met the 1:2 target
+        colors = self.check_zones_tested_and_target(demand_zones, daily_candles, zone_outcomes.STATUS_COLORS)
+
+        # Map every daily zone to the first monthly zone containing it, in one sorted lookup
+        higher_timeframe_zones = zone_mapping.parent_zones(demand_zones, daily_data.index,
+                                                           monthly_demand_zones, monthly_data.index)
+        for dz, color, higher_timeframe_zone in zip(demand_zones, colors, higher_timeframe_zones):
             base_candles = dz[2]
 
             # Find the highest high and lowest low of the base candles
-            highest_high = max(candle.high for candle in base_candles)
-            lowest_low = min(candle.low for candle in base_candles)
-
-            # Check if the zone has been tested and if it met the 1:2 target
-            start_index = dz[1] + 1  # Start checking after the leg-out candle
-            color = self.check_zone_tested_and_target(dz, filtered_candles, start_index)
+            highest_high = base_candles.high.max()
+            lowest_low = base_candles.low.min()
 
             if color == 'green':
                 status = 'Fresh'
@@ -196,19 +191,12 @@ class DemandZoneApp(ctk.CTk):
                 target_zones += 1
 
             # Add horizontal rays (lines) from these points extending to the right
-            ax[0].hlines(y=highest_high, xmin=filtered_daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
-            ax[0].hlines(y=lowest_low, xmin=filtered_daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
+            ax[0].hlines(y=highest_high, xmin=daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
+            ax[0].hlines(y=lowest_low, xmin=daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
 
             # Define leg-in and leg-out candles
-            legin_candle = filtered_candles[dz[0]]
-            legout_candle = filtered_candles[dz[1]]
-
-            # Map the corresponding monthly demand zone
-            higher_timeframe_zone = None
-            for monthly_zone in monthly_demand_zones:
-                if filtered_daily_data.index[dz[0]] >= monthly_data.index[monthly_zone[0]] and filtered_daily_data.index[dz[1]] <= monthly_data.index[monthly_zone[1]]:
-                    higher_timeframe_zone = monthly_zone
-                    break
+            legin_candle = daily_candles[dz[0]]
+            legout_candle = daily_candles[dz[1]]
 
             if higher_timeframe_zone:
                 higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
@@ -239,8 +227,9 @@ class DemandZoneApp(ctk.CTk):
 
         plt.show()
 
-        # Write data to CSV
-        self.write_to_csv(csv_data)
+        # Save the zones to the zone store
+        params = (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+        self.save_zones(csv_data, "1d", (params, params))
 
         # Display zone information
         output_text = (f"Number of fresh zones: {fresh_zones}\n"
@@ -275,197 +264,146 @@ class DemandZoneApp(ctk.CTk):
 
         csv_data = []
 
-        for symbol in nifty50_symbols:
-            # Fetch monthly data for the given symbol
-            monthly_data = yf.download(symbol, start=start_date, end=end_date, interval="1mo")
-
-            # Convert monthly data to a list of Candle objects
-            monthly_candles = []
-            for idx, row in monthly_data.iterrows():
-                monthly_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
-
-            # Detect monthly demand zones
-            monthly_demand_zones = self.detect_demand_zones(
-                monthly_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
-            )
-
-            if not monthly_demand_zones:
-                continue
-
-            # Fetch daily data for the given symbol
-            daily_data = yf.download(symbol, start=start_date, end=end_date, interval="1d")
-
-            # Filter daily data based on the detected monthly demand zones
-            filtered_daily_data = pd.DataFrame()
-            for dz in monthly_demand_zones:
-                first_base_date = monthly_data.index[dz[0]]
-                last_base_date = monthly_data.index[dz[1]]
-
-                filtered_data = daily_data.loc[first_base_date:last_base_date]
-                
-                # Ensure the filtered data has a DatetimeIndex
-                filtered_data.index = pd.to_datetime(filtered_data.index)
-                
-                filtered_daily_data = pd.concat([filtered_daily_data, filtered_data])
+        # Fetch symbols concurrently with retries; each one is processed as soon as its data lands
+        scheduler = fetch_scheduler.FetchScheduler()
 
-            # Reset the index to ensure it's a proper DatetimeIndex after filtering
-            filtered_daily_data.index = pd.to_datetime(filtered_daily_data.index)
-
-            if filtered_daily_data.empty:
-                continue
-
-            # Convert filtered daily data to Candle objects
-            filtered_candles = []
-            for idx, row in filtered_daily_data.iterrows():
-                filtered_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
-
-            # Detect demand zones in the filtered daily data
-            demand_zones = self.detect_demand_zones(
-                filtered_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
+        def fetch(symbol):
+            # Fetch daily data once and build the monthly candles from it
+            return timeframes.load_with_higher_timeframe(
+                symbol, "1d", start_date, end_date, "1mo", start_date, end_date
             )
 
-            if not demand_zones:
-                continue
-
-            # Prepare CSV data
-            for dz in demand_zones:
-                base_candles = dz[2]
-
-                # Find the highest high and lowest low of the base candles
-                highest_high = max(candle.high for candle in base_candles)
-                lowest_low = min(candle.low for candle in base_candles)
-
-                # Define leg-in and leg-out candles
-                legin_candle = filtered_candles[dz[0]]
-                legout_candle = filtered_candles[dz[1]]
-
-                # Map the corresponding monthly demand zone
-                higher_timeframe_zone = None
-                for monthly_zone in monthly_demand_zones:
-                    if filtered_daily_data.index[dz[0]] >= monthly_data.index[monthly_zone[0]] and filtered_daily_data.index[dz[1]] <= monthly_data.index[monthly_zone[1]]:
-                        higher_timeframe_zone = monthly_zone
-                        break
-
-                if higher_timeframe_zone:
-                    higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
-                    higher_legout_candle = monthly_candles[higher_timeframe_zone[1]]
-                else:
-                    higher_legin_candle = None
-                    higher_legout_candle = None
-
-                status = self.check_zone_tested_and_target(dz, filtered_candles, dz[1] + 1)
-
-                csv_data.append({
-                    "Symbol": symbol,
-                    "Leg-In Time": legin_candle.date,
-                    "Leg-Out Time": legout_candle.date,
-                    "Zone High": highest_high,
-                    "Zone Low": lowest_low,
-                    "Status": status,
-                    "Higher Timeframe Leg-In Time": higher_legin_candle.date if higher_legin_candle else "N/A",
-                    "Higher Timeframe Leg-Out Time": higher_legout_candle.date if higher_legout_candle else "N/A",
-                    "Higher Timeframe Zone High": higher_legin_candle.high if higher_legin_candle else "N/A",
-                    "Higher Timeframe Zone Low": higher_legout_candle.low if higher_legout_candle else "N/A"
-                })
-
-        # Write the accumulated data to CSV
-        self.write_to_csv(csv_data)
-
-        # Update the output label
-        self.output_label.configure(text=f"Nifty 50 stocks scan completed. Data saved to CSV.")
-
-    def write_to_csv(self, csv_data):
+        params = (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+
+        # Completed symbols are checkpointed, so an interrupted scan with the same settings
+        # picks up where it stopped
+        job = scan_jobs.ScanJob('coinsiding_dz_scan', {
+            'dates': (start_date, end_date),
+            'params': params,
+            'symbols': nifty50_symbols,
+        })
+        jobs = ((symbol, (monthly_data, daily_data, params)) for symbol, (monthly_data, daily_data) in scheduler.run(job.pending(nifty50_symbols), fetch))
+
+        # Detection runs on a process pool while the rest of the symbols download; the rows
+        # are put back in symbol order so the CSV does not depend on which worker finished first
+        scanner = universe_scanner.UniverseScanner()
+        for symbol, rows in scanner.run(jobs, scan_symbol):
+            job.record(symbol, rows)
+        for symbol, rows in universe_scanner.ordered(job.completed.items(), nifty50_symbols):
+            csv_data.extend(rows)
+
+        # Save the accumulated zones to the zone store, then drop the checkpoint
+        self.save_zones(csv_data, "1d", (params, params))
+        job.finish()
+
+        # Update the output label with the symbols that could not be fetched or scanned
+        self.output_label.configure(text=f"Nifty 50 stocks scan completed. Zones saved to the zone store.\n"
+                                         f"{scheduler.failure_report()}\n{scanner.failure_report()}")
+
+    def save_zones(self, csv_data, timeframe, params):
+        # Zones are upserted into the zone store, so a rescan updates their rows instead of
+        # appending duplicates; demand_zone_data.csv is rewritten from the store as a snapshot,
+        # after its existing rows were imported on the first save
         if csv_data:
-            csv_file = 'demand_zone_data.csv'
-            csv_file_exists = os.path.exists(csv_file)
-            with open(csv_file, mode='a', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=csv_data[0].keys())
-                if not csv_file_exists:
-                    writer.writeheader()  # Write the header only if the file does not exist
-                writer.writerows(csv_data)
+            with zone_store.ZoneStore() as store:
+                store.import_csv(zone_store.ZONE_CSV)
+                store.upsert(zone_store.zone_records(csv_data, timeframe, params))
+                store.export_csv(zone_store.ZONE_CSV, side='demand')
 
     def detect_demand_zones(self, candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct):
-        demand_zones = []
-        i = 0
-        while i < len(candles) - 2:
-            if self.is_legin_candle(candles[i], min_legin_pct, max_legin_pct):
-                base_candles = []
-                j = i + 1
-                while j < len(candles) and len(base_candles) < max_base and self.is_base_candle(candles[j], min_base_pct, max_base_pct):
-                    base_candles.append(candles[j])
-                    j += 1
-
-                if j < len(candles) and self.is_legout_candle(candles[j], min_legout_pct, max_legout_pct):
-                    legin_candle = candles[i]
-                    legout_candle = candles[j]
-
-                    # Check if it's a demand zone
-                    if len(base_candles) >= min_base and (legout_candle.is_bullish and
-                                                         legout_candle.close > legin_candle.high and
-                                                         legout_candle.close > max(candle.high for candle in base_candles)):
-                        demand_zones.append((i, j, base_candles))  # Store the indices and base candles
-                i = j  # Skip to the next possible pattern after the legout candle
-            else:
-                i += 1
-
-        return demand_zones
-
-    def check_zone_tested_and_target(self, demand_zone, candles, start_index):
-        base_candles = demand_zone[2]
-        highest_high = max(candle.high for candle in base_candles)
-        lowest_low = min(candle.low for candle in base_candles)
-
-        # Determine the target for a 1:2 risk-reward ratio
-        risk = highest_high - lowest_low
-        target_price = highest_high + 2 * risk
-
-        for k in range(start_index, len(candles)):
-            if candles[k].low <= highest_high and candles[k].high >= lowest_low:
-                # Check if the price hits the 1:2 target after entering the zone
-                for m in range(k, len(candles)):
-                    if candles[m].high >= target_price:
-                        return 'Target Achieved'  # Zone achieved 1:2 target
-                    if candles[m].low < lowest_low:
-                        return 'Tested'  # Zone was broken before achieving target
-                break
-
-        return 'Fresh'  # Zone has not been tested
-
-    def is_legin_candle(self, candle, min_legin_pct, max_legin_pct):
-        return min_legin_pct <= candle.body_percentage <= max_legin_pct
-
-    def is_base_candle(self, candle, min_base_pct, max_base_pct):
-        return min_base_pct <= candle.body_percentage <= max_base_pct
-
-    def is_legout_candle(self, candle, min_legout_pct, max_legout_pct):
-        return min_legout_pct <= candle.body_percentage <= max_legout_pct
-
-# Convert fetched data to Candle objects
-class Candle:
-    def __init__(self, open_price, high, low, close, date):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-        self.date = date
-
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        return self.high - self.low
-
-    @property
-    def body_percentage(self):
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
-
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
+        # Vectorized scan with the same skip-ahead behaviour as the original candle loop
+        return zone_detector.detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base,
+                                                 min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+
+    def check_zones_tested_and_target(self, demand_zones, candles, labels=zone_outcomes.STATUS_LABELS):
+        # All zones are resolved together: each one is checked from the candle after its
+        # leg-out until the last candle in the dataset
+        return zone_outcomes.zone_statuses(demand_zones, candles, labels)
+
+# -----------------------------
+# Per-Symbol Scan
+# -----------------------------
+
+def scan_symbol(symbol, monthly_data, daily_data, params):
+    """
+    Detects the demand zones of one symbol inside its monthly demand zones and returns their
+    CSV rows. Runs in a scan worker process, so it only uses its arguments.
+    """
+    (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+     min_legout_pct, max_legout_pct) = params
+    rows = []
+
+    # Convert monthly data to a CandleSeries
+    monthly_candles = CandleSeries.from_frame(monthly_data)
+
+    # Detect monthly demand zones
+    monthly_demand_zones = zone_detector.detect_demand_zones(
+        monthly_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
+    )
+
+    if not monthly_demand_zones:
+        return rows
+
+    # Bar ranges of the daily series inside the monthly demand zones; windows that share bars
+    # are merged, the others stay apart so no daily zone is built across two of them
+    segments = timeframes.window_segments(
+        daily_data.index, [(monthly_data.index[dz[0]], monthly_data.index[dz[1]]) for dz in monthly_demand_zones]
+    )
+
+    if not segments:
+        return rows
+
+    # Convert daily data to a CandleSeries
+    daily_candles = CandleSeries.from_frame(daily_data)
+
+    # Detect demand zones inside each window of the daily data
+    demand_zones = zone_detector.detect_demand_zones_in_segments(
+        daily_candles, segments, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
+    )
+
+    if not demand_zones:
+        return rows
+
+    # Change: Always check until the last candle in the entire dataset
+    statuses = zone_outcomes.zone_statuses(demand_zones, daily_candles)
+
+    # Map every daily zone to the first monthly zone containing it, in one sorted lookup
+    higher_timeframe_zones = zone_mapping.parent_zones(demand_zones, daily_data.index,
+                                                       monthly_demand_zones, monthly_data.index)
+
+    # Prepare CSV data
+    for dz, status, higher_timeframe_zone in zip(demand_zones, statuses, higher_timeframe_zones):
+        base_candles = dz[2]
+
+        # Find the highest high and lowest low of the base candles
+        highest_high = base_candles.high.max()
+        lowest_low = base_candles.low.min()
+
+        # Define leg-in and leg-out candles
+        legin_candle = daily_candles[dz[0]]
+        legout_candle = daily_candles[dz[1]]
+
+        if higher_timeframe_zone:
+            higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
+            higher_legout_candle = monthly_candles[higher_timeframe_zone[1]]
+        else:
+            higher_legin_candle = None
+            higher_legout_candle = None
+
+        rows.append({
+            "Symbol": symbol,
+            "Leg-In Time": legin_candle.date,
+            "Leg-Out Time": legout_candle.date,
+            "Zone High": highest_high,
+            "Zone Low": lowest_low,
+            "Status": status,
+            "Higher Timeframe Leg-In Time": higher_legin_candle.date if higher_legin_candle else "N/A",
+            "Higher Timeframe Leg-Out Time": higher_legout_candle.date if higher_legout_candle else "N/A",
+            "Higher Timeframe Zone High": higher_legin_candle.high if higher_legin_candle else "N/A",
+            "Higher Timeframe Zone Low": higher_legout_candle.low if higher_legout_candle else "N/A"
+        })
+
+    return rows
 
 # Run the application
 if __name__ == "__main__":
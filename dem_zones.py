@@ -1,8 +1,10 @@
 import customtkinter as ctk
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import ttk
+import ohlcv_cache
+from candles import CandleSeries
 
 class StockApp(ctk.CTk):
     def __init__(self):
@@ -67,7 +69,7 @@ class StockApp(ctk.CTk):
             
             for symbol in self.nifty_50_symbols:
                 self.output_text.insert("1.0", f"Fetching data for {symbol} with period {period} and interval {interval}...\n")
-                data = yf.download(symbol, period=period, interval=interval)
+                data = ohlcv_cache.download(symbol, period=period, interval=interval)
                 self.output_text.insert("2.0", f"Data fetched for {symbol}\n")
                 
                 demand_zones, supply_zones = self.detect_zones(data)
@@ -81,37 +83,48 @@ class StockApp(ctk.CTk):
     def detect_zones(self, data):
         demand_zones = []
         supply_zones = []
+        base_starts = []
+        legouts = []
         
-        data['Candle_Range'] = data['High'] - data['Low']
-        data['Body_Size'] = abs(data['Close'] - data['Open'])
-        data['Exciting'] = (data['Body_Size'] / data['Candle_Range']) > 0.55
-        data['Base'] = (data['Body_Size'] / data['Candle_Range']) < 0.45
+        candles = CandleSeries.from_frame(data)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_ratio = candles.body_size / candles.candle_range
+        exciting = body_ratio > 0.55
+        base = body_ratio < 0.45
         
         i = 0
-        while i < len(data) - 2:
-            if data['Exciting'].iloc[i]:
+        while i < len(candles) - 2:
+            if exciting[i]:
                 base_count = 0
                 j = i + 1
-                while j < len(data) and base_count < 3 and data['Base'].iloc[j]:
+                while j < len(candles) and base_count < 3 and base[j]:
                     base_count += 1
                     j += 1
-                if base_count > 0 and j < len(data) and data['Exciting'].iloc[j]:
-                    zone_tested = self.is_zone_tested(data, i + 1, j - 1)
-                    if data['Close'].iloc[j] > data['Open'].iloc[j]:
-                        demand_zones.append((data.index[i + 1], data['Close'].iloc[i + 1], base_count, zone_tested))
-                    elif data['Close'].iloc[j] < data['Open'].iloc[j]:
-                        supply_zones.append((data.index[i + 1], data['Close'].iloc[i + 1], base_count, zone_tested))
+                if base_count > 0 and j < len(candles) and exciting[j] and candles.direction[j] != 0:
+                    base_starts.append(i + 1)
+                    legouts.append(j)
                 i = j + 1
             else:
                 i += 1
         
+        # Every zone's tested flag comes from one batched lookup
+        tested = self.are_zones_tested(candles, base_starts, legouts)
+        for start, end, zone_tested in zip(base_starts, legouts, tested):
+            zone = (candles.time[start], candles.close[start], end - start, zone_tested)
+            if candles.direction[end] > 0:
+                demand_zones.append(zone)
+            else:
+                supply_zones.append(zone)
+        
         return demand_zones, supply_zones
     
-    def is_zone_tested(self, data, start_index, end_index):
-        for j in range(end_index + 1, len(data)):
-            if data['Low'].iloc[j] <= data['Close'].iloc[start_index] <= data['High'].iloc[j]:
-                return True
-        return False
+    def are_zones_tested(self, candles, base_starts, legouts):
+        # A zone is tested once its leg-out or any later candle trades through the close of its
+        # first base candle; the first such candle of every zone is looked up at once
+        if not base_starts:
+            return []
+        prices = candles.close[base_starts]
+        return (candles.range_index.first_overlap(legouts, prices, prices) < len(candles)).tolist()
     
     def show_all_zones(self):
         self.show_zones_in_table(self.all_demand_zones, self.all_supply_zones)
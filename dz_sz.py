@@ -1,80 +1,33 @@
-import yfinance as yf
 import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
+import ohlcv_cache
+from candles import CandleSeries
+import zone_detector
 
 # Fetch historical data for Bank Nifty
 symbol = "^NSEBANK"
-data = yf.download(symbol, start="2023-01-01", end="2023-12-31", interval="1d")
+data = ohlcv_cache.download(symbol, start="2023-01-01", end="2023-12-31", interval="1d")
 
-# Convert data to a list of Candle objects
-class Candle:
-    def __init__(self, open_price, high, low, close):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
+def is_legin_candle(candles):
+    return candles.body_pct > 60
 
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
+def is_base_candle(candles):
+    return candles.body_pct < 45
 
-    @property
-    def candle_range(self):
-        return self.high - self.low
+def is_legout_candle(candles):
+    return candles.body_pct > 60
 
-    @property
-    def body_percentage(self):
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
+def detect_zones(candles):
+    # Demand and supply zones from one vectorized scan, with the original loop's skip-ahead behaviour
+    return zone_detector.split_zones(candles, *zone_detector.find_zones(
+        candles, is_legin_candle(candles), is_base_candle(candles), is_legout_candle(candles), min_base=1, max_base=5))
 
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
+# Convert fetched data to a CandleSeries
+candles = CandleSeries.from_frame(data)
 
-def is_legin_candle(candle):
-    return candle.body_percentage > 60
-
-def is_base_candle(candle):
-    return candle.body_percentage < 45
-
-def is_legout_candle(candle):
-    return candle.body_percentage > 60
-
-def detect_demand_zones(candles):
-    demand_zones = []
-    i = 0
-    while i < len(candles) - 2:
-        if is_legin_candle(candles[i]):
-            base_candles = []
-            j = i + 1
-            while j < len(candles) and len(base_candles) < 5 and is_base_candle(candles[j]):
-                base_candles.append(candles[j])
-                j += 1
-
-            if j < len(candles) and is_legout_candle(candles[j]):
-                legin_candle = candles[i]
-                legout_candle = candles[j]
-
-                # Check if it's a demand zone
-                if base_candles and (legout_candle.is_bullish and
-                                     legout_candle.close > legin_candle.high and
-                                     legout_candle.close > max(candle.high for candle in base_candles)):
-                    demand_zones.append((i, j))  # Store the indices of the legin and legout candles
-            i = j  # Skip to the next possible pattern after the legout candle
-        else:
-            i += 1
-
-    return demand_zones
-
-# Convert fetched data to Candle objects
-candles = []
-for idx, row in data.iterrows():
-    candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close']))
-
-# Detect demand zones
-demand_zones = detect_demand_zones(candles)
+# Detect demand and supply zones
+demand_zones, supply_zones = detect_zones(candles)
 
 # Display detected demand zones
 for dz in demand_zones:
@@ -82,8 +35,14 @@ for dz in demand_zones:
     legout_index = dz[1]
     print(f"Demand zone detected from {data.index[legin_index]} to {data.index[legout_index]}")
 
-# Plotting the data using mplfinance and marking the demand zones
-demand_zone_lines = []
+# Display detected supply zones
+for sz in supply_zones:
+    legin_index = sz[0]
+    legout_index = sz[1]
+    print(f"Supply zone detected from {data.index[legin_index]} to {data.index[legout_index]}")
+
+# Plotting the data using mplfinance and marking the demand and supply zones
+zone_lines = []
 for dz in demand_zones:
     legin_index = dz[0]
     legout_index = dz[1]
@@ -91,13 +50,20 @@ for dz in demand_zones:
     legout_high = data.iloc[legout_index].High
     legout_low = data.iloc[legout_index].Low
     # Add horizontal lines to mark the demand zones
-    demand_zone_lines.append(mpf.make_addplot([legin_high] * len(data), color='green', linestyle='--'))
-    demand_zone_lines.append(mpf.make_addplot([legout_low] * len(data), color='green', linestyle='--'))
+    zone_lines.append(mpf.make_addplot([legin_high] * len(data), color='green', linestyle='--'))
+    zone_lines.append(mpf.make_addplot([legout_low] * len(data), color='green', linestyle='--'))
+
+# Mark the supply zones the same way, from the leg-in low to the leg-out high
+for sz in supply_zones:
+    legin_low = data.iloc[sz[0]].Low
+    legout_high = data.iloc[sz[1]].High
+    zone_lines.append(mpf.make_addplot([legin_low] * len(data), color='red', linestyle='--'))
+    zone_lines.append(mpf.make_addplot([legout_high] * len(data), color='red', linestyle='--'))
 
 # Configure the plot
 mpf.plot(data, type='candle', style='charles',
-         addplot=demand_zone_lines,
-         title='Bank Nifty with Detected Demand Zones',
+         addplot=zone_lines,
+         title='Bank Nifty with Detected Demand and Supply Zones',
          ylabel='Price',
          volume=True,
          show_nontrading=True)
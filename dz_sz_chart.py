@@ -1,7 +1,10 @@
-import yfinance as yf
 import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
+import ohlcv_cache
+from candles import CandleSeries
+import zone_detector
+import zone_outcomes
 
 # -----------------------------
 # Data Fetching and Preparation
@@ -11,171 +14,66 @@ import matplotlib.pyplot as plt
 symbol = "^NSEBANK"
 start_date = "2023-01-01"
 end_date = "2024-12-31"
-data = yf.download(symbol, start=start_date, end=end_date, interval="1d")
+data = ohlcv_cache.download(symbol, start=start_date, end=end_date, interval="1d")
 
 # Ensure data was fetched successfully
 if data.empty:
     raise ValueError(f"No data fetched for symbol {symbol} between {start_date} and {end_date}.")
 
-# -----------------------------
-# Candle Class Definition
-# -----------------------------
-
-class Candle:
-    """
-    Represents a single candlestick in the chart with properties to determine its characteristics.
-    """
-    def __init__(self, open_price, high, low, close):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-
-    @property
-    def body_size(self):
-        """
-        Calculates the absolute size of the candle's body.
-        """
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        """
-        Calculates the range of the candle (high - low).
-        """
-        return self.high - self.low
-
-    @property
-    def body_percentage(self):
-        """
-        Determines the percentage of the candle's body relative to its range.
-        """
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
-
-    @property
-    def is_bullish(self):
-        """
-        Checks if the candle is bullish (closing price higher than opening price).
-        """
-        return self.close > self.open_price
-
 # -----------------------------
 # Demand Zone Detection Functions
 # -----------------------------
 
-def is_legin_candle(candle):
+def is_legin_candle(candles):
     """
-    Determines if a candle qualifies as a leg-in candle based on body percentage (>50%).
+    Marks the candles that qualify as leg-in candles based on body percentage (>50%).
     """
-    return candle.body_percentage > 50
+    return candles.body_pct > 50
 
-def is_base_candle(candle):
+def is_base_candle(candles):
     """
-    Determines if a candle qualifies as a base candle based on body percentage (<50%).
+    Marks the candles that qualify as base candles based on body percentage (<50%).
     """
-    return candle.body_percentage < 50
+    return candles.body_pct < 50
 
-def is_legout_candle(candle):
+def is_legout_candle(candles):
     """
-    Determines if a candle qualifies as a leg-out candle based on body percentage (>50%).
+    Marks the candles that qualify as leg-out candles based on body percentage (>50%).
     """
-    return candle.body_percentage > 50
+    return candles.body_pct > 50
 
 def detect_demand_zones(candles):
     """
-    Detects demand zones in the list of candles based on the defined criteria.
+    Detects demand zones in a CandleSeries based on the defined criteria.
     
     Returns:
         List of tuples containing:
         - Index of leg-in candle
         - Index of leg-out candle
-        - List of base candles
+        - CandleSeries view of the base candles
     """
-    demand_zones = []
-    i = 0
-    while i < len(candles) - 2:
-        if is_legin_candle(candles[i]):
-            base_candles = []
-            j = i + 1
-            # Collect up to 5 consecutive base candles
-            while j < len(candles) and len(base_candles) < 5 and is_base_candle(candles[j]):
-                base_candles.append(candles[j])
-                j += 1
-
-            if j < len(candles) and is_legout_candle(candles[j]):
-                legin_candle = candles[i]
-                legout_candle = candles[j]
-
-                # Verify the demand zone criteria
-                if base_candles and (legout_candle.is_bullish and
-                                     legout_candle.close > legin_candle.high and
-                                     legout_candle.close > max(candle.high for candle in base_candles)):
-                    demand_zones.append((i, j, base_candles))  # Store indices and base candles
-            i = j  # Move to the next potential pattern after the leg-out candle
-        else:
-            i += 1
-
-    return demand_zones
-
-def check_zone_tested_and_target(demand_zone, candles, start_index):
+    # Vectorized scan with the same skip-ahead behaviour as the original candle loop
+    return zone_detector.rally_base_rally_zones(candles, is_legin_candle(candles), is_base_candle(candles),
+                                                is_legout_candle(candles), min_base=1, max_base=5)
+
+def check_zones_tested_and_target(demand_zones, candles):
     """
-    Checks whether the price has returned to the detected demand zone and if it achieved a 1:2 risk-reward target.
+    Checks whether the price has returned to each detected demand zone and if it achieved a 1:2 risk-reward target.
+    Each zone is checked from the candle after its leg-out; all zones are resolved together in one pass.
     
-    Returns:
+    Returns one color per zone:
         - 'pink' if the target was achieved
         - 'blue' if the zone was broken without achieving the target
         - 'green' if the zone remains fresh (untested)
     """
-    base_candles = demand_zone[2]
-    highest_high = max(candle.high for candle in base_candles)
-    lowest_low = min(candle.low for candle in base_candles)
-    
-    # Calculate risk and target price for 1:2 risk-reward ratio
-    risk = highest_high - lowest_low
-    target_price = highest_high + 2 * risk
-
-    # Flags to track the status
-    zone_entered = False
-    target_hit = False
-    zone_broken = False
-
-    # Iterate through candles starting from after the leg-out candle
-    for k in range(start_index, len(candles)):
-        candle = candles[k]
-        # Check if price enters the zone
-        if not zone_entered:
-            if candle.low <= highest_high and candle.high >= lowest_low:
-                zone_entered = True
-        if zone_entered and not target_hit:
-            # Check if target is hit
-            if candle.high >= target_price:
-                target_hit = True
-                break  # Target achieved
-            # Check if zone is broken before target
-            if candle.low < lowest_low:
-                zone_broken = True
-                break  # Zone broken before target
-
-    if zone_entered:
-        if target_hit:
-            return 'pink'  # Target achieved
-        elif zone_broken:
-            return 'blue'  # Zone broken before achieving target
-        else:
-            return 'green'  # Zone entered but neither target hit nor zone broken
-    else:
-        return 'green'  # Zone not yet tested
+    return zone_outcomes.zone_statuses(demand_zones, candles, zone_outcomes.STATUS_COLORS)
 
 # -----------------------------
 # Data Processing and Visualization
 # -----------------------------
 
-# Convert fetched data to Candle objects
-candles = []
-for idx, row in data.iterrows():
-    candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close']))
+# Convert fetched data to a CandleSeries
+candles = CandleSeries.from_frame(data)
 
 # Detect demand zones based on the updated criteria
 demand_zones = detect_demand_zones(candles)
@@ -194,17 +92,16 @@ fig, ax = mpf.plot(data, type='candle', style='charles',
                    show_nontrading=True,
                    returnfig=True)
 
+# Check the status of every zone (fresh, tested, or target achieved)
+colors = check_zones_tested_and_target(demand_zones, candles)
+
 # Iterate through detected demand zones to analyze and plot them
-for dz in demand_zones:
+for dz, color in zip(demand_zones, colors):
     base_candles = dz[2]
     
     # Determine the highest high and lowest low among base candles
-    highest_high = max(candle.high for candle in base_candles)
-    lowest_low = min(candle.low for candle in base_candles)
-    
-    # Check the status of the zone (fresh, tested, or target achieved)
-    start_index = dz[1] + 1  # Begin checking after the leg-out candle
-    color = check_zone_tested_and_target(dz, candles, start_index)
+    highest_high = base_candles.high.max()
+    lowest_low = base_candles.low.min()
     
     # Update counters based on the zone status
     if color == 'green':
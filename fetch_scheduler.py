@@ -0,0 +1,81 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# -----------------------------
+# Concurrent Fetch Scheduling
+# -----------------------------
+
+# Errors that mean "this symbol has no usable data"; retrying them cannot help
+PERMANENT_ERRORS = (ValueError, KeyError)
+
+
+class FetchScheduler:
+    """
+    Runs fetch jobs on a bounded thread pool and hands results back in completion order.
+
+    Up to ``max_workers`` requests are in flight at once. A job that raises a transient error
+    is retried up to ``retries`` times with full-jitter exponential backoff; errors listed in
+    ``permanent_errors`` fail immediately. Failed jobs never stop the run: they are collected
+    in ``failures`` (key -> exception) and summarised by failure_report().
+    """
+    def __init__(self, max_workers=8, retries=3, backoff=1.0, max_backoff=30.0,
+                 permanent_errors=PERMANENT_ERRORS, sleep=time.sleep):
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.permanent_errors = permanent_errors
+        self.sleep = sleep
+        self.failures = {}
+
+    def run(self, keys, fetch):
+        """
+        Calls fetch(key) for every key and yields (key, result) as soon as each one lands,
+        so callers can start processing a symbol while the rest are still downloading.
+        Failures accumulate across calls on the same scheduler.
+
+        A consumer that stops early (closes the generator, for example on a cancelled scan)
+        drops the fetches that have not started instead of waiting for them.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(self._fetch_with_retry, fetch, key): key for key in keys}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    self.failures[key] = error
+                    continue
+                yield key, result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fetch_with_retry(self, fetch, key):
+        attempt = 0
+        while True:
+            try:
+                return fetch(key)
+            except self.permanent_errors:
+                raise
+            except Exception:
+                if attempt >= self.retries:
+                    raise
+                self.sleep(self.delay(attempt))
+                attempt += 1
+
+    def delay(self, attempt):
+        """
+        Full-jitter backoff: a random wait up to backoff * 2**attempt, capped at max_backoff.
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def failure_report(self):
+        if not self.failures:
+            return "All symbols fetched successfully."
+        lines = [f"{len(self.failures)} fetch(es) failed:"]
+        for key, error in self.failures.items():
+            name = ", ".join(key) if isinstance(key, tuple) else key
+            lines.append(f"{name}: {type(error).__name__}: {error}")
+        return "\n".join(lines)
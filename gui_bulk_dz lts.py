@@ -1,84 +1,59 @@
 import customtkinter as ctk
-import yfinance as yf
 import pandas as pd
 import matplotlib.pyplot as plt
 import mplfinance as mpf
-from tkinter import messagebox
-
-# -----------------------------
-# Candle Class Definition
-# -----------------------------
-
-class Candle:
-    def __init__(self, open_price, high, low, close, date):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-        self.date = date
-
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        return self.high - self.low
-
-    @property
-    def body_percentage(self):
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
-
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
-
-    @property
-    def upper_body(self):
-        return max(self.open_price, self.close)
+from tkinter import messagebox, ttk
+import ohlcv_cache
+from candles import CandleSeries
+import scan_jobs
+import scan_worker
+import universe_scanner
+import zone_outcomes
+import zone_store
 
 # -----------------------------
 # Demand Zone Detection Functions
 # -----------------------------
 
-def is_legin_candle(candle, min_body_percent, min_candles):
-    return candle.body_percentage > min_body_percent and min_candles > 0
+def is_legin_candle(candles, min_body_percent, min_candles):
+    return (candles.body_pct > min_body_percent) & (min_candles > 0)
 
-def is_base_candle(candle, max_body_percent):
-    return candle.body_percentage < max_body_percent
+def is_base_candle(candles, max_body_percent):
+    return candles.body_pct < max_body_percent
 
-def is_legout_candle(candle, min_body_percent):
-    return candle.body_percentage > min_body_percent
+def is_legout_candle(candles, min_body_percent):
+    return candles.body_pct > min_body_percent
 
 def detect_demand_zones(candles, min_body_percent_legin, max_body_percent_base, min_body_percent_legout, max_base_candles, min_legin_candles, min_legout_candles):
+    # Classify every candle once
+    legin = is_legin_candle(candles, min_body_percent_legin, min_legin_candles)
+    base = is_base_candle(candles, max_body_percent_base)
+    legout = is_legout_candle(candles, min_body_percent_legout)
+
     demand_zones = []
     i = 0
     while i < len(candles) - 2:
-        if is_legin_candle(candles[i], min_body_percent_legin, min_legin_candles):
-            base_candles = []
+        if legin[i]:
             j = i + 1
-            while j < len(candles) and len(base_candles) < max_base_candles and is_base_candle(candles[j], max_body_percent_base):
-                base_candles.append(candles[j])
+            while j < len(candles) and j - i - 1 < max_base_candles and base[j]:
                 j += 1
+            base_candles = candles[i + 1:j]
 
             if base_candles:  # Ensure there are base candles before proceeding
                 # Check if the required number of leg-out candles is found
-                legout_candles = []
-                while j < len(candles) and len(legout_candles) < min_legout_candles and is_legout_candle(candles[j], min_body_percent_legout):
-                    legout_candles.append(candles[j])
+                legout_start = j
+                while j < len(candles) and j - legout_start < min_legout_candles and legout[j]:
                     j += 1
+                legout_candles = candles[legout_start:j]
 
                 if len(legout_candles) == min_legout_candles:
-                    legin_candle = candles[i]
-                    legout_candle = legout_candles[-1]  # Last leg-out candle
+                    last = j - 1  # Last leg-out candle
 
                     # Determine the upper boundary of the demand zone
-                    upper_body_lowest = min(c.upper_body for c in base_candles)
-                    zone_low = min(candle.low for candle in base_candles)
+                    upper_body_lowest = base_candles.upper_body.min()
+                    zone_low = base_candles.low.min()
 
-                    if legout_candle.is_bullish and legout_candle.close > legin_candle.high and legout_candle.close > upper_body_lowest:
+                    if candles.direction[last] > 0 and candles.close[last] > candles.high[i] and candles.close[last] > upper_body_lowest:
                         demand_zones.append((i, j-1, base_candles, legout_candles, upper_body_lowest, zone_low))
                 else:
                     j += 1  # Move to the next potential pattern after insufficient leg-out candles
@@ -89,55 +64,21 @@ def detect_demand_zones(candles, min_body_percent_legin, max_body_percent_base,
 
     return demand_zones
 
-def check_zone_tested_and_target(demand_zone, candles, start_index):
-    upper_body_lowest = demand_zone[4]
-    zone_low = demand_zone[5]
-    
-    risk = upper_body_lowest - zone_low
-    target_price = upper_body_lowest + 2 * risk
-
-    zone_entered = False
-    target_hit = False
-    zone_broken = False
-
-    for k in range(start_index, len(candles)):
-        candle = candles[k]
-        if not zone_entered:
-            if candle.low <= upper_body_lowest and candle.high >= zone_low:
-                zone_entered = True
-        if zone_entered and not target_hit:
-            if candle.high >= target_price:
-                target_hit = True
-                break
-            if candle.low < zone_low:
-                zone_broken = True
-                break
-
-    if zone_entered:
-        if target_hit:
-            return 'pink'
-        elif zone_broken:
-            return 'blue'
-        else:
-            return 'green'
-    else:
-        return 'green'
+def check_zones_tested_and_target(demand_zones, candles, starts):
+    # Zone bounds are the lowest upper body and the zone low; every zone is checked from its
+    # entry in ``starts`` and all of them are resolved together
+    outcomes = zone_outcomes.evaluate_zones(candles, [dz[4] for dz in demand_zones],
+                                            [dz[5] for dz in demand_zones], starts)
+    return [zone_outcomes.STATUS_COLORS[outcome] for outcome in outcomes]
 
 # -----------------------------
 # Chart Display Functionality
 # -----------------------------
 
 def display_chart_with_zones(stock, candles, demand_zones):
-    # Convert the list of Candle objects into a DataFrame
-    data = {
-        'Date': [c.date for c in candles],
-        'Open': [c.open_price for c in candles],
-        'High': [c.high for c in candles],
-        'Low': [c.low for c in candles],
-        'Close': [c.close for c in candles],
-    }
-    df = pd.DataFrame(data)
-    df.set_index('Date', inplace=True)
+    # Convert the CandleSeries into a DataFrame
+    df = candles.to_frame()
+    df.index.name = 'Date'
 
     # Prepare the zones to be plotted
     colors = {
@@ -147,20 +88,69 @@ def display_chart_with_zones(stock, candles, demand_zones):
     }
 
     addplots = []
-    for dz in demand_zones:
-        start_index = dz[1] + 1
-        color = check_zone_tested_and_target(dz, candles, start_index)
+    zone_colors = check_zones_tested_and_target(demand_zones, candles, [dz[1] + 1 for dz in demand_zones])
+    for dz, color in zip(demand_zones, zone_colors):
         addplots.append(mpf.make_addplot([dz[4]] * len(df), panel=0, color=colors[color], alpha=0.3))
         addplots.append(mpf.make_addplot([dz[5]] * len(df), panel=0, color=colors[color], alpha=0.3))
 
     # Plot the candlestick chart with demand zones
     mpf.plot(df, type='candle', style='charles', addplot=addplots, title=stock, ylabel='Price')
 
+# -----------------------------
+# Per-Stock Analysis
+# -----------------------------
+
+def analyze_stock(stock, data, params):
+    """
+    Detects and evaluates the demand zones of one stock and returns its summary row and zone
+    rows. Runs in a scan worker process, so it only uses its arguments.
+    """
+    candles = CandleSeries.from_frame(data)
+
+    demand_zones = detect_demand_zones(candles, *params)
+
+    fresh_zones = 0
+    tested_zones = 0
+    target_zones = 0
+    zone_details = []
+
+    zone_colors = check_zones_tested_and_target(demand_zones, candles, [dz[1] + 1 for dz in demand_zones])
+    for dz, color in zip(demand_zones, zone_colors):
+        zone_details.append({
+            "Stock": stock,
+            "Leg-In Date": candles[dz[0]].date,
+            "Leg-Out Date": candles[dz[1]].date,
+            "Zone High (Upper Body Lowest)": dz[4],
+            "Zone Low": dz[5],
+            "Zone Status": "Achieved Target" if color == 'pink' else "Tested" if color == 'blue' else "Fresh",
+        })
+
+        if color == 'green':
+            fresh_zones += 1
+        elif color == 'blue':
+            tested_zones += 1
+        elif color == 'pink':
+            target_zones += 1
+
+    summary = {
+        "Stock": stock,
+        "Fresh Zones (Green)": fresh_zones,
+        "Tested Zones (Blue)": tested_zones,
+        "Target Zones (Pink)": target_zones
+    }
+    return summary, zone_details
+
 # -----------------------------
 # Analysis for All Stocks
 # -----------------------------
 
+# The background analysis of the whole universe, while one is running
+analysis_worker = None
+
 def run_analysis_for_all():
+    global analysis_worker
+    if analysis_worker is not None and analysis_worker.running:
+        return
     try:
         start_date = start_date_entry.get()
         end_date = end_date_entry.get()
@@ -174,65 +164,119 @@ def run_analysis_for_all():
 
         symbols_df = pd.read_csv('yf_symbols.csv')
         nifty50_stocks = symbols_df['Symbol'].tolist()
+    except Exception as e:
+        messagebox.showerror("Error", str(e))
+        return
 
+    params = (min_body_percent_legin, max_body_percent_base, min_body_percent_legout, max_base_candles, min_legin_candles, min_legout_candles)
+
+    # Completed stocks are checkpointed, so an interrupted or cancelled analysis with the
+    # same settings picks up where it stopped
+    job = scan_jobs.ScanJob('gui_bulk_dz_lts_analysis', {
+        'dates': (start_date, end_date, interval),
+        'params': params,
+        'stocks': nifty50_stocks,
+    })
+
+    def analyze(worker):
         analysis_results = []
         zone_details = []
-
-        for stock in nifty50_stocks:
-            data = yf.download(stock, start=start_date, end=end_date, interval=interval)
-            if data.empty:
-                print(f"No data fetched for symbol {stock} between {start_date} and {end_date}.")
-                continue
-
-            candles = []
-            for idx, row in data.iterrows():
-                candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
-
-            demand_zones = detect_demand_zones(candles, min_body_percent_legin, max_body_percent_base, min_body_percent_legout, max_base_candles, min_legin_candles, min_legout_candles)
-
-            fresh_zones = 0
-            tested_zones = 0
-            target_zones = 0
-
-            for dz in demand_zones:
-                start_index = dz[1] + 1
-                color = check_zone_tested_and_target(dz, candles, start_index)
-                zone_details.append({
-                    "Stock": stock,
-                    "Leg-In Date": candles[dz[0]].date,
-                    "Leg-Out Date": candles[dz[1]].date,
-                    "Zone High (Upper Body Lowest)": dz[4],
-                    "Zone Low": dz[5],
-                    "Zone Status": "Achieved Target" if color == 'pink' else "Tested" if color == 'blue' else "Fresh",
-                })
-
-                if color == 'green':
-                    fresh_zones += 1
-                elif color == 'blue':
-                    tested_zones += 1
-                elif color == 'pink':
-                    target_zones += 1
-
-            analysis_results.append({
-                "Stock": stock,
-                "Fresh Zones (Green)": fresh_zones,
-                "Tested Zones (Blue)": tested_zones,
-                "Target Zones (Pink)": target_zones
-            })
+        finished = list(job.completed)
+        for stock, result in job.completed.items():
+            worker.result(stock, result)
+
+        def mark_done(stock, status):
+            finished.append(stock)
+            worker.progress(len(finished), len(nifty50_stocks), stock, status)
+
+        def jobs():
+            for stock in job.pending(nifty50_stocks):
+                if worker.cancelled:
+                    return
+                data = ohlcv_cache.download(stock, start=start_date, end=end_date, interval=interval)
+                if data.empty:
+                    print(f"No data fetched for symbol {stock} between {start_date} and {end_date}.")
+                    mark_done(stock, "no data")
+                    continue
+                yield stock, (data, params)
+
+        # Each stock is analysed on a process pool while the next one downloads; results are
+        # put back in symbol order so the CSVs do not depend on which worker finished first
+        scanner = universe_scanner.UniverseScanner()
+        for stock, result in scanner.run(jobs(), analyze_stock, cancel=worker.cancel_event):
+            job.record(stock, result)
+            worker.result(stock, result)
+            mark_done(stock, f"{len(result[1])} zone(s)")
+        if scanner.failures:
+            print(scanner.failure_report())
+
+        # A cancelled analysis keeps its checkpoint and leaves the CSVs untouched
+        job.save()
+        if worker.cancelled:
+            return (f"Analysis cancelled with {len(job.completed)} of {len(nifty50_stocks)} stocks done. "
+                    f"Run it again with the same settings to resume.")
+
+        for stock, (summary, details) in universe_scanner.ordered(job.completed.items(), nifty50_stocks):
+            analysis_results.append(summary)
+            zone_details.extend(details)
 
         # Save the summary analysis results
         analysis_df = pd.DataFrame(analysis_results)
         analysis_csv_filename = "nifty50_demand_zones_analysis.csv"
-        analysis_df.to_csv(analysis_csv_filename, index=False)
+        with scan_jobs.atomic_output(analysis_csv_filename) as file:
+            analysis_df.to_csv(file, index=False)
 
         # Save the detailed zones data
         zones_df = pd.DataFrame(zone_details)
         zones_csv_filename = "zones.csv"
-        zones_df.to_csv(zones_csv_filename, index=False)
-
-        messagebox.showinfo("Success", f"Analysis saved to {analysis_csv_filename} and zone details saved to {zones_csv_filename}.")
-    except Exception as e:
-        messagebox.showerror("Error", str(e))
+        with scan_jobs.atomic_output(zones_csv_filename) as file:
+            zones_df.to_csv(file, index=False)
+
+        # Keep the zones in the zone store too, where they can be queried per symbol and status
+        with zone_store.ZoneStore() as store:
+            store.upsert(zone_store.zone_records(zone_details, interval, params))
+        job.finish()
+
+        return f"Analysis saved to {analysis_csv_filename} and zone details saved to {zones_csv_filename}."
+
+    # Downloads and analysis run on a worker thread; the widgets are only touched from the
+    # Tk thread, as the worker reports progress and results
+    run_all_button.configure(state="disabled")
+    cancel_button.configure(state="normal")
+    progress_bar.set(0)
+    if job.resumed:
+        progress_label.configure(text=f"Resuming analysis, {job.resumed} stocks already done...")
+    else:
+        progress_label.configure(text="Starting analysis...")
+    results_table.delete(*results_table.get_children())
+    analysis_worker = scan_worker.ScanWorker(root, analyze, on_progress=show_progress,
+                                             on_result=add_result_row, on_done=analysis_finished).start()
+
+def cancel_analysis():
+    if analysis_worker is not None and analysis_worker.running:
+        analysis_worker.cancel()
+        cancel_button.configure(state="disabled")
+        progress_label.configure(text="Cancelling analysis...")
+
+def show_progress(done, total, stock, status):
+    progress_bar.set(min(done / total, 1) if total else 1)
+    progress_label.configure(text=f"{done}/{total}  {stock}: {status}")
+
+def add_result_row(stock, result):
+    summary, details = result
+    results_table.insert("", "end", values=[summary[column] for column in results_table["columns"]])
+
+def analysis_finished(message, error):
+    run_all_button.configure(state="normal")
+    cancel_button.configure(state="disabled")
+    if error is not None:
+        progress_label.configure(text="Analysis failed.")
+        messagebox.showerror("Error", str(error))
+        return
+    if not analysis_worker.cancelled:
+        progress_bar.set(1)
+    progress_label.configure(text="Analysis cancelled." if analysis_worker.cancelled else "Analysis finished.")
+    messagebox.showinfo("Cancelled" if analysis_worker.cancelled else "Success", message)
 
 # -----------------------------
 # Analysis for Individual Stock
@@ -251,14 +295,12 @@ def view_chart():
         min_legin_candles = int(min_legin_candles_entry.get())
         min_legout_candles = int(min_legout_candles_entry.get())
 
-        data = yf.download(stock, start=start_date, end=end_date, interval=interval)
+        data = ohlcv_cache.download(stock, start=start_date, end=end_date, interval=interval)
         if data.empty:
             messagebox.showerror("Error", f"No data fetched for symbol {stock} between {start_date} and {end_date}.")
             return
 
-        candles = []
-        for idx, row in data.iterrows():
-            candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
+        candles = CandleSeries.from_frame(data)
 
         demand_zones = detect_demand_zones(candles, min_body_percent_legin, max_body_percent_base, min_body_percent_legout, max_base_candles, min_legin_candles, min_legout_candles)
 
@@ -278,6 +320,7 @@ def create_gui():
     ctk.set_appearance_mode("System")  # Modes: "System" (default), "Dark", "Light"
     ctk.set_default_color_theme("blue")  # Themes: "blue" (default), "dark-blue", "green"
 
+    global root
     root = ctk.CTk()
     root.title("Demand Zone Detection")
 
@@ -287,6 +330,7 @@ def create_gui():
     global start_date_entry, end_date_entry, interval_entry, min_body_percent_legin_entry
     global max_body_percent_base_entry, min_body_percent_legout_entry, max_base_candles_entry
     global min_legin_candles_entry, min_legout_candles_entry, stock_selector
+    global run_all_button, cancel_button, progress_bar, progress_label, results_table
 
     ctk.CTkLabel(frame, text="Select Stock:").grid(row=0, column=0, sticky="w", padx=10, pady=5)
     stock_selector = ctk.CTkComboBox(frame, values=pd.read_csv('yf_symbols.csv')['Symbol'].tolist())
@@ -338,9 +382,28 @@ def create_gui():
     min_legout_candles_entry.grid(row=9, column=1, padx=10, pady=5)
 
     ctk.CTkButton(frame, text="View Chart for Selected Stock", command=view_chart).grid(row=10, column=0, columnspan=2, pady=10)
-    ctk.CTkButton(frame, text="Run Analysis for All Stocks", command=run_analysis_for_all).grid(row=11, column=0, columnspan=2, pady=10)
+    run_all_button = ctk.CTkButton(frame, text="Run Analysis for All Stocks", command=run_analysis_for_all)
+    run_all_button.grid(row=11, column=0, columnspan=2, pady=10)
+
+    # Progress of a running analysis, which can be cancelled between stocks
+    progress_bar = ctk.CTkProgressBar(frame)
+    progress_bar.set(0)
+    progress_bar.grid(row=12, column=0, columnspan=2, padx=10, pady=5, sticky="ew")
+    progress_label = ctk.CTkLabel(frame, text="")
+    progress_label.grid(row=13, column=0, columnspan=2, padx=10, pady=5)
+    cancel_button = ctk.CTkButton(frame, text="Cancel Analysis", command=cancel_analysis, state="disabled")
+    cancel_button.grid(row=14, column=0, columnspan=2, pady=10)
+
+    # Per-stock summary, filled in as each stock finishes
+    columns = ("Stock", "Fresh Zones (Green)", "Tested Zones (Blue)", "Target Zones (Pink)")
+    results_table = ttk.Treeview(frame, columns=columns, show="headings", height=10)
+    for col in columns:
+        results_table.heading(col, text=col)
+        results_table.column(col, minwidth=0, width=120)
+    results_table.grid(row=15, column=0, columnspan=2, padx=10, pady=10, sticky="ew")
 
     root.mainloop()
 
 # Run the GUI
-create_gui()
+if __name__ == "__main__":
+    create_gui()
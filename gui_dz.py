@@ -1,8 +1,11 @@
-import yfinance as yf
 import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
 import customtkinter as ctk
+import ohlcv_cache
+from candles import CandleSeries
+import zone_detector
+import zone_outcomes
 
 # Define the main application class
 class DemandZoneApp(ctk.CTk):
@@ -101,12 +104,10 @@ class DemandZoneApp(ctk.CTk):
         max_legout_pct = float(self.max_legout_entry.get() or "100")
 
         # Fetch historical data for the given symbol
-        data = yf.download(symbol, start=start_date, end=end_date, interval="1d")
+        data = ohlcv_cache.download(symbol, start=start_date, end=end_date, interval="1d")
 
-        # Convert data to a list of Candle objects
-        candles = []
-        for idx, row in data.iterrows():
-            candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close']))
+        # Convert data to a CandleSeries
+        candles = CandleSeries.from_frame(data)
 
         # Detect demand zones using user-defined or default parameters
         demand_zones = self.detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
@@ -125,17 +126,16 @@ class DemandZoneApp(ctk.CTk):
                            show_nontrading=True,
                            returnfig=True)
 
+        # Check if the zones have been tested and if they met the 1:2 target
+        colors = self.check_zones_tested_and_target(demand_zones, candles)
+
         # Add horizontal rays for demand zones
-        for dz in demand_zones:
+        for dz, color in zip(demand_zones, colors):
             base_candles = dz[2]
 
             # Find the highest high and lowest low of the base candles
-            highest_high = max(candle.high for candle in base_candles)
-            lowest_low = min(candle.low for candle in base_candles)
-
-            # Check if the zone has been tested and if it met the 1:2 target
-            start_index = dz[1] + 1  # Start checking after the leg-out candle
-            color = self.check_zone_tested_and_target(dz, candles, start_index)
+            highest_high = base_candles.high.max()
+            lowest_low = base_candles.low.min()
 
             if color == 'green':
                 fresh_zones += 1
@@ -157,86 +157,14 @@ class DemandZoneApp(ctk.CTk):
         self.output_label.configure(text=output_text)
 
     def detect_demand_zones(self, candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct):
-        demand_zones = []
-        i = 0
-        while i < len(candles) - 2:
-            if self.is_legin_candle(candles[i], min_legin_pct, max_legin_pct):
-                base_candles = []
-                j = i + 1
-                while j < len(candles) and len(base_candles) < max_base and self.is_base_candle(candles[j], min_base_pct, max_base_pct):
-                    base_candles.append(candles[j])
-                    j += 1
-
-                if j < len(candles) and self.is_legout_candle(candles[j], min_legout_pct, max_legout_pct):
-                    legin_candle = candles[i]
-                    legout_candle = candles[j]
-
-                    # Check if it's a demand zone
-                    if len(base_candles) >= min_base and (legout_candle.is_bullish and
-                                                         legout_candle.close > legin_candle.high and
-                                                         legout_candle.close > max(candle.high for candle in base_candles)):
-                        demand_zones.append((i, j, base_candles))  # Store the indices and base candles
-                i = j  # Skip to the next possible pattern after the legout candle
-            else:
-                i += 1
-
-        return demand_zones
-
-    def check_zone_tested_and_target(self, demand_zone, candles, start_index):
-        base_candles = demand_zone[2]
-        highest_high = max(candle.high for candle in base_candles)
-        lowest_low = min(candle.low for candle in base_candles)
-
-        # Determine the target for a 1:2 risk-reward ratio
-        risk = highest_high - lowest_low
-        target_price = highest_high + 2 * risk
-
-        for k in range(start_index, len(candles)):
-            if candles[k].low <= highest_high and candles[k].high >= lowest_low:
-                # Check if the price hits the 1:2 target after entering the zone
-                for m in range(k, len(candles)):
-                    if candles[m].high >= target_price:
-                        return 'pink'  # Zone achieved 1:2 target
-                    if candles[m].low < lowest_low:
-                        return 'blue'  # Zone was broken before achieving target
-                break
-
-        return 'green'  # Zone has not been tested
-
-    def is_legin_candle(self, candle, min_legin_pct, max_legin_pct):
-        return min_legin_pct <= candle.body_percentage <= max_legin_pct
-
-    def is_base_candle(self, candle, min_base_pct, max_base_pct):
-        return min_base_pct <= candle.body_percentage <= max_base_pct
-
-    def is_legout_candle(self, candle, min_legout_pct, max_legout_pct):
-        return min_legout_pct <= candle.body_percentage <= max_legout_pct
-
-# Convert fetched data to Candle objects
-class Candle:
-    def __init__(self, open_price, high, low, close):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        return self.high - self.low
-
-    @property
-    def body_percentage(self):
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
-
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
+        # Vectorized scan with the same skip-ahead behaviour as the original candle loop
+        return zone_detector.detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base,
+                                                 min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+
+    def check_zones_tested_and_target(self, demand_zones, candles, labels=zone_outcomes.STATUS_COLORS):
+        # All zones are resolved together: each one is checked from the candle after its
+        # leg-out until the last candle in the dataset
+        return zone_outcomes.zone_statuses(demand_zones, candles, labels)
 
 # Run the application
 if __name__ == "__main__":
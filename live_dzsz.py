@@ -1,11 +1,25 @@
 import customtkinter as ctk
-import yfinance as yf
+import numpy as np
 import pandas as pd
 import tkinter as tk
 from tkinter import ttk
 import sqlite3
 import asyncio
 import threading
+import live_feed
+import ohlcv_cache
+from candles import CandleSeries
+from zone_detector import DEMAND
+from zone_stream import StreamingZoneDetector
+from price_index import ZonePriceIndex
+
+# Zones found on the live minute bars: the thresholds of detect_zones as inclusive body %
+# ranges (leg-in, base count, base, leg-out) for the streaming detector
+LIVE_ZONE_PARAMS = (55, 100, 1, 3, 0, 45, 55, 100)
+
+# An order is placed when the price comes within 1% of a zone's price
+ZONE_PROXIMITY = 0.01
+
 
 class StockApp(ctk.CTk):
     def __init__(self):
@@ -66,6 +80,11 @@ class StockApp(ctk.CTk):
 
         self.all_demand_zones = []
         self.all_supply_zones = []
+        # The same zones by symbol and price, for the tick lookups of check_zones
+        self.demand_index = ZonePriceIndex()
+        self.supply_index = ZonePriceIndex()
+        self.minute_bars = None
+        self.live_detectors = {}
 
     def create_orders_table(self):
         with self.conn:
@@ -84,54 +103,67 @@ class StockApp(ctk.CTk):
         if period and interval:
             self.all_demand_zones.clear()
             self.all_supply_zones.clear()
+            self.demand_index.clear()
+            self.supply_index.clear()
 
             for symbol in self.nifty_50_symbols:
                 self.output_text.insert("1.0", f"Fetching data for {symbol} with period {period} and interval {interval}...\n")
-                data = yf.download(symbol, period=period, interval=interval)
+                data = ohlcv_cache.download(symbol, period=period, interval=interval)
                 self.output_text.insert("2.0", f"Data fetched for {symbol}\n")
 
                 demand_zones, supply_zones = self.detect_zones(data)
                 for zone in demand_zones:
-                    self.all_demand_zones.append((symbol, zone[0], zone[1], zone[2], zone[3]))
+                    self.add_zone(self.all_demand_zones, self.demand_index, (symbol, zone[0], zone[1], zone[2], zone[3]))
                 for zone in supply_zones:
-                    self.all_supply_zones.append((symbol, zone[0], zone[1], zone[2], zone[3]))
+                    self.add_zone(self.all_supply_zones, self.supply_index, (symbol, zone[0], zone[1], zone[2], zone[3]))
         else:
             self.output_text.insert("1.0", "Please enter valid period and interval.\n")
 
     def detect_zones(self, data):
         demand_zones = []
         supply_zones = []
+        base_starts = []
+        legouts = []
 
-        data['Candle_Range'] = data['High'] - data['Low']
-        data['Body_Size'] = abs(data['Close'] - data['Open'])
-        data['Exciting'] = (data['Body_Size'] / data['Candle_Range']) > 0.55
-        data['Base'] = (data['Body_Size'] / data['Candle_Range']) < 0.45
+        candles = CandleSeries.from_frame(data)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            body_ratio = candles.body_size / candles.candle_range
+        exciting = body_ratio > 0.55
+        base = body_ratio < 0.45
 
         i = 0
-        while i < len(data) - 2:
-            if data['Exciting'].iloc[i]:
+        while i < len(candles) - 2:
+            if exciting[i]:
                 base_count = 0
                 j = i + 1
-                while j < len(data) and base_count < 3 and data['Base'].iloc[j]:
+                while j < len(candles) and base_count < 3 and base[j]:
                     base_count += 1
                     j += 1
-                if base_count > 0 and j < len(data) and data['Exciting'].iloc[j]:
-                    zone_tested = self.is_zone_tested(data, i + 1, j - 1)
-                    if data['Close'].iloc[j] > data['Open'].iloc[j]:
-                        demand_zones.append((data.index[i + 1], data['Close'].iloc[i + 1], base_count, zone_tested))
-                    elif data['Close'].iloc[j] < data['Open'].iloc[j]:
-                        supply_zones.append((data.index[i + 1], data['Close'].iloc[i + 1], base_count, zone_tested))
+                if base_count > 0 and j < len(candles) and exciting[j] and candles.direction[j] != 0:
+                    base_starts.append(i + 1)
+                    legouts.append(j)
                 i = j + 1
             else:
                 i += 1
 
+        # Every zone's tested flag comes from one batched lookup
+        tested = self.are_zones_tested(candles, base_starts, legouts)
+        for start, end, zone_tested in zip(base_starts, legouts, tested):
+            zone = (candles.time[start], candles.close[start], end - start, zone_tested)
+            if candles.direction[end] > 0:
+                demand_zones.append(zone)
+            else:
+                supply_zones.append(zone)
+
         return demand_zones, supply_zones
 
-    def is_zone_tested(self, data, start_index, end_index):
-        for j in range(end_index + 1, len(data)):
-            if data['Low'].iloc[j] <= data['Close'].iloc[start_index] <= data['High'].iloc[j]:
-                return True
-        return False
+    def are_zones_tested(self, candles, base_starts, legouts):
+        # A zone is tested once its leg-out or any later candle trades through the close of its
+        # first base candle; the first such candle of every zone is looked up at once
+        if not base_starts:
+            return []
+        prices = candles.close[base_starts]
+        return (candles.range_index.first_overlap(legouts, prices, prices) < len(candles)).tolist()
 
     def show_all_zones(self):
         self.show_zones_in_table(self.all_demand_zones, self.all_supply_zones)
@@ -177,6 +209,8 @@ class StockApp(ctk.CTk):
 
     def start_monitoring(self):
         self.output_text.insert("1.0", "Starting live price monitoring...\n")
+        if self.minute_bars is None:
+            self.minute_bars = live_feed.MinuteBarBuffer()
         threading.Thread(target=self.monitor_live_prices, daemon=True).start()
 
     def monitor_live_prices(self):
@@ -187,24 +221,43 @@ class StockApp(ctk.CTk):
     async def monitor(self):
         while True:
             for symbol in self.nifty_50_symbols:
-                data = yf.download(symbol, period='1d', interval='1m')
-                if not data.empty:
-                    latest_price = data['Close'].iloc[-1]
-                    self.check_zones(symbol, latest_price)
+                bars = self.minute_bars.update(symbol)
+                if not bars.empty:
+                    self.detect_live_zones(symbol, bars)
+                    self.check_zones(symbol, float(bars['Close'].iloc[-1]))
                 await asyncio.sleep(60)  # Wait for 1 minute before fetching new data
 
+    def detect_live_zones(self, symbol, bars):
+        # The newest bar may still be forming; every closed bar goes through the symbol's
+        # streaming detector once, which skips the bars it has already seen
+        if symbol not in self.live_detectors:
+            self.live_detectors[symbol] = StreamingZoneDetector(*LIVE_ZONE_PARAMS)
+        for side, (_, _, base_candles) in self.live_detectors[symbol].extend(bars.iloc[:-1]):
+            price = base_candles.close[0]
+            # Tested as in detect_zones: the leg-out or a later bar traded through the price
+            later = bars.iloc[bars.index.searchsorted(base_candles.time[-1], side='right'):]
+            tested = bool(((later['Low'] <= price) & (later['High'] >= price)).any())
+            zone = (symbol, base_candles.time[0], price, len(base_candles), tested)
+            if side == DEMAND:
+                self.add_zone(self.all_demand_zones, self.demand_index, zone)
+            else:
+                self.add_zone(self.all_supply_zones, self.supply_index, zone)
+            self.output_text.insert("1.0", f"New live {'demand' if side == DEMAND else 'supply'} zone for {symbol} at {price}\n")
+
+    def add_zone(self, zones, index, zone):
+        # Zones are (symbol, date, price, base candles, tested)
+        zones.append(zone)
+        index.add(zone[0], zone[2], zone)
+
     def check_zones(self, symbol, latest_price):
         latest_price = float(latest_price)  # Ensure latest_price is a float
 
-        for zone in self.all_demand_zones:
-            zone_price = float(zone[1])
-            if zone[0] == symbol and abs(latest_price - zone_price) / zone_price < 0.01:
-                self.place_order(symbol, "Buy", latest_price, zone_price)
+        # Only this symbol's zones near the price are looked at, by binary search over their prices
+        for zone in self.demand_index.near(symbol, latest_price, ZONE_PROXIMITY):
+            self.place_order(symbol, "Buy", latest_price, float(zone[2]))
 
-        for zone in self.all_supply_zones:
-            zone_price = float(zone[1])
-            if zone[0] == symbol and abs(latest_price - zone_price) / zone_price < 0.01:
-                self.place_order(symbol, "Sell", latest_price, zone_price)
+        for zone in self.supply_index.near(symbol, latest_price, ZONE_PROXIMITY):
+            self.place_order(symbol, "Sell", latest_price, float(zone[2]))
 
     def place_order(self, symbol, order_type, latest_price, zone_price):
         with self.conn:
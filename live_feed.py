@@ -0,0 +1,98 @@
+import pandas as pd
+
+import market_data
+
+# -----------------------------
+# Incremental Minute Bar Feed
+# -----------------------------
+
+TICK_INTERVAL = '1m'
+
+# One full NSE session (09:15 - 15:30) of minute bars
+DEFAULT_MAX_BARS = 375
+
+# How far back the first poll looks for the last session when today has none yet (before
+# the open, on weekends and holidays); Yahoo serves minute bars for 7 days per request
+SESSION_LOOKBACK = pd.Timedelta(days=7)
+
+
+class MinuteBarBuffer:
+    """
+    Rolling per-symbol buffer of minute bars for the live monitor.
+
+    The first poll of a symbol loads the current session, or the most recent one when today
+    has not traded yet; every later poll only requests
+    bars from the newest timestamp already held, so a poll late in the day transfers a bar
+    or two instead of the whole session. The newest bar is fetched again each time because
+    it may still have been forming when it was last seen. At most ``max_bars`` bars are kept.
+    """
+    def __init__(self, provider=None, max_bars=DEFAULT_MAX_BARS, clock=None):
+        self.provider = provider or market_data.get_provider()
+        self.max_bars = max_bars
+        # Returns the current exchange-local time; without one, a replaying provider's own
+        # clock is used and otherwise the wall clock
+        self.clock = clock
+        self.bars = {}
+
+    def now(self, symbol=None):
+        if self.clock is not None:
+            return pd.Timestamp(self.clock())
+        if symbol is not None:
+            replayed = self.provider.replay_time(symbol, TICK_INTERVAL)
+            if replayed is not None:
+                return replayed
+        return pd.Timestamp.now(tz=market_data.EXCHANGE_TZ).tz_localize(None)
+
+    def update(self, symbol):
+        """
+        Fetches the bars of ``symbol`` newer than the buffer holds and returns the buffer.
+        """
+        now = self.now(symbol)
+        held = self.bars.get(symbol)
+        if held is None or held.empty:
+            start = now.normalize()
+        else:
+            start = _local_time(held.index[-1])
+
+        new = self.provider.fetch_bars(symbol, TICK_INTERVAL, start, now + pd.Timedelta(minutes=1))
+        if (new is None or new.empty) and (held is None or held.empty):
+            new = self._last_session(symbol, now)
+        if new is None or new.empty:
+            return held if held is not None else pd.DataFrame()
+        new = market_data.flatten_columns(new)
+
+        if held is None or held.empty:
+            merged = new
+        else:
+            merged = pd.concat([held[held.index < new.index[0]], new])
+        self.bars[symbol] = merged.iloc[-self.max_bars:]
+        return self.bars[symbol]
+
+    def _last_session(self, symbol, now):
+        # The bars of the newest session within SESSION_LOOKBACK before today
+        bars = self.provider.fetch_bars(symbol, TICK_INTERVAL, now.normalize() - SESSION_LOOKBACK, now.normalize())
+        if bars is None or bars.empty:
+            return bars
+        bars = market_data.flatten_columns(bars)
+        index = pd.DatetimeIndex(bars.index)
+        if index.tz is not None:
+            index = index.tz_convert(market_data.EXCHANGE_TZ).tz_localize(None)
+        dates = index.normalize()
+        return bars[dates == dates.max()]
+
+    def latest_price(self, symbol):
+        """
+        Polls ``symbol`` and returns the close of its newest bar, or None if there is none yet.
+        """
+        bars = self.update(symbol)
+        if bars.empty:
+            return None
+        return float(bars['Close'].iloc[-1])
+
+
+def _local_time(timestamp):
+    # Providers take naive exchange-local bounds
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(market_data.EXCHANGE_TZ).tz_localize(None)
+    return timestamp
@@ -0,0 +1,319 @@
+import collections
+import os
+import re
+import threading
+
+import pandas as pd
+
+# -----------------------------
+# Market Data Providers
+# -----------------------------
+
+# Select the provider for every script without touching code, e.g.
+#   MARKET_DATA_PROVIDER=replay MARKET_DATA_REPLAY_DIR=/data/nse_mirror python bulk_dz.py
+PROVIDER_ENV = 'MARKET_DATA_PROVIDER'
+REPLAY_DIR_ENV = 'MARKET_DATA_REPLAY_DIR'
+DEFAULT_REPLAY_DIR = 'market_data'
+
+# NSE sessions are defined in exchange-local time
+EXCHANGE_TZ = 'Asia/Kolkata'
+
+
+class MarketDataProvider:
+    """
+    Interface every data source implements. Bars are returned as yfinance-shaped DataFrames
+    (flat Open/High/Low/Close/Volume columns, DatetimeIndex) covering [start, end).
+    """
+    name = 'base'
+
+    def fetch_bars(self, symbol, interval, start, end):
+        raise NotImplementedError
+
+    def fetch_bars_batch(self, symbols, interval, start, end):
+        """
+        Returns bars for several symbols in the wide (ticker, field) column layout of
+        yf.download(..., group_by='ticker'). Providers without a batch endpoint fall back
+        to one request per symbol.
+        """
+        parts = {}
+        for symbol in symbols:
+            data = self.fetch_bars(symbol, interval, start, end)
+            if not data.empty:
+                parts[symbol] = data
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1)
+
+    def fetch_latest_price(self, symbol):
+        raise NotImplementedError
+
+    def replay_time(self, symbol, tick_interval='1m'):
+        """
+        The simulated current time of ``symbol`` when the provider replays recorded ticks, as
+        naive exchange-local time. None for live providers, whose current time is the wall clock.
+        """
+        return None
+
+    def earliest_start(self, interval, now=None):
+        """
+        The earliest naive start the provider serves ``interval`` bars from, or None when its
+        history is not limited.
+        """
+        return None
+
+
+INTRADAY_UNITS = ('m', 'h')
+
+# Columns of the bar frames every provider returns
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def is_intraday(interval):
+    return interval.endswith(INTRADAY_UNITS) and not interval.endswith('mo')
+
+
+def empty_bars():
+    """
+    A frame with no bars but the usual OHLCV columns, so callers can still index data['Close'].
+    """
+    return pd.DataFrame({column: pd.Series(dtype=float) for column in BAR_COLUMNS}, index=pd.DatetimeIndex([]))
+
+
+def flatten_columns(data):
+    """
+    Flattens the (Price, Ticker) column MultiIndex that newer yfinance versions return
+    for single-symbol downloads, so callers can keep using data['Close'].
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.copy()
+        data.columns = data.columns.get_level_values(0)
+    return data
+
+
+def slice_range(data, start, end):
+    """
+    Returns the rows of ``data`` in [start, end), comparing naive bounds against local times.
+    """
+    if data.empty:
+        return data
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return data[(index >= pd.Timestamp(start)) & (index < pd.Timestamp(end))]
+
+
+# How far back Yahoo serves intraday bars; older requests fail for the whole range
+YFINANCE_LOOKBACK = {
+    '1m': pd.Timedelta(days=30),
+    '2m': pd.Timedelta(days=60),
+    '5m': pd.Timedelta(days=60),
+    '15m': pd.Timedelta(days=60),
+    '30m': pd.Timedelta(days=60),
+    '60m': pd.Timedelta(days=730),
+    '90m': pd.Timedelta(days=60),
+    '1h': pd.Timedelta(days=730),
+}
+
+
+class YFinanceProvider(MarketDataProvider):
+    name = 'yfinance'
+
+    def __init__(self):
+        # Imported lazily so offline runs on the replay provider do not need yfinance
+        import yfinance
+        self.yf = yfinance
+        self.download_lock = threading.Lock()
+
+    def fetch_bars(self, symbol, interval, start, end):
+        # Ticker.history is safe to call from several threads at once; yf.download shares
+        # module-level state between calls and is only used for whole batches
+        data = self.yf.Ticker(symbol).history(start=start, end=end, interval=interval,
+                                              auto_adjust=False, actions=False)
+        if not is_intraday(interval) and data.index.tz is not None:
+            # Match yf.download, which returns session dates without a timezone
+            data.index = data.index.tz_localize(None)
+        data.index.name = 'Datetime' if is_intraday(interval) else 'Date'
+        return data
+
+    def fetch_bars_batch(self, symbols, interval, start, end):
+        # yf.download already spreads a batch over its own threads; concurrent batches would
+        # overwrite each other's results, so they are serialised. Unadjusted prices, as
+        # fetch_bars returns them: both end up in the same cache files
+        with self.download_lock:
+            return self.yf.download(list(symbols), start=start, end=end, interval=interval,
+                                    group_by='ticker', threads=True, progress=False,
+                                    auto_adjust=False, actions=False)
+
+    def earliest_start(self, interval, now=None):
+        lookback = YFINANCE_LOOKBACK.get(interval)
+        if lookback is None:
+            return None
+        # A day of margin, since Yahoo counts the window from its own clock
+        now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        return (now - lookback).normalize() + pd.Timedelta(days=1)
+
+    def fetch_latest_price(self, symbol):
+        data = self.yf.Ticker(symbol).history(period='1d', interval='1m')
+        if data.empty:
+            return None
+        return float(data['Close'].iloc[-1])
+
+
+# Requests a FrameProvider remembers, so a replay running all day does not grow without bound
+MAX_RECORDED_REQUESTS = 1000
+
+
+class FrameProvider(MarketDataProvider):
+    """
+    Serves bars from in-memory DataFrames keyed by symbol (or by (symbol, interval)), and
+    records the last ``max_requests`` requests (all of them with None). Used as the offline
+    stand-in for batch downloads and as the base of the replay provider.
+    """
+    name = 'frames'
+
+    def __init__(self, frames=None, max_requests=MAX_RECORDED_REQUESTS):
+        self.frames = frames or {}
+        self.requests = collections.deque(maxlen=max_requests)
+        # Separate replay cursors for prices and for the clock, so a monitor asking for both
+        # each poll still moves one recorded bar per poll
+        self.tick_positions = {}
+        self.clock_positions = {}
+
+    def load_frame(self, symbol, interval):
+        if (symbol, interval) in self.frames:
+            return self.frames[(symbol, interval)]
+        return self.frames.get(symbol)
+
+    def fetch_bars(self, symbol, interval, start, end):
+        self.requests.append(([symbol], start, end, interval))
+        data = self.load_frame(symbol, interval)
+        if data is None:
+            return pd.DataFrame()
+        return slice_range(data, start, end)
+
+    def fetch_bars_batch(self, symbols, interval, start, end):
+        self.requests.append((list(symbols), start, end, interval))
+        parts = {}
+        for symbol in symbols:
+            data = self.load_frame(symbol, interval)
+            if data is not None:
+                parts[symbol] = slice_range(data, start, end)
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts, axis=1)
+
+    def fetch_latest_price(self, symbol, tick_interval='1m'):
+        """
+        Simulates a live feed: each call advances one recorded bar and returns its close.
+        Once the recording is exhausted the last close keeps being returned.
+        """
+        data, position = self._next_tick(self.tick_positions, symbol, tick_interval)
+        if data is None:
+            return None
+        return float(data['Close'].iloc[position])
+
+    def replay_time(self, symbol, tick_interval='1m'):
+        """
+        Simulated clock of the live feed: each call advances one recorded bar and returns its
+        exchange-local time, so a minute bar buffer polling this provider sees one more
+        recorded bar per poll. The clock keeps its own cursor, apart from fetch_latest_price().
+        """
+        data, position = self._next_tick(self.clock_positions, symbol, tick_interval)
+        if data is None:
+            return None
+        timestamp = pd.Timestamp(data.index[position])
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert(EXCHANGE_TZ).tz_localize(None)
+        return timestamp
+
+    def _next_tick(self, positions, symbol, tick_interval):
+        data = self.load_frame(symbol, tick_interval)
+        if data is None or data.empty:
+            return None, None
+        position = min(positions.get(symbol, 0), len(data) - 1)
+        positions[symbol] = position + 1
+        return data, position
+
+
+class ReplayProvider(FrameProvider):
+    """
+    Serves recorded bars from a local mirror laid out as <root>/<interval>/<symbol>.csv
+    (or .parquet), as written by record_bars(). Files are read once and kept in memory,
+    which makes scans over the mirror deterministic and network-free.
+    """
+    name = 'replay'
+
+    def __init__(self, root=DEFAULT_REPLAY_DIR):
+        super().__init__()
+        self.root = root
+
+    def path(self, symbol, interval, extension):
+        return os.path.join(self.root, interval, f"{safe_name(symbol)}.{extension}")
+
+    def load_frame(self, symbol, interval):
+        if (symbol, interval) not in self.frames:
+            self.frames[(symbol, interval)] = self._read(symbol, interval)
+        return self.frames[(symbol, interval)]
+
+    def _read(self, symbol, interval):
+        parquet_path = self.path(symbol, interval, 'parquet')
+        if os.path.exists(parquet_path):
+            return pd.read_parquet(parquet_path)
+        csv_path = self.path(symbol, interval, 'csv')
+        if os.path.exists(csv_path):
+            data = pd.read_csv(csv_path, index_col=0)
+            if _has_offset(data.index):
+                data.index = pd.to_datetime(data.index, utc=True).tz_convert(EXCHANGE_TZ)
+            else:
+                data.index = pd.to_datetime(data.index)
+            return data
+        return None
+
+
+def _has_offset(index):
+    return len(index) > 0 and re.search(r'[+-]\d{2}:\d{2}$', str(index[0])) is not None
+
+
+def safe_name(symbol):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', symbol)
+
+
+def record_bars(provider, symbols, interval, start, end, root=DEFAULT_REPLAY_DIR, file_format='csv'):
+    """
+    Copies bars from ``provider`` into a replay mirror under ``root``.
+    """
+    os.makedirs(os.path.join(root, interval), exist_ok=True)
+    for symbol in symbols:
+        data = provider.fetch_bars(symbol, interval, start, end)
+        if data.empty:
+            continue
+        path = os.path.join(root, interval, f"{safe_name(symbol)}.{file_format}")
+        if file_format == 'parquet':
+            data.to_parquet(path)
+        else:
+            data.to_csv(path)
+
+
+_default_provider = None
+
+
+def get_provider():
+    """
+    Returns the process-wide provider chosen by the MARKET_DATA_PROVIDER environment variable
+    ('yfinance' by default, or 'replay' to read from MARKET_DATA_REPLAY_DIR).
+    """
+    global _default_provider
+    if _default_provider is None:
+        kind = os.environ.get(PROVIDER_ENV, 'yfinance')
+        if kind == 'replay':
+            _default_provider = ReplayProvider(os.environ.get(REPLAY_DIR_ENV, DEFAULT_REPLAY_DIR))
+        elif kind == 'yfinance':
+            _default_provider = YFinanceProvider()
+        else:
+            raise ValueError(f"Unknown market data provider '{kind}'.")
+    return _default_provider
+
+
+def set_provider(provider):
+    global _default_provider
+    _default_provider = provider
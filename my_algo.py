@@ -1,11 +1,22 @@
-import yfinance as yf
-import pandas as pd
 import mplfinance as mpf
 import matplotlib.pyplot as plt
 import customtkinter as ctk
+from tkinter import ttk
 import csv
-import os
 import time
+import fetch_scheduler
+import scan_jobs
+import scan_worker
+import ohlcv_cache
+import timeframes
+import universe_loader
+import universe_scanner
+from candles import CandleSeries
+import zone_detector
+import zone_mapping
+import zone_outcomes
+import zone_refresh
+import zone_store
 
 # Define the main application class
 class DemandZoneApp(ctk.CTk):
@@ -168,6 +179,28 @@ class DemandZoneApp(ctk.CTk):
         self.scan_all_button = ctk.CTkButton(self.scrollable_frame, text="Scan All Nifty 50 Stocks", command=self.scan_all_nifty50)
         self.scan_all_button.pack(pady=20)
 
+        # Button to advance the stored Fresh zones over the bars since their last refresh
+        self.refresh_button = ctk.CTkButton(self.scrollable_frame, text="Refresh Stored Zone Statuses", command=self.refresh_stored_zones)
+        self.refresh_button.pack(pady=20)
+
+        # Progress of a running scan, which can be cancelled between symbols
+        self.scan_progress = ctk.CTkProgressBar(self.scrollable_frame)
+        self.scan_progress.set(0)
+        self.scan_progress.pack(pady=5)
+        self.scan_status_label = ctk.CTkLabel(self.scrollable_frame, text="")
+        self.scan_status_label.pack(pady=5)
+        self.cancel_scan_button = ctk.CTkButton(self.scrollable_frame, text="Cancel Scan", command=self.cancel_scan, state="disabled")
+        self.cancel_scan_button.pack(pady=5)
+
+        # Zones found by the scan, filled in as each symbol finishes
+        columns = ("Symbol", "Leg-In Time", "Leg-Out Time", "Zone High", "Zone Low", "Status")
+        self.scan_results_table = ttk.Treeview(self.scrollable_frame, columns=columns, show="headings", height=10)
+        for col in columns:
+            self.scan_results_table.heading(col, text=col)
+            self.scan_results_table.column(col, minwidth=0, width=120)
+        self.scan_results_table.pack(pady=10, fill="x")
+        self.scan_worker = None
+
         # Label to display results
         self.output_label = ctk.CTkLabel(self.scrollable_frame, text="")
         self.output_label.pack(pady=20)
@@ -189,13 +222,13 @@ class DemandZoneApp(ctk.CTk):
         min_legout_pct = float(self.min_legout_entry.get() or "50")
         max_legout_pct = float(self.max_legout_entry.get() or "100")
 
-        # Fetch monthly data for the given symbol
-        monthly_data = yf.download(symbol, start=start_date, end=end_date, interval="1mo")
+        # Fetch daily data once and build the monthly candles from it
+        monthly_data, daily_data = timeframes.load_with_higher_timeframe(
+            symbol, "1d", start_date, end_date, "1mo", start_date, end_date
+        )
 
-        # Convert monthly data to a list of Candle objects
-        monthly_candles = []
-        for idx, row in monthly_data.iterrows():
-            monthly_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
+        # Convert monthly data to a CandleSeries
+        monthly_candles = CandleSeries.from_frame(monthly_data)
 
         # Detect monthly demand zones using user-defined or default parameters
         monthly_demand_zones = self.detect_demand_zones(monthly_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
@@ -204,36 +237,24 @@ class DemandZoneApp(ctk.CTk):
             self.output_label.configure(text="No monthly demand zones detected.")
             return
 
-        # Fetch daily data for the given symbol
-        daily_data = yf.download(symbol, start=start_date, end=end_date, interval="1d")
-
-        # Filter daily data based on the detected monthly demand zones
-        filtered_daily_data = pd.DataFrame()
-        for dz in monthly_demand_zones:
-            first_base_date = monthly_data.index[dz[0]+1]
-            last_base_date = monthly_data.index[dz[1]]
-
-            filtered_data = daily_data.loc[first_base_date:last_base_date]
-            
-            # Ensure the filtered data has a DatetimeIndex
-            filtered_data.index = pd.to_datetime(filtered_data.index)
-            
-            filtered_daily_data = pd.concat([filtered_daily_data, filtered_data])
+        # Bar ranges of the daily series inside the monthly demand zones; windows that share bars
+        # are merged, the others stay apart so no daily zone is built across two of them
+        segments = timeframes.window_segments(
+            daily_data.index, [(monthly_data.index[dz[0]+1], monthly_data.index[dz[1]]) for dz in monthly_demand_zones]
+        )
 
-        # Reset the index to ensure it's a proper DatetimeIndex after filtering
-        filtered_daily_data.index = pd.to_datetime(filtered_daily_data.index)
-
-        if filtered_daily_data.empty:
+        if not segments:
             self.output_label.configure(text="No data available for the selected date range or criteria.")
             return
 
-        # Convert filtered daily data to Candle objects
-        filtered_candles = []
-        for idx, row in filtered_daily_data.iterrows():
-            filtered_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
+        # The daily bars inside the windows, for the chart
+        filtered_daily_data = daily_data[timeframes.segment_mask(len(daily_data), segments)]
+
+        # Convert daily data to a CandleSeries
+        daily_candles = CandleSeries.from_frame(daily_data)
 
-        # Detect demand zones in the filtered daily data
-        demand_zones = self.detect_demand_zones(filtered_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+        # Detect demand zones inside each window of the daily data
+        demand_zones = zone_detector.detect_demand_zones_in_segments(daily_candles, segments, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
 
         if not demand_zones:
             self.output_label.configure(text="No demand zones detected in the selected time range.")
@@ -257,16 +278,19 @@ class DemandZoneApp(ctk.CTk):
 
         # Add horizontal rays for demand zones and prepare CSV data
         zone_info = []
-        for dz in demand_zones:
+        # Check if the zones have been tested and if they met the 1:2 target
+        # Change: We now check until the last candle in the entire dataset.
+        colors = self.check_zones_tested_and_target(demand_zones, daily_candles, zone_outcomes.STATUS_COLORS)
+
+        # Map every daily zone to the first monthly zone containing it, in one sorted lookup
+        higher_timeframe_zones = zone_mapping.parent_zones(demand_zones, daily_data.index,
+                                                           monthly_demand_zones, monthly_data.index)
+        for dz, color, higher_timeframe_zone in zip(demand_zones, colors, higher_timeframe_zones):
             base_candles = dz[2]
 
             # Find the highest high and lowest low of the base candles
-            highest_high = max(candle.high for candle in base_candles)
-            lowest_low = min(candle.low for candle in base_candles)
-
-            # Check if the zone has been tested and if it met the 1:2 target
-            # Change: We now check until the last candle in the entire dataset.
-            color = self.check_zone_tested_and_target(dz, filtered_candles, dz[1] + 1)
+            highest_high = base_candles.high.max()
+            lowest_low = base_candles.low.min()
 
             if color == 'green':
                 status = 'Fresh'
@@ -279,19 +303,12 @@ class DemandZoneApp(ctk.CTk):
                 target_zones += 1
 
             # Add horizontal rays (lines) from these points extending to the right
-            ax[0].hlines(y=highest_high, xmin=filtered_daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
-            ax[0].hlines(y=lowest_low, xmin=filtered_daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
+            ax[0].hlines(y=highest_high, xmin=daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
+            ax[0].hlines(y=lowest_low, xmin=daily_data.index[dz[0]], xmax=filtered_daily_data.index[-1], color=color, linestyle='--', linewidth=1.5)
 
             # Define leg-in and leg-out candles
-            legin_candle = filtered_candles[dz[0]]
-            legout_candle = filtered_candles[dz[1]]
-
-            # Map the corresponding monthly demand zone
-            higher_timeframe_zone = None
-            for monthly_zone in monthly_demand_zones:
-                if filtered_daily_data.index[dz[0]] >= monthly_data.index[monthly_zone[0]] and filtered_daily_data.index[dz[1]] <= monthly_data.index[monthly_zone[1]]:
-                    higher_timeframe_zone = monthly_zone
-                    break
+            legin_candle = daily_candles[dz[0]]
+            legout_candle = daily_candles[dz[1]]
 
             if higher_timeframe_zone:
                 higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
@@ -322,8 +339,9 @@ class DemandZoneApp(ctk.CTk):
 
         plt.show()
 
-        # Write data to CSV
-        self.write_to_csv(csv_data)
+        # Save the zones to the zone store
+        params = (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+        self.save_zones(csv_data, "1d", (params, params))
 
         # Display zone information
         output_text = (f"Number of fresh zones: {fresh_zones}\n"
@@ -377,220 +395,260 @@ class DemandZoneApp(ctk.CTk):
         min_legout_pct = float(self.min_legout_entry.get() or "50")
         max_legout_pct = float(self.max_legout_entry.get() or "100")
 
-        csv_data = []
-
-        for symbol in nifty50_symbols:
-            try:
-                print(symbol)
-                # Fetch monthly data for the given symbol
-                monthly_data = yf.download(symbol, start=start_date_htf, end=end_date_htf, interval=time_frame_htf)
-
-                # Convert monthly data to a list of Candle objects
-                monthly_candles = []
-                for idx, row in monthly_data.iterrows():
-                    monthly_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
-
-                # Detect monthly demand zones
-                monthly_demand_zones = self.detect_demand_zones(
-                    monthly_candles, min_legin_pct_htf, max_legin_pct_htf, min_base_htf, max_base_htf, min_base_pct_htf, max_base_pct_htf, min_legout_pct_htf, max_legout_pct_htf
-                )
-
-                if not monthly_demand_zones:
-                    continue
-
-                # Fetch daily data for the given symbol
-                daily_data = yf.download(symbol, start=start_date, end=end_date, interval=time_frame)
-
-                # Filter daily data based on the detected monthly demand zones
-                filtered_daily_data = pd.DataFrame()
-                filtered_daily_check_data = pd.DataFrame()
-                for dz in monthly_demand_zones:
-                    first_base_date = monthly_data.index[dz[0]+1]
-                    last_base_date = monthly_data.index[dz[1]]
-
-                    filtered_data = daily_data.loc[first_base_date:last_base_date]
-                    
-                    # Ensure the filtered data has a DatetimeIndex
-                    filtered_data.index = pd.to_datetime(filtered_data.index)
-                    
-                    filtered_daily_data = pd.concat([filtered_daily_data, filtered_data])
-
-                    filtered_check_data = daily_data.loc[first_base_date:]
-                    
-                    # Ensure the filtered ckeck data has a DatetimeIndex
-                    filtered_check_data.index = pd.to_datetime(filtered_check_data.index)
-                    
-                    filtered_daily_check_data = pd.concat([filtered_daily_check_data, filtered_check_data])
-
-                # Reset the index to ensure it's a proper DatetimeIndex after filtering
-                filtered_daily_data.index = pd.to_datetime(filtered_daily_data.index)
-
-                # Reset the index to ensure it's a proper DatetimeIndex after filtering
-                filtered_daily_check_data.index = pd.to_datetime(filtered_daily_check_data.index)
-
-                if filtered_daily_data.empty:
-                    continue
-
-                # Convert filtered daily data to Candle objects
-                filtered_candles = []
-                for idx, row in filtered_daily_data.iterrows():
-                    filtered_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx))
-
-                # Convert filtered daily data to Candle objects
-                filtered_check_candles = []
-                for idx_check, row in filtered_daily_check_data.iterrows():
-                    filtered_check_candles.append(Candle(row['Open'], row['High'], row['Low'], row['Close'], idx_check))
-
-                # Detect demand zones in the filtered daily data
-                demand_zones = self.detect_demand_zones(
-                    filtered_candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
-                )
-
-                if not demand_zones:
-                    continue
-
-                # Prepare CSV data
-                for dz in demand_zones:
-                    base_candles = dz[2]
-
-                    # Find the highest high and lowest low of the base candles
-                    highest_high = max(candle.high for candle in base_candles)
-                    lowest_low = min(candle.low for candle in base_candles)
-
-                    # Define leg-in and leg-out candles
-                    legin_candle = filtered_candles[dz[0]+1]
-                    legout_candle = filtered_candles[dz[1]]
-
-                    # Map the corresponding monthly demand zone
-                    higher_timeframe_zone = None
-                    for monthly_zone in monthly_demand_zones:
-                        if filtered_daily_data.index[dz[0]] >= monthly_data.index[monthly_zone[0]] and filtered_daily_data.index[dz[1]] <= monthly_data.index[monthly_zone[1]]:
-                            higher_timeframe_zone = monthly_zone
-                            break
-
-                    if higher_timeframe_zone:
-                        higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
-                        higher_legout_candle = monthly_candles[higher_timeframe_zone[1]]
-                    else:
-                        higher_legin_candle = None
-                        higher_legout_candle = None
-
-                    # Change: Always check until the last candle in the entire dataset
-                    status = self.check_zone_tested_and_target(dz, filtered_check_candles, dz[1] + 1)
-
-                    csv_data.append({
-                        "Symbol": symbol,
-                        "Leg-In Time": legin_candle.date,
-                        "Leg-Out Time": legout_candle.date,
-                        "Zone High": highest_high,
-                        "Zone Low": lowest_low,
-                        "Status": status,
-                        "Higher Timeframe Leg-In Time": higher_legin_candle.date if higher_legin_candle else "N/A",
-                        "Higher Timeframe Leg-Out Time": higher_legout_candle.date if higher_legout_candle else "N/A",
-                        "Higher Timeframe Zone High": higher_legin_candle.high if higher_legin_candle else "N/A",
-                        "Higher Timeframe Zone Low": higher_legout_candle.low if higher_legout_candle else "N/A"
-                    })
-            except ValueError:
-                self.output_label.configure(text=f"No data available for symbol '{symbol}' in the selected date range or criteria.")
-        # Write the accumulated data to CSV
-        self.write_to_csv(csv_data)
-
-        # Update the output label
-        self.output_label.configure(text=f"Nifty 50 stocks scan completed. Data saved to CSV.")
-
-    def write_to_csv(self, csv_data):
+        htf_params = (min_legin_pct_htf, max_legin_pct_htf, min_base_htf, max_base_htf, min_base_pct_htf, max_base_pct_htf,
+                      min_legout_pct_htf, max_legout_pct_htf)
+        params = (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+
+        # Completed symbols are checkpointed, so an interrupted or cancelled scan with the same
+        # settings picks up where it stopped
+        job = scan_jobs.ScanJob('my_algo_scan', {
+            'htf': (start_date_htf, end_date_htf, time_frame_htf, htf_params),
+            'ltf': (start_date, end_date, time_frame, params),
+            'symbols': nifty50_symbols,
+        })
+
+        def scan(worker):
+            csv_data = []
+            finished = list(job.completed)
+            for symbol, rows in job.completed.items():
+                worker.result(symbol, rows)
+
+            def mark_done(symbol, status):
+                finished.append(symbol)
+                worker.progress(len(finished), len(nifty50_symbols), symbol, status)
+
+            # Load the lower timeframe for the whole universe in batches and build the higher
+            # timeframe candles from it, falling back to a separate fetch when that is not possible
+            build_htf = timeframes.can_resample(time_frame, time_frame_htf)
+            if build_htf:
+                fetch_start, fetch_end = timeframes.combined_range(start_date, end_date, time_frame_htf, start_date_htf, end_date_htf)
+            else:
+                fetch_start, fetch_end = start_date, end_date
+
+            # Chunks are fetched concurrently with retries; each symbol is processed as soon as it lands
+            scheduler = fetch_scheduler.FetchScheduler()
+            no_data_symbols = []
+
+            def jobs():
+                for bars in universe_loader.load_universe(job.pending(nifty50_symbols), fetch_start, fetch_end, interval=time_frame, scheduler=scheduler):
+                    if worker.cancelled:
+                        return
+                    symbol = bars.symbol
+                    if bars.empty:
+                        no_data_symbols.append(symbol)
+                        mark_done(symbol, "no data")
+                        continue
+                    try:
+                        print(symbol)
+                        if build_htf:
+                            monthly_data, daily_data = timeframes.split_higher_timeframe(
+                                bars.to_frame(), start_date, end_date, time_frame_htf, start_date_htf, end_date_htf
+                            )
+                        else:
+                            monthly_data = ohlcv_cache.download(symbol, start=start_date_htf, end=end_date_htf, interval=time_frame_htf)
+                            daily_data = bars.to_frame()
+                    except ValueError:
+                        no_data_symbols.append(symbol)
+                        mark_done(symbol, "no data")
+                        continue
+                    yield symbol, (monthly_data, daily_data, htf_params, params)
+
+            # Detection runs on a process pool while the rest of the universe downloads; the rows
+            # are put back in symbol order so the CSV does not depend on which worker finished first
+            scanner = universe_scanner.UniverseScanner()
+            for symbol, rows in scanner.run(jobs(), scan_symbol, cancel=worker.cancel_event):
+                job.record(symbol, rows)
+                worker.result(symbol, rows)
+                mark_done(symbol, f"{len(rows)} zone(s)")
+            for symbol, error in list(scanner.failures.items()):
+                if isinstance(error, ValueError):
+                    del scanner.failures[symbol]
+                    no_data_symbols.append(symbol)
+
+            # A cancelled scan keeps its checkpoint and leaves the CSV untouched
+            job.save()
+            if not worker.cancelled:
+                for symbol, rows in universe_scanner.ordered(job.completed.items(), nifty50_symbols):
+                    csv_data.extend(rows)
+                self.save_zones(csv_data, time_frame, (htf_params, params))
+                job.finish()
+
+            # Report the per-symbol failures collected during the scan
+            report = scheduler.failure_report()
+            if scanner.failures:
+                report += f"\n{scanner.failure_report()}"
+            if no_data_symbols:
+                report += f"\nNo data for: {', '.join(no_data_symbols)}"
+            if worker.cancelled:
+                return (f"Scan cancelled with {len(job.completed)} of {len(nifty50_symbols)} symbols done. "
+                        f"Run it again with the same settings to resume.\n{report}")
+            return f"Nifty 50 stocks scan completed. Zones saved to the zone store.\n{report}"
+
+        # Downloads and detection run on a worker thread; the widgets are only touched from
+        # the Tk thread, as the worker reports progress and results
+        self.scan_all_button.configure(state="disabled")
+        self.cancel_scan_button.configure(state="normal")
+        self.scan_progress.set(0)
+        if job.resumed:
+            self.scan_status_label.configure(text=f"Resuming scan, {job.resumed} symbols already done...")
+        else:
+            self.scan_status_label.configure(text="Starting scan...")
+        self.output_label.configure(text="")
+        self.scan_results_table.delete(*self.scan_results_table.get_children())
+        self.scan_worker = scan_worker.ScanWorker(self, scan, on_progress=self.show_scan_progress,
+                                                  on_result=self.add_scan_rows, on_done=self.scan_finished).start()
+
+    def cancel_scan(self):
+        if self.scan_worker is not None and self.scan_worker.running:
+            self.scan_worker.cancel()
+            self.cancel_scan_button.configure(state="disabled")
+            self.scan_status_label.configure(text="Cancelling scan...")
+
+    def show_scan_progress(self, done, total, symbol, status):
+        self.scan_progress.set(min(done / total, 1) if total else 1)
+        self.scan_status_label.configure(text=f"{done}/{total}  {symbol}: {status}")
+
+    def add_scan_rows(self, symbol, rows):
+        columns = self.scan_results_table["columns"]
+        for row in rows:
+            self.scan_results_table.insert("", "end", values=[row[column] for column in columns])
+
+    def scan_finished(self, report, error):
+        self.scan_all_button.configure(state="normal")
+        self.cancel_scan_button.configure(state="disabled")
+        if error is not None:
+            self.scan_status_label.configure(text="Scan failed.")
+            self.output_label.configure(text=f"Scan failed: {type(error).__name__}: {error}")
+            return
+        if not self.scan_worker.cancelled:
+            self.scan_progress.set(1)
+        self.scan_status_label.configure(text="Scan cancelled." if self.scan_worker.cancelled else "Scan finished.")
+        self.output_label.configure(text=report)
+
+    def refresh_stored_zones(self):
+        def refresh(worker):
+            with zone_store.ZoneStore() as store:
+                return zone_refresh.refresh_zones(store)
+
+        def finished(counts, error):
+            self.refresh_button.configure(state="normal")
+            if error is not None:
+                self.output_label.configure(text=f"Zone refresh failed: {type(error).__name__}: {error}")
+                return
+            summary = "\n".join(f"{label}: {count}" for label, count in counts.items())
+            self.output_label.configure(text=f"Stored zones refreshed.\n{summary}")
+
+        # Only Fresh zones are advanced, over the bars they have not been evaluated on yet
+        self.refresh_button.configure(state="disabled")
+        self.output_label.configure(text="Refreshing stored zones...")
+        scan_worker.ScanWorker(self, refresh, on_done=finished).start()
+
+    def save_zones(self, csv_data, timeframe, params):
+        # Zones are upserted into the zone store, so a rescan updates their rows instead of
+        # appending duplicates; demand_zone_data.csv is rewritten from the store as a snapshot,
+        # after its existing rows were imported on the first save
         if csv_data:
-            csv_file = 'demand_zone_data.csv'
-            csv_file_exists = os.path.exists(csv_file)
-            with open(csv_file, mode='a', newline='') as file:
-                writer = csv.DictWriter(file, fieldnames=csv_data[0].keys())
-                if not csv_file_exists:
-                    writer.writeheader()  # Write the header only if the file does not exist
-                writer.writerows(csv_data)
+            with zone_store.ZoneStore() as store:
+                store.import_csv(zone_store.ZONE_CSV)
+                store.upsert(zone_store.zone_records(csv_data, timeframe, params))
+                store.export_csv(zone_store.ZONE_CSV, side='demand')
 
     def detect_demand_zones(self, candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct):
-        demand_zones = []
-        i = 0
-        while i < len(candles) - 2:
-            if self.is_legin_candle(candles[i], min_legin_pct, max_legin_pct):
-                base_candles = []
-                j = i + 1
-                while j < len(candles) and len(base_candles) < max_base and self.is_base_candle(candles[j], min_base_pct, max_base_pct):
-                    base_candles.append(candles[j])
-                    j += 1
-
-                if j < len(candles) and self.is_legout_candle(candles[j], min_legout_pct, max_legout_pct):
-                    legin_candle = candles[i]
-                    legout_candle = candles[j]
-
-                    # Check if it's a demand zone
-                    if len(base_candles) >= min_base and (legout_candle.is_bullish and
-                                                         legout_candle.close > legin_candle.high and
-                                                         legout_candle.close > max(candle.high for candle in base_candles)):
-                        demand_zones.append((i, j, base_candles))  # Store the indices and base candles
-                i = j  # Skip to the next possible pattern after the legout candle
-            else:
-                i += 1
-
-        return demand_zones
-
-    def check_zone_tested_and_target(self, demand_zone, candles, start_index):
-        base_candles = demand_zone[2]
-        highest_high = max(candle.high for candle in base_candles)
-        lowest_low = min(candle.low for candle in base_candles)
-
-        # Determine the target for a 1:2 risk-reward ratio
-        risk = highest_high - lowest_low
-        target_price = highest_high + 2 * risk
-
-        # Change: Continue checking until the last candle in the dataset
-        for k in range(start_index, len(candles)):
-            if candles[k].low <= highest_high and candles[k].high >= lowest_low:
-                # Check if the price hits the 1:2 target after entering the zone
-                for m in range(k, len(candles)):
-                    if candles[m].high >= target_price:
-                        return 'Target Achieved'  # Zone achieved 1:2 target
-                    if candles[m].low < lowest_low:
-                        return 'Tested'  # Zone was broken before achieving target
-                break
-
-        return 'Fresh'  # Zone has not been tested
-
-    def is_legin_candle(self, candle, min_legin_pct, max_legin_pct):
-        return min_legin_pct <= candle.body_percentage <= max_legin_pct
-
-    def is_base_candle(self, candle, min_base_pct, max_base_pct):
-        return min_base_pct <= candle.body_percentage <= max_base_pct
-
-    def is_legout_candle(self, candle, min_legout_pct, max_legout_pct):
-        return min_legout_pct <= candle.body_percentage <= max_legout_pct
-
-# Convert fetched data to Candle objects
-class Candle:
-    def __init__(self, open_price, high, low, close, date):
-        self.open_price = open_price
-        self.high = high
-        self.low = low
-        self.close = close
-        self.date = date
-
-    @property
-    def body_size(self):
-        return abs(self.close - self.open_price)
-
-    @property
-    def candle_range(self):
-        return self.high - self.low
-
-    @property
-    def body_percentage(self):
-        if self.candle_range == 0:
-            return 0
-        return (self.body_size / self.candle_range) * 100
-
-    @property
-    def is_bullish(self):
-        return self.close > self.open_price
+        # Vectorized scan with the same skip-ahead behaviour as the original candle loop
+        return zone_detector.detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base,
+                                                 min_base_pct, max_base_pct, min_legout_pct, max_legout_pct)
+
+    def check_zones_tested_and_target(self, demand_zones, candles, labels=zone_outcomes.STATUS_LABELS):
+        # All zones are resolved together: each one is checked from the candle after its
+        # leg-out until the last candle in the dataset
+        return zone_outcomes.zone_statuses(demand_zones, candles, labels)
+
+# -----------------------------
+# Per-Symbol Scan
+# -----------------------------
+
+def scan_symbol(symbol, monthly_data, daily_data, htf_params, params):
+    """
+    Detects the demand zones of one symbol inside its higher timeframe demand zones and
+    returns their CSV rows. Runs in a scan worker process, so it only uses its arguments.
+    """
+    (min_legin_pct_htf, max_legin_pct_htf, min_base_htf, max_base_htf, min_base_pct_htf, max_base_pct_htf,
+     min_legout_pct_htf, max_legout_pct_htf) = htf_params
+    (min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+     min_legout_pct, max_legout_pct) = params
+    rows = []
+
+    # Convert monthly data to a CandleSeries
+    monthly_candles = CandleSeries.from_frame(monthly_data)
+
+    # Detect monthly demand zones
+    monthly_demand_zones = zone_detector.detect_demand_zones(
+        monthly_candles, min_legin_pct_htf, max_legin_pct_htf, min_base_htf, max_base_htf, min_base_pct_htf, max_base_pct_htf, min_legout_pct_htf, max_legout_pct_htf
+    )
+
+    if not monthly_demand_zones:
+        return rows
+
+    # Bar ranges of the daily series inside the monthly demand zones; windows that share bars
+    # are merged, the others stay apart so no daily zone is built across two of them
+    segments = timeframes.window_segments(
+        daily_data.index, [(monthly_data.index[dz[0]+1], monthly_data.index[dz[1]]) for dz in monthly_demand_zones]
+    )
+
+    if not segments:
+        return rows
+
+    # Convert daily data to a CandleSeries
+    daily_candles = CandleSeries.from_frame(daily_data)
+
+    # Detect demand zones inside each window of the daily data
+    demand_zones = zone_detector.detect_demand_zones_in_segments(
+        daily_candles, segments, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct, min_legout_pct, max_legout_pct
+    )
+
+    if not demand_zones:
+        return rows
+
+    # Each zone is checked from the candle after its leg-out until the last daily candle
+    statuses = zone_outcomes.zone_statuses(demand_zones, daily_candles)
+
+    # Map every daily zone to the first monthly zone containing it, in one sorted lookup
+    higher_timeframe_zones = zone_mapping.parent_zones(demand_zones, daily_data.index,
+                                                       monthly_demand_zones, monthly_data.index)
+
+    # Prepare CSV data
+    for dz, status, higher_timeframe_zone in zip(demand_zones, statuses, higher_timeframe_zones):
+        base_candles = dz[2]
+
+        # Find the highest high and lowest low of the base candles
+        highest_high = base_candles.high.max()
+        lowest_low = base_candles.low.min()
+
+        # Define leg-in and leg-out candles
+        legin_candle = daily_candles[dz[0]+1]
+        legout_candle = daily_candles[dz[1]]
+
+        if higher_timeframe_zone:
+            higher_legin_candle = monthly_candles[higher_timeframe_zone[0]]
+            higher_legout_candle = monthly_candles[higher_timeframe_zone[1]]
+        else:
+            higher_legin_candle = None
+            higher_legout_candle = None
+
+        rows.append({
+            "Symbol": symbol,
+            "Leg-In Time": legin_candle.date,
+            "Leg-Out Time": legout_candle.date,
+            "Zone High": highest_high,
+            "Zone Low": lowest_low,
+            "Status": status,
+            "Higher Timeframe Leg-In Time": higher_legin_candle.date if higher_legin_candle else "N/A",
+            "Higher Timeframe Leg-Out Time": higher_legout_candle.date if higher_legout_candle else "N/A",
+            "Higher Timeframe Zone High": higher_legin_candle.high if higher_legin_candle else "N/A",
+            "Higher Timeframe Zone Low": higher_legout_candle.low if higher_legout_candle else "N/A"
+        })
+
+    return rows
 
 # Run the application
 if __name__ == "__main__":
@@ -0,0 +1,208 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+import market_data
+from market_data import flatten_columns, slice_range
+
+# -----------------------------
+# Persistent OHLCV Cache
+# -----------------------------
+
+CACHE_DIR = '.ohlcv_cache'
+
+# Units accepted by yfinance's ``period`` argument, mapped to pandas offsets
+PERIOD_UNITS = {
+    'd': lambda n: pd.DateOffset(days=n),
+    'wk': lambda n: pd.DateOffset(weeks=n),
+    'mo': lambda n: pd.DateOffset(months=n),
+    'y': lambda n: pd.DateOffset(years=n),
+}
+
+
+def period_to_range(period, now=None):
+    """
+    Converts a yfinance ``period`` string (e.g. '1y', '6mo', '5d', 'ytd', 'max')
+    into a naive (start, end) pair of Timestamps.
+    """
+    now = now or pd.Timestamp.now().normalize()
+    end = now + pd.Timedelta(days=1)
+    if period == 'max':
+        return pd.Timestamp('1970-01-01'), end
+    if period == 'ytd':
+        return pd.Timestamp(year=now.year, month=1, day=1), end
+
+    match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+    if not match:
+        raise ValueError(f"Unsupported period '{period}'.")
+    count, unit = int(match.group(1)), match.group(2)
+    return now - PERIOD_UNITS[unit](count), end
+
+
+class OHLCVCache:
+    """
+    On-disk columnar cache of OHLCV bars, one file per symbol and interval.
+
+    Each file stores the bar timestamps plus one array per price column, together with the
+    [start, end) range that has already been fetched. Requests inside that range are served
+    from disk; anything outside it is fetched and merged in, so repeated scans only pay for
+    the bars that appeared since the previous run.
+    """
+    def __init__(self, cache_dir=CACHE_DIR, provider=None, fetch=None):
+        self.provider = provider or market_data.get_provider()
+        # Keep each provider's bars apart so replayed data never leaks into live scans
+        self.cache_dir = os.path.join(cache_dir, self.provider.name)
+        self.fetch = fetch or self._fetch_from_provider
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _fetch_from_provider(self, symbol, start, end, interval):
+        return self.provider.fetch_bars(symbol, interval, start, end)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.cache_dir, f"{market_data.safe_name(symbol)}__{interval}.npz")
+
+    def load(self, symbol, interval):
+        """
+        Returns (data, covered_start, covered_end) for the cached bars, or None if nothing is cached.
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as stored:
+            tz = str(stored['tz']) or None
+            index = pd.DatetimeIndex(pd.to_datetime(stored['time'], unit='ns'))
+            if tz:
+                index = index.tz_localize('UTC').tz_convert(tz)
+            columns = [str(name) for name in stored['columns']]
+            data = pd.DataFrame({name: stored[f"col_{k}"] for k, name in enumerate(columns)}, index=index)
+            covered = stored['covered']
+
+        data.index.name = 'Datetime' if tz else 'Date'
+        return data, pd.Timestamp(covered[0]), pd.Timestamp(covered[1])
+
+    def save(self, symbol, interval, data, covered_start, covered_end):
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else ''
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        arrays = {
+            'time': index.as_unit('ns').asi8,
+            'tz': np.array(tz),
+            'columns': np.array([str(name) for name in data.columns]),
+            'covered': np.array([covered_start.value, covered_end.value], dtype='datetime64[ns]'),
+        }
+        for k, name in enumerate(data.columns):
+            arrays[f"col_{k}"] = data[name].to_numpy(dtype=np.float64)
+
+        # Write to a temporary file first so an interrupted run never leaves a corrupt cache entry
+        path = self.path(symbol, interval)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(tmp_path, path)
+
+    def request_range(self, start=None, end=None, period=None):
+        """
+        Resolves yf.download style start/end/period arguments into a naive [start, end) pair.
+        """
+        if period is not None:
+            start, end = period_to_range(period)
+        start = pd.Timestamp(start) if start is not None else pd.Timestamp('1970-01-01')
+        end = pd.Timestamp(end) if end is not None else pd.Timestamp.now().normalize() + pd.Timedelta(days=1)
+        return start, end
+
+    def missing_range(self, symbol, interval, start, end):
+        """
+        Returns the (fetch_start, fetch_end) span that download() would have to fetch for
+        [start, end), or None if the request can be served entirely from disk.
+        """
+        cached = self.load(symbol, interval)
+        if cached is None:
+            return start, end
+
+        data, covered_start, covered_end = cached
+        fetch_start, fetch_end = None, None
+        if start < covered_start:
+            fetch_start, fetch_end = start, covered_start
+        if end > covered_end:
+            fetch_end = end
+            if fetch_start is None:
+                fetch_start = self._tail_start(data, covered_end)
+        if fetch_start is None:
+            return None
+        return fetch_start, fetch_end
+
+    def download(self, symbol, start=None, end=None, interval="1d", period=None, fetch=None):
+        """
+        Returns the bars of ``symbol`` in [start, end), fetching only what is missing from the cache.
+        Accepts the same start/end/period arguments as yf.download. ``fetch`` overrides the
+        fetch function for this call, e.g. to serve the missing bars from a batch download.
+        """
+        fetch = fetch or self.fetch
+        start, end = self.request_range(start, end, period)
+
+        # Bars after "now" may still change, so coverage never extends past the current time
+        fresh_until = min(end, pd.Timestamp.now())
+
+        # An empty fetch is never recorded as coverage: providers return one both for a failed
+        # request and for a symbol they do not know, and either may succeed on the next call
+        cached = self.load(symbol, interval)
+        if cached is None:
+            data = flatten_columns(fetch(symbol, start, end, interval))
+            if data.empty:
+                return market_data.empty_bars()
+            self.save(symbol, interval, data, start, fresh_until)
+            return slice_range(data, start, end)
+
+        data, covered_start, covered_end = cached
+        parts = [data]
+        if start < covered_start:
+            head = flatten_columns(fetch(symbol, start, covered_start, interval))
+            if not head.empty:
+                parts.insert(0, head)
+                covered_start = start
+        if end > covered_end:
+            tail = flatten_columns(fetch(symbol, self._tail_start(data, covered_end), end, interval))
+            if not tail.empty:
+                parts.append(tail)
+                covered_end = max(covered_end, fresh_until)
+
+        if len(parts) > 1:
+            data = pd.concat(parts)
+            data = data[~data.index.duplicated(keep='last')].sort_index()
+            self.save(symbol, interval, data, covered_start, covered_end)
+
+        data = slice_range(data, start, end)
+        return data if not data.empty else market_data.empty_bars()
+
+    def _tail_start(self, data, covered_end):
+        # Re-fetch from the last cached bar, which may have been incomplete when it was stored
+        if data.empty:
+            return covered_end
+        return min(covered_end, self._naive(data.index[-1]))
+
+    def _naive(self, timestamp):
+        if timestamp.tzinfo is not None:
+            return timestamp.tz_localize(None)
+        return timestamp
+
+
+_default_cache = None
+
+
+def get_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OHLCVCache()
+    return _default_cache
+
+
+def download(symbol, start=None, end=None, interval="1d", period=None):
+    """
+    Drop-in replacement for yf.download(symbol, ...) that goes through the shared on-disk cache.
+    """
+    return get_cache().download(symbol, start=start, end=end, interval=interval, period=period)
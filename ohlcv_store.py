@@ -0,0 +1,191 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+import fetch_scheduler
+import market_data
+import universe_loader
+
+# -----------------------------
+# Memory-Mapped OHLCV Store
+# -----------------------------
+
+STORE_DIR = '.ohlcv_store'
+
+# Name of the file in a symbol's directory that names its current version directory
+CURRENT_FILE = 'CURRENT'
+
+PRICE_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+class StoredBars:
+    """
+    Read-only view of one symbol's bars in the store. Every field is a numpy memmap, so
+    slicing never copies and processes that open the same symbol share the page cache.
+    ``time`` holds int64 nanoseconds since the epoch (UTC for intraday bars).
+    """
+    def __init__(self, symbol, interval, time, fields, tz):
+        self.symbol = symbol
+        self.interval = interval
+        self.time = time
+        self.open_price = fields['Open']
+        self.high = fields['High']
+        self.low = fields['Low']
+        self.close = fields['Close']
+        self.volume = fields['Volume']
+        self.tz = tz
+
+    def __len__(self):
+        return len(self.time)
+
+    def slice(self, start_index, end_index):
+        """
+        Returns a StoredBars over bars [start_index, end_index) without copying.
+        """
+        fields = {
+            'Open': self.open_price[start_index:end_index],
+            'High': self.high[start_index:end_index],
+            'Low': self.low[start_index:end_index],
+            'Close': self.close[start_index:end_index],
+            'Volume': self.volume[start_index:end_index],
+        }
+        return StoredBars(self.symbol, self.interval, self.time[start_index:end_index], fields, self.tz)
+
+    def window(self, start, end):
+        """
+        Returns the bars in [start, end) located by binary search on the timestamps.
+        """
+        start_index, end_index = np.searchsorted(self.time, [self._ns(start), self._ns(end)])
+        return self.slice(start_index, end_index)
+
+    def index(self):
+        index = pd.DatetimeIndex(self.time.view('datetime64[ns]'))
+        if self.tz:
+            index = index.tz_localize('UTC').tz_convert(self.tz)
+        return index
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'Open': self.open_price,
+            'High': self.high,
+            'Low': self.low,
+            'Close': self.close,
+            'Volume': self.volume,
+        }, index=self.index())
+
+    def _ns(self, timestamp):
+        timestamp = pd.Timestamp(timestamp)
+        if self.tz and timestamp.tzinfo is None:
+            timestamp = timestamp.tz_localize(self.tz)
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.tz_convert('UTC').tz_localize(None)
+        return timestamp.value
+
+
+class OHLCVStore:
+    """
+    Binary bar store laid out as <root>/<interval>/<symbol>/<version>/<field>.bin: one
+    contiguous array per field plus an int64 timestamp array and a small meta.json. Files are
+    opened with numpy.memmap, so detectors read slices in place and worker processes share
+    the pages.
+
+    A write fills a new version directory and then swaps the symbol's CURRENT file to name
+    it, so a reader always maps a meta.json and the arrays it describes together. The
+    version before the current one is kept for readers that picked it up just before a swap.
+    """
+    def __init__(self, root=STORE_DIR, dtype=np.float64):
+        self.root = root
+        self.dtype = np.dtype(dtype)
+
+    def symbol_dir(self, symbol, interval):
+        return os.path.join(self.root, interval, market_data.safe_name(symbol))
+
+    def has(self, symbol, interval):
+        return self._current(symbol, interval) is not None
+
+    def write(self, symbol, interval, data):
+        """
+        Replaces the stored bars of ``symbol`` with the rows of the DataFrame ``data``.
+        """
+        directory = self.symbol_dir(symbol, interval)
+        previous = self._current(symbol, interval)
+        version = f"v{time.time_ns()}"
+        version_dir = os.path.join(directory, version)
+        os.makedirs(version_dir)
+
+        index = pd.DatetimeIndex(data.index)
+        tz = str(index.tz) if index.tz is not None else ''
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        arrays = {'time': (index.as_unit('ns').asi8, np.int64)}
+        for field in PRICE_FIELDS:
+            values = data[field].to_numpy() if field in data.columns else np.full(len(data), np.nan)
+            arrays[field] = (values, self.dtype)
+
+        for name, (values, dtype) in arrays.items():
+            np.ascontiguousarray(values, dtype=dtype).tofile(os.path.join(version_dir, f"{name}.bin"))
+        meta = {'length': len(index), 'dtype': self.dtype.str, 'tz': tz}
+        with open(os.path.join(version_dir, 'meta.json'), 'w') as file:
+            json.dump(meta, file)
+
+        # Readers switch to the new version only once all of it is on disk
+        current_path = os.path.join(directory, CURRENT_FILE)
+        with open(current_path + '.tmp', 'w') as file:
+            file.write(version)
+        os.replace(current_path + '.tmp', current_path)
+
+        for name in os.listdir(directory):
+            if name not in (version, previous, CURRENT_FILE) and os.path.isdir(os.path.join(directory, name)):
+                # Versions still mapped somewhere cannot be removed on every platform; they go next time
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+    def open(self, symbol, interval):
+        """
+        Returns a memory-mapped StoredBars for ``symbol``, or None if it is not in the store.
+        """
+        version = self._current(symbol, interval)
+        if version is None:
+            return None
+        directory = os.path.join(self.symbol_dir(symbol, interval), version)
+        with open(os.path.join(directory, 'meta.json')) as file:
+            meta = json.load(file)
+
+        length = meta['length']
+        time = self._map(os.path.join(directory, 'time.bin'), np.int64, length)
+        fields = {
+            field: self._map(os.path.join(directory, f"{field}.bin"), np.dtype(meta['dtype']), length)
+            for field in PRICE_FIELDS
+        }
+        return StoredBars(symbol, interval, time, fields, meta['tz'])
+
+    def _current(self, symbol, interval):
+        try:
+            with open(os.path.join(self.symbol_dir(symbol, interval), CURRENT_FILE)) as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _map(self, path, dtype, length):
+        # np.memmap cannot map an empty file
+        if length == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r', shape=(length,))
+
+
+def build_store(symbols, interval, start, end, store=None, scheduler=None, **load_options):
+    """
+    Loads ``symbols`` through the batched universe loader and writes them into the store.
+    Returns the store; the symbols that could not be fetched are left in
+    ``scheduler.failures`` (pass a FetchScheduler to read them).
+    """
+    store = store or OHLCVStore()
+    scheduler = scheduler or fetch_scheduler.FetchScheduler()
+    for bars in universe_loader.load_universe(symbols, start, end, interval=interval, scheduler=scheduler,
+                                              **load_options):
+        store.write(bars.symbol, interval, bars.to_frame())
+    return store
@@ -0,0 +1,150 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+import zone_detector
+import zone_outcomes
+
+# -----------------------------
+# Parameter Sweep
+# -----------------------------
+
+# The detection parameters of the GUIs, with their default values
+DEFAULT_PARAMETERS = {
+    'min_legin_pct': 50,
+    'max_legin_pct': 100,
+    'min_base': 1,
+    'max_base': 5,
+    'min_base_pct': 0,
+    'max_base_pct': 50,
+    'min_legout_pct': 50,
+    'max_legout_pct': 100,
+}
+
+SIDES = {zone_detector.DEMAND: 'Demand', zone_detector.SUPPLY: 'Supply'}
+
+
+def parameter_grid(**values):
+    """
+    Every combination of the given parameter values, as a list of parameter dicts. Each
+    keyword takes a list of values; parameters that are not given keep their default.
+
+        parameter_grid(min_legin_pct=[50, 60, 70], max_base=[3, 5])
+    """
+    unknown = set(values) - set(DEFAULT_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(sorted(unknown))}")
+    names = list(DEFAULT_PARAMETERS)
+    choices = [values.get(name, [DEFAULT_PARAMETERS[name]]) for name in names]
+    return [dict(zip(names, combination)) for combination in itertools.product(*choices)]
+
+
+class ZoneSweep:
+    """
+    Evaluates many parameter sets over one CandleSeries.
+
+    body_pct and the range index come with the series and are computed once. Everything a
+    parameter set depends on is cached under the parameters it depends on: the leg-in mask
+    under the leg-in range, the base mask and its run lengths under the base range, and the
+    zone candidates with their sides and outcomes under (leg-in range, base range, max_base).
+    A parameter set that only changes min_base or the leg-out range is then a mask over
+    already evaluated candidates.
+    """
+    def __init__(self, candles):
+        self.candles = candles
+        self.legin_masks = {}
+        self.base_masks = {}
+        self.candidates = {}
+
+    def counts(self, params):
+        """
+        Returns {(side, status): zone count} for one parameter set, where side is
+        zone_detector.DEMAND or SUPPLY and status is zone_outcomes.FRESH, TESTED or TARGET.
+        """
+        starts, ends, base_counts, sides, outcomes = self._candidates(params)
+        body_pct = self.candles.body_pct[ends]
+        keep = ((base_counts >= params['min_base']) & (sides != 0)
+                & (params['min_legout_pct'] <= body_pct) & (body_pct <= params['max_legout_pct']))
+
+        counts = {}
+        for side in SIDES:
+            side_outcomes = outcomes[keep & (sides == side)]
+            tally = np.bincount(side_outcomes, minlength=3)
+            for status in (zone_outcomes.FRESH, zone_outcomes.TESTED, zone_outcomes.TARGET):
+                counts[(side, status)] = int(tally[status])
+        return counts
+
+    def _candidates(self, params):
+        legin_key = (params['min_legin_pct'], params['max_legin_pct'])
+        base_key = (params['min_base_pct'], params['max_base_pct'])
+        key = (legin_key, base_key, params['max_base'])
+        if key not in self.candidates:
+            legin = self._legin(legin_key)
+            base, run_lengths = self._base(base_key)
+            starts, ends, base_counts = zone_detector.zone_candidates(self.candles, legin, base, params['max_base'],
+                                                                      run_lengths)
+            sides, base_high, base_low = zone_detector.classify_candidates(self.candles, starts, ends, base_counts)
+
+            # Outcomes of every candidate that can become a zone, checked from the candle after the leg-out
+            outcomes = np.full(len(starts), zone_outcomes.FRESH, dtype=np.int8)
+            demand = np.flatnonzero(sides == zone_detector.DEMAND)
+            supply = np.flatnonzero(sides == zone_detector.SUPPLY)
+            outcomes[demand] = zone_outcomes.evaluate_zones(self.candles, base_high[demand], base_low[demand],
+                                                            ends[demand] + 1)
+            outcomes[supply] = zone_outcomes.evaluate_supply_zones(self.candles, base_high[supply], base_low[supply],
+                                                                   ends[supply] + 1)
+            self.candidates[key] = (starts, ends, base_counts, sides, outcomes)
+        return self.candidates[key]
+
+    def _legin(self, key):
+        if key not in self.legin_masks:
+            self.legin_masks[key] = self._body_between(*key)
+        return self.legin_masks[key]
+
+    def _base(self, key):
+        if key not in self.base_masks:
+            base = self._body_between(*key)
+            self.base_masks[key] = (base, zone_detector.base_run_lengths(base))
+        return self.base_masks[key]
+
+    def _body_between(self, low, high):
+        body_pct = self.candles.body_pct
+        return (low <= body_pct) & (body_pct <= high)
+
+
+def sweep(series, grid):
+    """
+    Runs every parameter set of ``grid`` over every CandleSeries in ``series`` (an iterable
+    of (symbol, candles) pairs) and returns one row per parameter set: the parameters, the
+    number of demand and supply zones by status, and their hit rates (share of touched zones
+    that reached the 1:2 target).
+
+    Symbols are processed one at a time, so ``series`` can be a generator over the universe.
+    """
+    grid = list(grid)
+    totals = [dict.fromkeys(((side, status) for side in SIDES for status in zone_outcomes.STATUS_LABELS), 0)
+              for _ in grid]
+    symbols = 0
+    for _, candles in series:
+        symbols += 1
+        zone_sweep = ZoneSweep(candles)
+        for total, params in zip(totals, grid):
+            for key, count in zone_sweep.counts(params).items():
+                total[key] += count
+
+    rows = []
+    for params, total in zip(grid, totals):
+        row = dict(params)
+        row['Symbols'] = symbols
+        for side, name in SIDES.items():
+            fresh = total[(side, zone_outcomes.FRESH)]
+            tested = total[(side, zone_outcomes.TESTED)]
+            target = total[(side, zone_outcomes.TARGET)]
+            row[f"{name} Zones"] = fresh + tested + target
+            row[f"{name} Fresh"] = fresh
+            row[f"{name} Tested"] = tested
+            row[f"{name} Target Achieved"] = target
+            row[f"{name} Hit Rate"] = target / (tested + target) if tested + target else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
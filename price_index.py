@@ -0,0 +1,74 @@
+import threading
+
+import numpy as np
+
+# -----------------------------
+# Per-Symbol Zone Price Index
+# -----------------------------
+
+# Relative slack on the bisect bounds, so rounding never drops a zone the exact test accepts
+BOUND_SLACK = 1e-9
+
+
+class ZonePriceIndex:
+    """
+    Zones bucketed by symbol, each bucket searchable by zone price.
+
+    near() answers "which zones of this symbol are within ``proximity`` of this price" with
+    a binary search over the bucket's sorted prices, so a tick costs O(log zones + matches)
+    however many zones (and symbols) are held. A bucket is sorted again on the first lookup
+    after zones were added to it; other buckets are untouched.
+
+    The index is filled from the Tk thread while the monitor thread looks prices up, so every
+    method holds one lock.
+    """
+    def __init__(self):
+        # symbol -> [(price, zone)] in the order added, and symbol -> (sorted prices, positions)
+        self.buckets = {}
+        self.sorted = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        with self.lock:
+            return sum(len(bucket) for bucket in self.buckets.values())
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+            self.sorted.clear()
+
+    def add(self, symbol, price, zone):
+        with self.lock:
+            self.buckets.setdefault(symbol, []).append((float(price), zone))
+            self.sorted.pop(symbol, None)
+
+    def near(self, symbol, price, proximity):
+        """
+        The zones of ``symbol`` whose price p satisfies abs(price - p) / p < proximity, in the
+        order they were added. Zones at a price of zero or below never match.
+        """
+        with self.lock:
+            bucket = self.buckets.get(symbol)
+            if not bucket:
+                return []
+            prices, positions = self._sorted(symbol)
+        # Outside the lock only this snapshot is read: buckets are only ever appended to, and
+        # clear() drops them from the index without touching the lists
+
+        # For p > 0 the test is price / (1 + proximity) < p < price / (1 - proximity)
+        low = price / (1 + proximity) * (1 - BOUND_SLACK)
+        high = price / (1 - proximity) * (1 + BOUND_SLACK) if proximity < 1 else np.inf
+        first, last = np.searchsorted(prices, [low, high], side='left')
+        matches = []
+        for k in np.sort(positions[first:last]):
+            zone_price, zone = bucket[k]
+            if zone_price > 0 and abs(price - zone_price) / zone_price < proximity:
+                matches.append(zone)
+        return matches
+
+    def _sorted(self, symbol):
+        if symbol not in self.sorted:
+            prices = np.array([price for price, _ in self.buckets[symbol]], dtype=np.float64)
+            positions = np.argsort(prices, kind='stable')
+            self.sorted[symbol] = (prices[positions], positions)
+        return self.sorted[symbol]
@@ -0,0 +1,144 @@
+import numpy as np
+
+# -----------------------------
+# Sparse-Table Range Index
+# -----------------------------
+
+class RangeIndex:
+    """
+    Range-minimum of the lows and range-maximum of the highs of a candle series.
+
+    Row k of each table holds the extreme of every window of 2**k bars, so the minimum
+    low or maximum high of any bar range is the extreme of two overlapping windows (O(1)),
+    and "first bar at or after t whose low is <= x" is answered by walking down the rows
+    (O(log n)). Every query takes scalars or arrays, so all zones of a symbol are looked up
+    together. Missing lows and highs never satisfy a query, like a NaN comparison.
+
+    Build it once per series; CandleSeries.range_index does that and keeps it.
+    """
+    def __init__(self, low, high):
+        low = np.asarray(low, dtype=np.float64)
+        high = np.asarray(high, dtype=np.float64)
+        self.low = np.where(np.isnan(low), np.inf, low)
+        self.high = np.where(np.isnan(high), -np.inf, high)
+        self.n = len(self.low)
+        self.min_low_table = _sparse_table(self.low, np.minimum, np.inf)
+        self.max_high_table = _sparse_table(self.high, np.maximum, -np.inf)
+        # floor(log2(length)) for every range length
+        self.levels = np.zeros(self.n + 1, dtype=np.intp)
+        if self.n > 1:
+            self.levels[2:] = np.floor(np.log2(np.arange(2, self.n + 1))).astype(np.intp)
+
+    def __len__(self):
+        return self.n
+
+    def min_low(self, start, stop):
+        """
+        Lowest low over the bars [start, stop); stop must be greater than start.
+        """
+        return self._range(self.min_low_table, np.minimum, start, stop)
+
+    def max_high(self, start, stop):
+        """
+        Highest high over the bars [start, stop); stop must be greater than start.
+        """
+        return self._range(self.max_high_table, np.maximum, start, stop)
+
+    def first_low_at_or_below(self, starts, prices):
+        """
+        First bar index k >= start with low[k] <= price, or len(self) if there is none.
+        """
+        return self._first(self.min_low_table, starts, lambda lows, prices: lows <= prices, prices)
+
+    def first_high_at_or_above(self, starts, prices):
+        """
+        First bar index k >= start with high[k] >= price, or len(self) if there is none.
+        """
+        return self._first(self.max_high_table, starts, lambda highs, prices: highs >= prices, prices)
+
+    def first_low_below(self, starts, prices):
+        """
+        First bar index k >= start with low[k] < price, or len(self) if there is none.
+        """
+        return self.first_low_at_or_below(starts, np.nextafter(np.asarray(prices, dtype=np.float64), -np.inf))
+
+    def first_high_above(self, starts, prices):
+        """
+        First bar index k >= start with high[k] > price, or len(self) if there is none.
+        """
+        return self.first_high_at_or_above(starts, np.nextafter(np.asarray(prices, dtype=np.float64), np.inf))
+
+    def first_overlap(self, starts, lows, highs):
+        """
+        First bar index k >= start that trades into [low, high] (low[k] <= high and
+        high[k] >= low), or len(self) if there is none. Pass low == high for a single price.
+
+        The two conditions are chased in turn: the first bar reaching down to ``high`` either
+        overlaps or lies wholly below the range, in which case the next candidate is the first
+        later bar reaching up to ``low``, and so on. Each round skips a whole run of bars, and
+        a new round is only needed when price gaps clean across the range.
+        """
+        starts, lows, highs = np.broadcast_arrays(np.asarray(starts, dtype=np.intp),
+                                                  np.asarray(lows, dtype=np.float64),
+                                                  np.asarray(highs, dtype=np.float64))
+        result = np.full(starts.shape, self.n, dtype=np.intp)
+        flat = result.reshape(-1)
+        rows = np.arange(starts.size)
+        position = np.minimum(starts.reshape(-1), self.n)
+        lows, highs = lows.reshape(-1), highs.reshape(-1)
+
+        while len(rows):
+            # Reaches down to the top of the range; overlaps unless the whole bar is below it
+            position = self.first_low_at_or_below(position, highs[rows])
+            rows, position = self._settle(flat, rows, position, self.high, lows, np.greater_equal)
+            if not len(rows):
+                break
+            # Reaches up to the bottom of the range; overlaps unless the whole bar is above it
+            position = self.first_high_at_or_above(position, lows[rows])
+            rows, position = self._settle(flat, rows, position, self.low, highs, np.less_equal)
+
+        return result if result.ndim else int(result)
+
+    def _settle(self, result, rows, position, values, bounds, compare):
+        # Records the rows whose candidate bar overlaps and returns the rest, moved past it
+        inside = position < self.n
+        rows, position = rows[inside], position[inside]
+        hit = compare(values[position], bounds[rows])
+        result[rows[hit]] = position[hit]
+        return rows[~hit], position[~hit] + 1
+
+    def _range(self, table, combine, start, stop):
+        start = np.asarray(start, dtype=np.intp)
+        stop = np.asarray(stop, dtype=np.intp)
+        level = self.levels[stop - start]
+        result = combine(table[level, start], table[level, stop - (1 << level)])
+        return result if result.ndim else float(result)
+
+    def _first(self, table, starts, satisfies, prices):
+        position, prices = np.broadcast_arrays(np.asarray(starts, dtype=np.intp),
+                                               np.asarray(prices, dtype=np.float64))
+        position = np.minimum(position, self.n)
+        if self.n == 0:
+            return position if position.ndim else int(position)
+        # Skip every window, largest first, that holds no qualifying bar
+        for level in range(len(table) - 1, -1, -1):
+            width = 1 << level
+            fits = position + width <= self.n
+            window = table[level, np.minimum(position, self.n - width)]
+            position = np.where(fits & ~satisfies(window, prices), position + width, position)
+        return position if position.ndim else int(position)
+
+
+def _sparse_table(values, combine, fill):
+    # Row k, column p: extreme of values[p:p + 2**k]; columns past the last full window hold ``fill``
+    n = len(values)
+    rows = max(n, 1).bit_length()
+    table = np.full((rows, n), fill, dtype=np.float64)
+    table[0] = values
+    for k in range(1, rows):
+        half = 1 << (k - 1)
+        width = n - (1 << k) + 1
+        if width <= 0:
+            break
+        table[k, :width] = combine(table[k - 1, :width], table[k - 1, half:half + width])
+    return table
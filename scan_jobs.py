@@ -0,0 +1,108 @@
+import contextlib
+import hashlib
+import json
+import os
+import pickle
+import shutil
+
+# -----------------------------
+# Resumable Scan Jobs
+# -----------------------------
+
+JOBS_DIR = '.scan_jobs'
+
+
+def settings_key(settings):
+    """
+    Short stable hash of a scan's settings (dates, timeframes, detection parameters,
+    universe), so a rerun with the same settings finds the checkpoint of the last run.
+    """
+    text = json.dumps(settings, sort_keys=True, default=str)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:16]
+
+
+class ScanJob:
+    """
+    A universe scan whose per-symbol results are checkpointed to disk as they complete.
+
+    The checkpoint lives in JOBS_DIR under the job name and the hash of its settings, and is
+    rewritten atomically (temp file + os.replace) after every ``checkpoint_every`` symbols,
+    so a crash leaves the previous checkpoint intact. Creating a job with the same name and
+    settings as an interrupted run picks its completed symbols back up: scan only
+    pending(symbols), then read every result from ``completed``. Call finish() once the
+    output has been written; it deletes the checkpoint.
+
+    Results are pickled, so they must be picklable (the scan rows and summaries are).
+    """
+    def __init__(self, name, settings, jobs_dir=JOBS_DIR, checkpoint_every=1):
+        self.name = name
+        self.settings = settings
+        self.checkpoint_every = checkpoint_every
+        self.path = os.path.join(jobs_dir, f"{name}-{settings_key(settings)}.pkl")
+        self.completed = {}
+        self.unsaved = 0
+        self._load()
+        self.resumed = len(self.completed)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'rb') as file:
+                checkpoint = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # An unreadable checkpoint only costs a full rescan
+            return
+        if checkpoint.get('settings_key') == settings_key(self.settings):
+            self.completed = checkpoint['completed']
+
+    def pending(self, symbols):
+        """
+        The symbols of ``symbols`` that have no checkpointed result yet, in order.
+        """
+        return [symbol for symbol in symbols if symbol not in self.completed]
+
+    def record(self, symbol, result):
+        self.completed[symbol] = result
+        self.unsaved += 1
+        if self.unsaved >= self.checkpoint_every:
+            self.save()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        checkpoint = {'settings_key': settings_key(self.settings), 'completed': self.completed}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(checkpoint, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self.unsaved = 0
+
+    def finish(self):
+        """
+        Drops the checkpoint of a job whose output has been written.
+        """
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self.path)
+        self.unsaved = 0
+
+
+@contextlib.contextmanager
+def atomic_output(path, mode='w', newline=''):
+    """
+    Opens ``path`` for writing through a temporary file that replaces it only when the
+    block completes, so an interrupted write never leaves a half-written output behind.
+    With mode 'a' the temporary file starts as a copy of the existing output.
+    """
+    tmp_path = path + '.tmp'
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(tmp_path)
+    if 'a' in mode and os.path.exists(path):
+        shutil.copyfile(path, tmp_path)
+    try:
+        with open(tmp_path, mode, newline=newline) as file:
+            yield file
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,90 @@
+import queue
+import threading
+
+# -----------------------------
+# Background Scan Worker
+# -----------------------------
+
+# How often the Tk thread drains the worker's messages
+POLL_INTERVAL_MS = 100
+
+
+class ScanWorker:
+    """
+    Runs a universe scan on a background thread so the Tk event loop never blocks.
+
+    ``scan`` is called as scan(worker) on the worker thread and must not touch any widget.
+    It reports through worker.progress() and worker.result(), which only put messages on a
+    thread-safe queue, and returns a summary when it is done. The Tk thread drains that queue
+    with widget.after() and calls, on the Tk thread:
+
+        on_progress(done, total, symbol, status)
+        on_result(symbol, result)
+        on_done(summary, error)      error is None unless scan raised
+
+    cancel() sets ``cancel_event``; the scan is expected to stop between symbols once it is
+    set (UniverseScanner.run takes it as ``cancel``).
+    """
+    def __init__(self, widget, scan, on_progress=None, on_result=None, on_done=None, poll_ms=POLL_INTERVAL_MS):
+        self.widget = widget
+        self.scan = scan
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+        self.cancel_event = threading.Event()
+        self.messages = queue.Queue()
+        self.thread = None
+        self.finished = False
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.widget.after(self.poll_ms, self._poll)
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    @property
+    def running(self):
+        return self.thread is not None and not self.finished
+
+    # Called from the worker thread
+
+    def progress(self, done, total, symbol, status):
+        self.messages.put(('progress', (done, total, symbol, status)))
+
+    def result(self, symbol, result):
+        self.messages.put(('result', (symbol, result)))
+
+    def _run(self):
+        try:
+            summary = self.scan(self)
+        except Exception as error:
+            self.messages.put(('done', (None, error)))
+        else:
+            self.messages.put(('done', (summary, None)))
+
+    # Called on the Tk thread
+
+    def _poll(self):
+        while True:
+            try:
+                kind, payload = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress' and self.on_progress:
+                self.on_progress(*payload)
+            elif kind == 'result' and self.on_result:
+                self.on_result(*payload)
+            elif kind == 'done':
+                self.finished = True
+                if self.on_done:
+                    self.on_done(*payload)
+                return
+        self.widget.after(self.poll_ms, self._poll)
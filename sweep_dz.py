@@ -0,0 +1,53 @@
+import pandas as pd
+import fetch_scheduler
+import universe_loader
+from candles import CandleSeries
+import param_sweep
+
+# -----------------------------
+# Load Symbols from CSV
+# -----------------------------
+
+# Read the stock symbols from the CSV file 'yf_symbols.csv'
+symbols_df = pd.read_csv('yf_symbols.csv')
+nifty50_stocks = symbols_df['Symbol'].tolist()
+
+start_date = "2020-01-01"
+end_date = "2024-12-31"
+
+# -----------------------------
+# Parameter Grid
+# -----------------------------
+
+# Every combination of these values is evaluated; parameters left out keep the GUI defaults
+grid = param_sweep.parameter_grid(
+    min_legin_pct=[40, 50, 60, 70, 80],
+    min_base=[1, 2],
+    max_base=[3, 4, 5, 6],
+    max_base_pct=[30, 40, 50],
+    min_legout_pct=[40, 50, 60, 70, 80],
+)
+
+# -----------------------------
+# Sweep Execution and CSV Saving
+# -----------------------------
+
+# Symbols whose fetch still fails after retries are collected here and reported at the end
+scheduler = fetch_scheduler.FetchScheduler()
+
+def universe_series():
+    # Fetch historical data for all stocks, several symbols per request
+    for bars in universe_loader.load_universe(nifty50_stocks, start_date, end_date, interval="1d",
+                                              scheduler=scheduler):
+        if bars.empty:
+            print(f"No data fetched for symbol {bars.symbol} between {start_date} and {end_date}.")
+            continue
+        yield bars.symbol, CandleSeries.from_bars(bars)
+
+sweep_df = param_sweep.sweep(universe_series(), grid)
+
+csv_filename = "nifty50_parameter_sweep.csv"
+sweep_df.to_csv(csv_filename, index=False)
+
+print(f"Evaluated {len(grid)} parameter sets; results saved to {csv_filename}.")
+print(scheduler.failure_report())
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_bars(periods, start='2024-01-01', freq='D', seed=0):
+    """
+    Random OHLCV bars with the yfinance column layout.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(start, periods=periods, freq=freq)
+    close = 100 + np.cumsum(rng.normal(0, 2, periods))
+    open_price = close + rng.normal(0, 1.5, periods)
+    return pd.DataFrame({
+        'Open': open_price,
+        'High': np.maximum(open_price, close) + rng.random(periods),
+        'Low': np.minimum(open_price, close) - rng.random(periods),
+        'Close': close,
+        'Volume': rng.integers(1000, 5000, periods).astype(float),
+    }, index=index)
+
+
+@pytest.fixture
+def bars():
+    return make_bars
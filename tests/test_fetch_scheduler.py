@@ -0,0 +1,38 @@
+import threading
+import time
+
+import fetch_scheduler
+
+
+def test_closing_the_run_drops_queued_fetches():
+    started = []
+    lock = threading.Lock()
+
+    def fetch(key):
+        with lock:
+            started.append(key)
+        time.sleep(0.05)
+        return key
+
+    scheduler = fetch_scheduler.FetchScheduler(max_workers=2)
+    run = scheduler.run(range(40), fetch)
+    next(run)
+    began = time.monotonic()
+    run.close()
+
+    assert time.monotonic() - began < 0.5
+    time.sleep(0.2)
+    assert len(started) < 40
+
+
+def test_permanent_errors_are_not_retried():
+    calls = []
+
+    def fetch(key):
+        calls.append(key)
+        raise ValueError("no data")
+
+    scheduler = fetch_scheduler.FetchScheduler(max_workers=1, sleep=lambda seconds: None)
+    assert list(scheduler.run(['A'], fetch)) == []
+    assert calls == ['A']
+    assert isinstance(scheduler.failures['A'], ValueError)
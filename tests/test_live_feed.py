@@ -0,0 +1,39 @@
+import pandas as pd
+
+import live_feed
+import market_data
+
+
+def _minute_bars(bars, days):
+    index = pd.DatetimeIndex([]).append([pd.date_range(f'{day} 09:15', periods=375, freq='min') for day in days])
+    data = bars(len(index), freq='min')
+    data.index = index.tz_localize(market_data.EXCHANGE_TZ)
+    return data
+
+
+def test_first_poll_on_a_holiday_loads_the_last_session(bars):
+    data = _minute_bars(bars, ['2024-03-07', '2024-03-08'])
+    provider = market_data.FrameProvider({'A.NS': data})
+    # Saturday morning: nothing has traded today
+    buffer = live_feed.MinuteBarBuffer(provider, clock=lambda: pd.Timestamp('2024-03-09 10:00'))
+
+    held = buffer.update('A.NS')
+
+    assert len(held) == 375
+    assert (held.index.normalize() == pd.Timestamp('2024-03-08', tz=market_data.EXCHANGE_TZ)).all()
+    assert buffer.latest_price('A.NS') == data['Close'].iloc[-1]
+
+
+def test_polls_during_the_session_only_fetch_new_bars(bars):
+    data = _minute_bars(bars, ['2024-03-08'])
+    provider = market_data.FrameProvider({'A.NS': data})
+    now = [pd.Timestamp('2024-03-08 10:00')]
+    buffer = live_feed.MinuteBarBuffer(provider, clock=lambda: now[0])
+
+    buffer.update('A.NS')
+    now[0] = pd.Timestamp('2024-03-08 10:05')
+    held = buffer.update('A.NS')
+
+    assert provider.requests[-1][1] == pd.Timestamp('2024-03-08 10:00')
+    assert held.index[-1] == pd.Timestamp('2024-03-08 10:05', tz=market_data.EXCHANGE_TZ)
+    assert len(held) == 51
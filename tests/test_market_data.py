@@ -0,0 +1,19 @@
+import market_data
+
+
+def test_replay_clock_and_prices_move_one_bar_per_poll(bars):
+    data = bars(5, start='2024-03-08 09:15', freq='min')
+    provider = market_data.FrameProvider({('A.NS', '1m'): data})
+
+    polls = [(provider.replay_time('A.NS'), provider.fetch_latest_price('A.NS')) for _ in range(3)]
+
+    assert polls == list(zip(data.index[:3], data['Close'].iloc[:3]))
+
+
+def test_request_log_is_capped(bars):
+    provider = market_data.FrameProvider({'A.NS': bars(10)}, max_requests=3)
+
+    for day in range(1, 6):
+        provider.fetch_bars('A.NS', '1d', f'2024-01-0{day}', '2024-01-10')
+
+    assert [start for _, start, _, _ in provider.requests] == ['2024-01-03', '2024-01-04', '2024-01-05']
@@ -0,0 +1,76 @@
+import pandas as pd
+
+import market_data
+import ohlcv_cache
+
+
+def test_round_trip_serves_cached_bars_from_disk(tmp_path, bars):
+    data = bars(60, start='2023-01-01')
+    provider = market_data.FrameProvider({'A.NS': data})
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+
+    first = cache.download('A.NS', start='2023-01-01', end='2023-02-01')
+    second = cache.download('A.NS', start='2023-01-05', end='2023-01-20')
+
+    assert len(provider.requests) == 1
+    pd.testing.assert_frame_equal(first, data.loc['2023-01-01':'2023-01-31'], check_names=False, check_freq=False,
+                                  check_index_type=False)
+    pd.testing.assert_frame_equal(second, data.loc['2023-01-05':'2023-01-19'], check_names=False, check_freq=False,
+                                  check_index_type=False)
+
+
+def test_extends_coverage_with_only_the_missing_span(tmp_path, bars):
+    data = bars(60, start='2023-01-01')
+    provider = market_data.FrameProvider({'A.NS': data})
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+
+    cache.download('A.NS', start='2023-01-10', end='2023-01-20')
+    extended = cache.download('A.NS', start='2023-01-01', end='2023-01-20')
+
+    assert [(start, end) for _, start, end, _ in provider.requests][1] == (pd.Timestamp('2023-01-01'),
+                                                                           pd.Timestamp('2023-01-10'))
+    pd.testing.assert_frame_equal(extended, data.loc['2023-01-01':'2023-01-19'], check_names=False, check_freq=False,
+                                  check_index_type=False)
+
+
+def test_cache_keeps_timezone(tmp_path, bars):
+    data = bars(30, start='2024-03-04 09:15', freq='min')
+    data.index = data.index.tz_localize(market_data.EXCHANGE_TZ)
+    provider = market_data.FrameProvider({'A.NS': data})
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+
+    cache.download('A.NS', start='2024-03-04', end='2024-03-05', interval='1m')
+    loaded, _, _ = cache.load('A.NS', '1m')
+
+    assert str(loaded.index.tz) == market_data.EXCHANGE_TZ
+    pd.testing.assert_frame_equal(loaded, data, check_names=False, check_freq=False,
+                                  check_index_type=False)
+
+
+def test_empty_fetch_is_not_cached(tmp_path, bars):
+    provider = market_data.FrameProvider({})
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+
+    missing = cache.download('A.NS', start='2023-01-01', end='2023-02-01')
+    assert missing.empty
+    assert list(missing.columns) == market_data.BAR_COLUMNS
+
+    # The symbol appears later: the next call asks the provider again
+    data = bars(60, start='2023-01-01')
+    provider.frames['A.NS'] = data
+    found = cache.download('A.NS', start='2023-01-01', end='2023-02-01')
+    assert len(provider.requests) == 2
+    assert len(found) == 31
+
+
+def test_empty_head_fetch_does_not_extend_coverage(tmp_path, bars):
+    data = bars(60, start='2023-01-01')
+    provider = market_data.FrameProvider({'A.NS': data})
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+
+    cache.download('A.NS', start='2023-01-10', end='2023-01-20')
+    provider.frames['A.NS'] = data.loc['2023-01-10':]
+    cache.download('A.NS', start='2023-01-01', end='2023-01-20')
+    _, covered_start, _ = cache.load('A.NS', '1d')
+
+    assert covered_start == pd.Timestamp('2023-01-10')
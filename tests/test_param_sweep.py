@@ -0,0 +1,37 @@
+import pytest
+
+import param_sweep
+import zone_detector
+import zone_outcomes
+from candles import CandleSeries
+
+from conftest import make_bars
+
+GRID = param_sweep.parameter_grid(min_legin_pct=[40, 60], min_base=[1, 2], max_base=[3, 5], max_base_pct=[40, 50],
+                                  min_legout_pct=[50, 70])
+
+
+# zone_statuses labels that are the zone_outcomes codes themselves
+OUTCOMES = {outcome: outcome for outcome in zone_outcomes.STATUS_LABELS}
+
+
+def _direct_counts(candles, params):
+    demand_zones, supply_zones = zone_detector.detect_zones(
+        candles, *[params[name] for name in param_sweep.DEFAULT_PARAMETERS])
+    outcomes = {zone_detector.DEMAND: zone_outcomes.zone_statuses(demand_zones, candles, OUTCOMES),
+                zone_detector.SUPPLY: zone_outcomes.supply_zone_statuses(supply_zones, candles, OUTCOMES)}
+    return {(side, outcome): outcomes[side].count(outcome) for side in param_sweep.SIDES for outcome in OUTCOMES}
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_sweep_counts_match_detecting_each_set(seed):
+    candles = CandleSeries.from_frame(make_bars(800, seed=seed))
+    sweep = param_sweep.ZoneSweep(candles)
+
+    for params in GRID:
+        assert sweep.counts(params) == _direct_counts(candles, params)
+
+
+def test_unknown_parameters_are_rejected():
+    with pytest.raises(ValueError):
+        param_sweep.parameter_grid(min_legin=[50])
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from price_index import ZonePriceIndex
+
+
+@pytest.mark.parametrize('proximity', [0.0, 0.01, 0.05, 1.0, 1.5])
+def test_near_matches_checking_every_zone(proximity):
+    rng = np.random.default_rng(11)
+    index = ZonePriceIndex()
+    zones = []
+    for k in range(300):
+        symbol = 'AB'[k % 2]
+        price = float(rng.choice([0.0, -5.0, 100.0, 101.0])) if k % 25 == 0 else float(rng.uniform(50, 150))
+        zones.append((symbol, price, k))
+        index.add(symbol, price, k)
+
+    for price in list(rng.uniform(40, 160, 50)) + [100.0, 101.0]:
+        for symbol in 'ABC':
+            expected = [zone for zone_symbol, zone_price, zone in zones
+                        if zone_symbol == symbol and zone_price > 0 and abs(price - zone_price) / zone_price < proximity]
+            assert index.near(symbol, price, proximity) == expected
+
+
+def test_zones_added_after_a_lookup_are_found():
+    index = ZonePriceIndex()
+    index.add('A.NS', 100.0, 'first')
+    assert index.near('A.NS', 100.5, 0.01) == ['first']
+
+    index.add('A.NS', 100.2, 'second')
+
+    assert index.near('A.NS', 100.5, 0.01) == ['first', 'second']
+    assert len(index) == 2
+    index.clear()
+    assert index.near('A.NS', 100.5, 0.01) == []
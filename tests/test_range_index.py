@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from range_index import RangeIndex
+
+
+def _first(condition, start, length):
+    return next((k for k in range(start, length) if condition(k)), length)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_searches_match_a_linear_scan(seed):
+    rng = np.random.default_rng(seed)
+    length = 300
+    low = rng.normal(0, 3, length)
+    high = low + rng.exponential(1, length)
+    low[rng.integers(0, length, 3)] = np.nan
+    index = RangeIndex(low, high)
+
+    starts = rng.integers(0, length + 2, 100)
+    prices = rng.normal(0, 3, 100)
+    tops = prices + rng.exponential(1, 100)
+
+    assert list(index.first_overlap(starts, prices, tops)) == [
+        _first(lambda k: low[k] <= top and high[k] >= price, start, length)
+        for start, price, top in zip(starts, prices, tops)]
+    assert list(index.first_low_below(starts, prices)) == [
+        _first(lambda k: low[k] < price, start, length) for start, price in zip(starts, prices)]
+    assert list(index.first_low_at_or_below(starts, prices)) == [
+        _first(lambda k: low[k] <= price, start, length) for start, price in zip(starts, prices)]
+    assert list(index.first_high_at_or_above(starts, prices)) == [
+        _first(lambda k: high[k] >= price, start, length) for start, price in zip(starts, prices)]
+    assert list(index.first_high_above(starts, prices)) == [
+        _first(lambda k: high[k] > price, start, length) for start, price in zip(starts, prices)]
+
+
+def test_range_extremes_skip_missing_lows():
+    low = np.array([3.0, np.nan, 1.0, 4.0])
+    high = np.array([5.0, 6.0, 2.0, 7.0])
+    index = RangeIndex(low, high)
+
+    assert index.min_low(0, 2) == 3.0
+    assert index.min_low(1, 4) == 1.0
+    assert index.max_high(0, 3) == 6.0
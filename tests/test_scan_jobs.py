@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+import pytest
+
+import scan_jobs
+
+SETTINGS = {'start': '2020-01-01', 'end': '2024-12-31', 'symbols': ['A.NS', 'B.NS', 'C.NS']}
+
+
+def test_rerun_resumes_from_the_checkpoint(tmp_path):
+    first = scan_jobs.ScanJob('scan', SETTINGS, jobs_dir=str(tmp_path))
+    first.record('A.NS', [{'Leg-In Time': pd.Timestamp('2024-01-01'), 'Zone High': 1.5}])
+
+    # A new process after a crash: same name and settings
+    rerun = scan_jobs.ScanJob('scan', SETTINGS, jobs_dir=str(tmp_path))
+
+    assert rerun.resumed == 1
+    assert rerun.pending(SETTINGS['symbols']) == ['B.NS', 'C.NS']
+    assert rerun.completed['A.NS'] == [{'Leg-In Time': pd.Timestamp('2024-01-01'), 'Zone High': 1.5}]
+
+
+def test_changed_settings_start_over(tmp_path):
+    scan_jobs.ScanJob('scan', SETTINGS, jobs_dir=str(tmp_path)).record('A.NS', [])
+
+    rerun = scan_jobs.ScanJob('scan', dict(SETTINGS, end='2025-06-30'), jobs_dir=str(tmp_path))
+
+    assert rerun.resumed == 0
+    assert rerun.pending(SETTINGS['symbols']) == SETTINGS['symbols']
+
+
+def test_finish_drops_the_checkpoint(tmp_path):
+    job = scan_jobs.ScanJob('scan', SETTINGS, jobs_dir=str(tmp_path))
+    job.record('A.NS', [])
+    job.finish()
+
+    assert os.listdir(tmp_path) == []
+    assert scan_jobs.ScanJob('scan', SETTINGS, jobs_dir=str(tmp_path)).resumed == 0
+
+
+def test_interrupted_output_keeps_the_previous_file(tmp_path):
+    path = str(tmp_path / 'zones.csv')
+    with scan_jobs.atomic_output(path) as file:
+        file.write('Symbol\nA.NS\n')
+
+    with pytest.raises(KeyboardInterrupt):
+        with scan_jobs.atomic_output(path, 'a') as file:
+            file.write('B.NS\n')
+            raise KeyboardInterrupt
+
+    with open(path) as file:
+        assert file.read() == 'Symbol\nA.NS\n'
+    assert os.listdir(tmp_path) == ['zones.csv']
@@ -0,0 +1,23 @@
+import pandas as pd
+
+import market_data
+import ohlcv_cache
+import timeframes
+
+
+def test_load_windows_caches_windows_without_the_gaps(tmp_path, monkeypatch, bars):
+    data = bars(24 * 60, start='2024-01-01', freq='h')
+    provider = market_data.FrameProvider({('A.NS', '1h'): data})
+    monkeypatch.setattr(ohlcv_cache, '_default_cache', ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider))
+    windows = [('2024-01-05', '2024-01-07'), ('2024-02-01', '2024-02-02')]
+
+    first = timeframes.load_windows('A.NS', '1h', windows)
+    second = timeframes.load_windows('A.NS', '1h', windows)
+
+    assert [(start, end) for _, start, end, _ in provider.requests] == [
+        (pd.Timestamp('2024-01-05'), pd.Timestamp('2024-01-07')),
+        (pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-02')),
+    ]
+    expected = pd.concat([data.loc['2024-01-05':'2024-01-06'], data.loc['2024-02-01':'2024-02-01']])
+    pd.testing.assert_frame_equal(first, expected, check_names=False, check_freq=False, check_index_type=False)
+    pd.testing.assert_frame_equal(second, first, check_names=False, check_index_type=False)
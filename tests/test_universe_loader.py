@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+import fetch_scheduler
+import market_data
+import ohlcv_cache
+import universe_loader
+
+
+def test_chunked_keeps_order_and_remainder():
+    assert list(universe_loader.chunked(['A', 'B', 'C', 'D', 'E'], 2)) == [['A', 'B'], ['C', 'D'], ['E']]
+
+
+def test_split_batch_trims_untraded_rows(bars):
+    early, late = bars(10, seed=1), bars(10, seed=2)
+    late.iloc[:4] = np.nan
+    wide = pd.concat({'A.NS': early, 'B.NS': late}, axis=1)
+
+    split = universe_loader.split_batch(wide, ['A.NS', 'B.NS', 'C.NS'])
+
+    assert set(split) == {'A.NS', 'B.NS'}
+    np.testing.assert_array_equal(split['A.NS'].close, early['Close'].to_numpy())
+    assert len(split['B.NS']) == 6
+    assert split['B.NS'].index[0] == late.index[4]
+    np.testing.assert_array_equal(split['B.NS'].close, late['Close'].to_numpy()[4:])
+
+
+def test_split_batch_accepts_flat_single_symbol_frame(bars):
+    data = bars(5)
+    split = universe_loader.split_batch(data, ['A.NS'])
+    np.testing.assert_array_equal(split['A.NS'].high, data['High'].to_numpy())
+
+
+def test_load_universe_requests_in_chunks(bars):
+    frames = {symbol: bars(20, seed=k) for k, symbol in enumerate(['A', 'B', 'C', 'D', 'E'])}
+    provider = market_data.FrameProvider(frames)
+    scheduler = fetch_scheduler.FetchScheduler(max_workers=1)
+
+    loaded = {item.symbol: item for item in universe_loader.load_universe(
+        list(frames) + ['MISSING'], '2024-01-01', '2024-02-01', chunk_size=2, provider=provider, use_cache=False,
+        scheduler=scheduler)}
+
+    assert sorted(len(symbols) for symbols, _, _, _ in provider.requests) == [2, 2, 2]
+    assert loaded['MISSING'].empty
+    for symbol, data in frames.items():
+        np.testing.assert_array_equal(loaded[symbol].close, data['Close'].to_numpy())
+
+
+def test_symbol_missing_from_batch_is_reported_not_cached(tmp_path, bars):
+    frames = {symbol: bars(20, seed=k) for k, symbol in enumerate(['A', 'B', 'C'])}
+    provider = market_data.FrameProvider(frames)
+    cache = ohlcv_cache.OHLCVCache(cache_dir=str(tmp_path), provider=provider)
+    scheduler = fetch_scheduler.FetchScheduler(max_workers=1)
+
+    loaded = {item.symbol: item for item in universe_loader.load_universe(
+        ['A', 'B', 'C', 'MISSING'], '2024-01-01', '2024-01-15', chunk_size=2, provider=provider, cache=cache,
+        scheduler=scheduler)}
+
+    assert sorted(loaded) == ['A', 'B', 'C']
+    assert list(scheduler.failures) == [('MISSING',)]
+    assert cache.load('MISSING', '1d') is None
+    np.testing.assert_array_equal(loaded['C'].close, frames['C']['Close'].to_numpy()[:14])
@@ -0,0 +1,38 @@
+import pandas as pd
+
+import zone_cascade
+import zone_mapping
+
+
+def test_parents_compare_exchange_local_times():
+    parents = [{'legin_time': pd.Timestamp('2024-01-05'), 'legout_time': pd.Timestamp('2024-01-08')}]
+    # 20:00 UTC is 01:30 the next morning in Asia/Kolkata, so the second zone ends on the
+    # parent's leg-out date, after its leg-out label
+    index = pd.DatetimeIndex(['2024-01-05 04:00', '2024-01-06 04:00', '2024-01-07 05:00', '2024-01-07 20:00'],
+                             tz='UTC')
+    zones = [(0, 1), (2, 3)]
+
+    positions = zone_cascade.level_parents(index, zones, parents)
+
+    assert list(positions) == [0, zone_mapping.NO_PARENT]
+
+
+def test_levels_start_at_the_provider_lookback(bars):
+    daily = bars(200, start='2024-01-01')
+    requests = []
+
+    def download(symbol, start, end, interval):
+        requests.append((interval, start))
+        return daily.loc[start:end]
+
+    def load_windows(symbol, interval, windows):
+        requests.append((interval, min(start for start, _ in windows)))
+        return daily.iloc[:0]
+
+    zone_cascade.cascade_zones('A.NS', [('1d', zone_cascade.DEFAULT_PARAMS), ('1h', zone_cascade.DEFAULT_PARAMS)],
+                               '2024-01-01', '2024-07-01', download=download, load_windows=load_windows,
+                               earliest_start=lambda interval: pd.Timestamp('2024-05-01') if interval == '1h' else None)
+
+    assert requests[0] == ('1d', pd.Timestamp('2024-01-01'))
+    assert all(start >= pd.Timestamp('2024-05-01') for interval, start in requests[1:])
+    assert len(requests) == 2
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import zone_detector
+from candles import CandleSeries
+
+from conftest import make_bars
+
+
+def legacy_detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+                               min_legout_pct, max_legout_pct):
+    # The per-candle loop the GUIs used before the vectorized detector
+    def within(candle, low, high):
+        return low <= candle.body_percentage <= high
+
+    demand_zones = []
+    i = 0
+    while i < len(candles) - 2:
+        if within(candles[i], min_legin_pct, max_legin_pct):
+            base_candles = []
+            j = i + 1
+            while j < len(candles) and len(base_candles) < max_base and within(candles[j], min_base_pct, max_base_pct):
+                base_candles.append(candles[j])
+                j += 1
+
+            if j < len(candles) and within(candles[j], min_legout_pct, max_legout_pct):
+                legin_candle = candles[i]
+                legout_candle = candles[j]
+                base_high = max((candle.high for candle in base_candles), default=-np.inf)
+                if len(base_candles) >= min_base and (legout_candle.is_bullish and
+                                                     legout_candle.close > legin_candle.high and
+                                                     legout_candle.close > base_high):
+                    demand_zones.append((i, j, base_candles))
+            i = j
+        else:
+            i += 1
+    return demand_zones
+
+
+PARAMETER_SETS = [
+    (50, 100, 1, 5, 0, 50, 50, 100),
+    (30, 100, 1, 3, 0, 60, 30, 100),
+    (20, 100, 0, 4, 0, 70, 20, 100),
+    (60, 100, 2, 6, 10, 40, 60, 90),
+]
+
+
+@pytest.mark.parametrize('params', PARAMETER_SETS)
+@pytest.mark.parametrize('seed', range(5))
+def test_vectorized_detector_matches_legacy_loop(params, seed):
+    candles = CandleSeries.from_frame(make_bars(400, seed=seed))
+
+    expected = legacy_detect_demand_zones(candles, *params)
+    found = zone_detector.detect_demand_zones(candles, *params)
+
+    assert [(i, j) for i, j, _ in found] == [(i, j) for i, j, _ in expected]
+    for (_, _, base), (_, _, legacy_base) in zip(found, expected):
+        np.testing.assert_array_equal(base.high, [candle.high for candle in legacy_base])
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import zone_mapping
+
+
+def _intervals(rng, count, span):
+    # Detector-like intervals: starts and ends both in order
+    bounds = np.sort(rng.integers(0, span, 2 * count))
+    return bounds[0::2], bounds[1::2]
+
+
+def _first_containing(child_start, child_end, parents, child_group=None, parent_groups=None):
+    for position, (start, end) in enumerate(parents):
+        if (parent_groups is None or parent_groups[position] == child_group) and start <= child_start and child_end <= end:
+            return position
+    return zone_mapping.NO_PARENT
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_a_linear_search(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(50):
+        parent_starts, parent_ends = _intervals(rng, int(rng.integers(0, 8)), 100)
+        child_starts = rng.integers(0, 100, 30)
+        child_ends = child_starts + rng.integers(0, 15, 30)
+
+        positions = zone_mapping.containing_parents(child_starts, child_ends, parent_starts, parent_ends)
+
+        parents = list(zip(parent_starts, parent_ends))
+        assert list(positions) == [_first_containing(start, end, parents)
+                                   for start, end in zip(child_starts, child_ends)]
+
+
+def test_groups_keep_symbols_apart():
+    rng = np.random.default_rng(9)
+    parents, parent_groups = [], []
+    for group in 'ABC':
+        starts, ends = _intervals(rng, 5, 50)
+        parents.extend(zip(starts, ends))
+        parent_groups.extend(group * len(starts))
+    order = np.argsort([start for start, _ in parents], kind='stable')
+    parents = [parents[k] for k in order]
+    parent_groups = [parent_groups[k] for k in order]
+    child_groups = list(rng.choice(list('ABCD'), 60))
+    child_starts = rng.integers(0, 50, 60)
+    child_ends = child_starts + rng.integers(0, 8, 60)
+
+    positions = zone_mapping.containing_parents(child_starts, child_ends, [start for start, _ in parents],
+                                                [end for _, end in parents], child_groups, parent_groups)
+
+    assert list(positions) == [_first_containing(start, end, parents, group, parent_groups)
+                               for start, end, group in zip(child_starts, child_ends, child_groups)]
+
+
+def test_timestamps_compare_across_units_and_timezones():
+    days = pd.date_range('2024-01-01', periods=10)
+    parent_starts = days[[0, 4]].as_unit('s')
+    parent_ends = days[[3, 9]].as_unit('ns')
+    child_times = days[[5, 6]].tz_localize('UTC').as_unit('us')
+
+    positions = zone_mapping.containing_parents(child_times[:1], child_times[1:], parent_starts, parent_ends)
+
+    assert list(positions) == [1]
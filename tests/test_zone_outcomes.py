@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+import zone_detector
+import zone_outcomes
+from candles import CandleSeries
+
+from conftest import make_bars
+
+
+def legacy_zone_status(demand_zone, candles, start_index):
+    # The check_zone_tested_and_target loop the GUIs used before zone_outcomes
+    base_candles = demand_zone[2]
+    highest_high = base_candles.high.max()
+    lowest_low = base_candles.low.min()
+    target_price = highest_high + 2 * (highest_high - lowest_low)
+
+    for k in range(start_index, len(candles)):
+        if candles.low[k] <= highest_high and candles.high[k] >= lowest_low:
+            for m in range(k, len(candles)):
+                if candles.high[m] >= target_price:
+                    return 'Target Achieved'
+                if candles.low[m] < lowest_low:
+                    return 'Tested'
+            break
+    return 'Fresh'
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_zone_statuses_match_the_legacy_loop(seed):
+    candles = CandleSeries.from_frame(make_bars(1500, seed=seed))
+    demand_zones = zone_detector.detect_demand_zones(candles, 40, 100, 1, 5, 0, 50, 40, 100)
+
+    statuses = zone_outcomes.zone_statuses(demand_zones, candles)
+
+    assert demand_zones
+    assert statuses == [legacy_zone_status(zone, candles, zone[1] + 1) for zone in demand_zones]
+
+
+def test_any_start_and_zone_bounds_match_the_legacy_loop():
+    rng = np.random.default_rng(7)
+    candles = CandleSeries.from_frame(make_bars(400, seed=7))
+    highs = candles.close[rng.integers(0, len(candles), 200)] + rng.normal(0, 3, 200)
+    lows = highs - rng.exponential(2, 200)
+    starts = rng.integers(0, len(candles) + 2, 200)
+
+    outcomes = zone_outcomes.evaluate_zones(candles, highs, lows, starts)
+
+    bases = [CandleSeries([low], [high], [low], [high]) for high, low in zip(highs, lows)]
+    expected = [legacy_zone_status((0, 0, base), candles, start) for base, start in zip(bases, starts)]
+    assert [zone_outcomes.STATUS_LABELS[outcome] for outcome in outcomes] == expected
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import timeframes
+import zone_outcomes
+import zone_refresh
+import zone_store
+from candles import CandleSeries
+from market_data import EXCHANGE_TZ, slice_range
+
+
+def _provider(frames):
+    def download(symbol, start=None, end=None, interval='1d'):
+        return slice_range(frames[interval], start, end if end is not None else '2100-01-01')
+
+    def load_windows(symbol, interval, windows):
+        return pd.concat([slice_range(frames[interval], start, end) for start, end in timeframes.merge_windows(windows)])
+
+    return download, load_windows
+
+
+def _zones(data, count, seed):
+    # Zones drawn from later prices but left at an early leg-out, so each stays untouched
+    # for a while and then plays out
+    rng = np.random.default_rng(seed)
+    zones = []
+    for k in range(count):
+        legout = int(rng.integers(0, len(data) // 4))
+        low = float(data['Low'].iloc[int(rng.integers(legout + len(data) // 4, len(data)))])
+        zones.append({'zone_high': low + float(rng.uniform(0.5, 3)), 'zone_low': low,
+                      'side': 'supply' if k % 2 else 'demand', 'status': zone_refresh.OPEN_STATUS,
+                      'touched_at': None, 'evaluated_until': None, 'legout_time': data.index[legout]})
+    return zones
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_intraday_refresh_over_active_sessions_matches_full_history(bars, seed):
+    hourly = bars(24 * 90, start='2024-01-01', freq='h', seed=seed)
+    hourly.index = hourly.index.tz_localize(EXCHANGE_TZ)
+    frames = {'1h': hourly, '1d': timeframes.resample_ohlcv(hourly, '1d')}
+    download, load_windows = _provider(frames)
+
+    windowed, full = _zones(hourly, 8, seed=seed), _zones(hourly, 8, seed=seed)
+    zone_refresh.advance_group('A.NS', '1h', windowed, download=download, load_windows=load_windows)
+    zone_refresh.advance_group('A.NS', '1h', full, download=download, load_windows=None)
+
+    assert [zone['status'] for zone in windowed] == [zone['status'] for zone in full]
+    assert [zone['touched_at'] for zone in windowed] == [zone['touched_at'] for zone in full]
+
+
+def test_active_sessions_skip_sessions_before_the_first_touch(bars):
+    hourly = bars(24 * 90, start='2024-01-01', freq='h', seed=2)
+    zones = _zones(hourly, 8, seed=2)
+    sessions = timeframes.resample_ohlcv(hourly, '1d')
+
+    windows = zone_refresh.active_sessions(zones, [zone['legout_time'] for zone in zones], sessions)
+
+    assert 0 < len(windows) < 60
+
+
+@pytest.mark.parametrize('side', ['demand', 'supply'])
+def test_daily_refreshes_match_one_full_evaluation(tmp_path, bars, side):
+    data = bars(300, start='2024-01-01', seed=3)
+    available = [150]
+
+    def download(symbol, start=None, end=None, interval='1d'):
+        loaded = data.iloc[:available[0]]
+        return loaded[loaded.index >= pd.Timestamp(start)]
+
+    rng = np.random.default_rng(3)
+    rows = []
+    for k in range(60):
+        legout = 5 + 2 * k
+        zone_low = float(data['Low'].iloc[int(rng.integers(legout, len(data)))])
+        rows.append({"Symbol": "A.NS", "Leg-In Time": data.index[legout - 2], "Leg-Out Time": data.index[legout],
+                     "Zone High": zone_low + float(rng.uniform(0.3, 3)), "Zone Low": zone_low, "Status": "Fresh"})
+
+    with zone_store.ZoneStore(str(tmp_path / 'zones.db')) as store:
+        store.upsert(zone_store.zone_records(rows, '1d', (1,), side=side))
+        # Bars arrive in uneven batches, including a run without new bars
+        for available[0] in (150, 151, 151, 200, 230, 300):
+            zone_refresh.refresh_zones(store, download=download)
+        statuses = {zone['legin_time']: zone['status'] for zone in store.zones()}
+
+    evaluate = zone_outcomes.evaluate_supply_zones if side == 'supply' else zone_outcomes.evaluate_zones
+    expected = evaluate(CandleSeries.from_frame(data), [row["Zone High"] for row in rows], [row["Zone Low"] for row in rows],
+                        [data.index.get_loc(row["Leg-Out Time"]) + 1 for row in rows])
+    assert [statuses[row["Leg-In Time"].isoformat()] for row in rows] == [
+        zone_outcomes.STATUS_LABELS[outcome] for outcome in expected]
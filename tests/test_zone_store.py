@@ -0,0 +1,53 @@
+import pandas as pd
+
+import zone_store
+
+
+def _row(symbol, legin, status='Fresh', zone_high=10.5):
+    return {"Symbol": symbol, "Leg-In Time": pd.Timestamp(legin), "Leg-Out Time": pd.Timestamp(legin) + pd.Timedelta(days=3),
+            "Zone High": zone_high, "Zone Low": 9.0, "Status": status, "Higher Timeframe Leg-In Time": "N/A"}
+
+
+def test_rescan_updates_rows_and_keeps_refresh_progress(tmp_path):
+    with zone_store.ZoneStore(str(tmp_path / 'zones.db')) as store:
+        store.upsert(zone_store.zone_records([_row('A.NS', '2024-01-02'), _row('B.NS', '2024-02-02')], '1d', (1, 2)))
+        zone = store.zones(symbol='A.NS')[0]
+        zone.update(status='Tested', touched_at='2024-01-09T00:00:00', evaluated_until='2024-01-20T00:00:00')
+        store.update_progress([zone])
+
+        store.upsert(zone_store.zone_records([_row('A.NS', '2024-01-02', zone_high=10.8)], '1d', (1, 2)))
+        store.upsert(zone_store.zone_records([_row('A.NS', '2024-01-02')], '1d', (1, 3)))
+
+        zones = store.zones(symbol='A.NS', params=(1, 2))
+        assert len(store.zones()) == 3
+        assert [(zone['zone_high'], zone['touched_at'], zone['evaluated_until']) for zone in zones] == [
+            (10.8, '2024-01-09T00:00:00', '2024-01-20T00:00:00')]
+        assert zones[0]['htf_legin_time'] is None
+
+
+def test_legacy_csv_is_imported_once_and_exported_per_zone(tmp_path):
+    legacy = tmp_path / 'demand_zone_data.csv'
+    pd.DataFrame([
+        _row('A.NS', '2024-01-02', status='Achieved Target'),
+        # The same zone, as a spreadsheet saves it
+        dict(_row('A.NS', '2024-01-02', status='Achieved Target'), **{"Leg-In Time": '02-01-2024',
+                                                                     "Leg-Out Time": '05-01-2024'}),
+        _row('B.NS', '2024-02-02'),
+    ]).to_csv(legacy, index=False)
+
+    with zone_store.ZoneStore(str(tmp_path / 'zones.db')) as store:
+        assert store.import_csv(str(legacy)) == 3
+        assert store.import_csv(str(legacy)) == 0
+        store.upsert(zone_store.zone_records([_row('B.NS', '2024-02-02', status='Tested')], '1d', (1, 2)))
+        zones = store.zones()
+        written = store.export_csv(str(legacy), side='demand')
+
+    assert sorted((zone['symbol'], zone['legin_time'], zone['status']) for zone in zones) == [
+        ('A.NS', '2024-01-02T00:00:00', 'Target Achieved'),
+        ('B.NS', '2024-02-02T00:00:00', 'Fresh'),
+        ('B.NS', '2024-02-02T00:00:00', 'Tested'),
+    ]
+    exported = pd.read_csv(legacy)
+    assert written == 2
+    assert list(exported.columns) == zone_store.CSV_COLUMNS
+    assert list(exported['Status']) == ['Target Achieved', 'Tested']
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import zone_detector
+from candles import CandleSeries
+from zone_stream import StreamingZoneDetector
+
+
+def _coarse_bars(rng, length):
+    # Few distinct prices, so bodies hit the range bounds exactly and zones without base occur
+    open_price = rng.choice([10.0, 11.0, 12.0, 13.0], length)
+    close = rng.choice([10.0, 11.0, 12.0, 13.0], length)
+    return pd.DataFrame({
+        'Open': open_price,
+        'High': np.maximum(open_price, close) + rng.choice([0, 0.5, 1, 2], length),
+        'Low': np.minimum(open_price, close) - rng.choice([0, 0.5, 1, 2], length),
+        'Close': close,
+    }, index=pd.date_range('2024-01-01 09:15', periods=length, freq='min'))
+
+
+def _key(zones):
+    return [(i, j, tuple(base.high), tuple(base.low), tuple(pd.DatetimeIndex(base.time))) for i, j, base in zones]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_streamed_zones_match_batch_detection(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(20):
+        data = _coarse_bars(rng, int(rng.integers(3, 300)))
+        params = (int(rng.integers(0, 60)), 100, int(rng.integers(0, 3)), int(rng.integers(1, 5)), 0,
+                  int(rng.integers(20, 70)), int(rng.integers(0, 60)), 100)
+        detector = StreamingZoneDetector(*params)
+
+        # A rolling buffer polled in uneven steps, each poll overlapping the bars already fed
+        fed = 0
+        while fed < len(data):
+            polled = fed + int(rng.integers(1, 10))
+            detector.extend(data.iloc[max(0, fed - 5):polled])
+            fed = polled
+
+        demand_zones, supply_zones = zone_detector.detect_zones(CandleSeries.from_frame(data), *params)
+        assert _key(detector.demand_zones) == _key(demand_zones)
+        assert _key(detector.supply_zones) == _key(supply_zones)
+
+
+def test_update_reports_the_zone_its_bar_completes():
+    detector = StreamingZoneDetector(50, 100, 1, 3, 0, 50, 50, 100)
+    bars = [(10, 12, 9.8, 11.8), (11.8, 12.2, 11.4, 11.9), (11.9, 14.2, 11.8, 14)]
+
+    events = [detector.update(*bar) for bar in bars]
+
+    assert events[:2] == [[], []]
+    assert [(side, zone[:2]) for side, zone in events[2]] == [(zone_detector.DEMAND, (0, 2))]
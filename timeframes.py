@@ -0,0 +1,241 @@
+import numpy as np
+import pandas as pd
+
+import ohlcv_cache
+from market_data import EXCHANGE_TZ, is_intraday, slice_range
+
+# -----------------------------
+# Higher Timeframe Aggregation
+# -----------------------------
+
+# Pandas period frequencies used to bucket bars into higher timeframe candles. Labels follow
+# yfinance: daily bars on the session date, weekly bars on the Monday, monthly and quarterly
+# bars on the first calendar day of the period.
+PERIOD_FREQ = {
+    '1d': 'D',
+    '5d': 'W-SUN',
+    '1wk': 'W-SUN',
+    '1mo': 'M',
+    '3mo': 'Q',
+}
+
+def can_resample(ltf_interval, htf_interval):
+    """
+    True if ``htf_interval`` candles can be built from ``ltf_interval`` bars.
+    """
+    if htf_interval not in PERIOD_FREQ or ltf_interval == htf_interval:
+        return False
+    if is_intraday(ltf_interval):
+        return True
+    order = ['1d', '5d', '1wk', '1mo', '3mo']
+    return ltf_interval in order and order.index(ltf_interval) < order.index(htf_interval)
+
+
+def session_dates(index):
+    """
+    Returns the exchange-local, timezone-naive timestamps of ``index``.
+    """
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    return index
+
+
+def period_start(timestamp, htf_interval):
+    """
+    Returns the label of the higher timeframe candle that contains ``timestamp``.
+    """
+    return pd.Timestamp(timestamp).to_period(PERIOD_FREQ[htf_interval]).start_time
+
+
+def resample_ohlcv(data, htf_interval):
+    """
+    Aggregates lower timeframe bars into ``htf_interval`` candles.
+
+    Open is the first traded open of the period, High/Low the extremes, Close the last
+    close and Volume the sum. Only sessions that actually traded contribute, so exchange
+    holidays never produce empty or forward-filled candles, and a period with no sessions
+    yields no candle at all.
+    """
+    if data.empty:
+        return data
+
+    data = data[data['Close'].notna()]
+    periods = session_dates(data.index).to_period(PERIOD_FREQ[htf_interval])
+
+    aggregations = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last'}
+    if 'Adj Close' in data.columns:
+        aggregations['Adj Close'] = 'last'
+    if 'Volume' in data.columns:
+        aggregations['Volume'] = 'sum'
+
+    grouped = data.groupby(periods.start_time, sort=True).agg(aggregations)
+    grouped.index = pd.DatetimeIndex(grouped.index, name='Date')
+    return grouped[[column for column in data.columns if column in aggregations]]
+
+
+def combined_range(ltf_start, ltf_end, htf_interval, htf_start, htf_end):
+    """
+    Returns the [start, end) range of lower timeframe bars needed to serve both the lower
+    timeframe request and the higher timeframe candles built from it.
+    """
+    # Start on a period boundary so the first higher timeframe candle is complete
+    fetch_start = min(pd.Timestamp(ltf_start), period_start(htf_start, htf_interval))
+    fetch_end = max(pd.Timestamp(ltf_end), pd.Timestamp(htf_end))
+    return fetch_start, fetch_end
+
+
+def split_higher_timeframe(data, ltf_start, ltf_end, htf_interval, htf_start, htf_end):
+    """
+    Splits lower timeframe bars loaded over combined_range() into (htf_data, ltf_data).
+    """
+    local_index = session_dates(data.index)
+    first_period = period_start(htf_start, htf_interval)
+    htf_source = data[(local_index >= first_period) & (local_index < pd.Timestamp(htf_end))]
+    ltf_data = data[(local_index >= pd.Timestamp(ltf_start)) & (local_index < pd.Timestamp(ltf_end))]
+    return resample_ohlcv(htf_source, htf_interval), ltf_data
+
+
+def load_with_higher_timeframe(symbol, ltf_interval, ltf_start, ltf_end, htf_interval, htf_start, htf_end):
+    """
+    Loads the lower timeframe series once and derives the higher timeframe candles from it.
+
+    Returns (htf_data, ltf_data). When the higher timeframe cannot be built from the lower one
+    (for example an intraday HTF), it falls back to a separate download.
+    """
+    if not can_resample(ltf_interval, htf_interval):
+        htf_data = ohlcv_cache.download(symbol, start=htf_start, end=htf_end, interval=htf_interval)
+        ltf_data = ohlcv_cache.download(symbol, start=ltf_start, end=ltf_end, interval=ltf_interval)
+        return htf_data, ltf_data
+
+    fetch_start, fetch_end = combined_range(ltf_start, ltf_end, htf_interval, htf_start, htf_end)
+    data = ohlcv_cache.download(symbol, start=fetch_start, end=fetch_end, interval=ltf_interval)
+    return split_higher_timeframe(data, ltf_start, ltf_end, htf_interval, htf_start, htf_end)
+
+
+def load_higher_timeframe(symbol, htf_interval, start, end, ltf_interval):
+    """
+    Returns ``htf_interval`` candles for [start, end). They are built from the cached
+    ``ltf_interval`` bars when the cache already covers the range, and downloaded directly
+    otherwise, so callers that only need part of the lower timeframe never pull all of it.
+    """
+    cache = ohlcv_cache.get_cache()
+    if can_resample(ltf_interval, htf_interval):
+        fetch_start, fetch_end = combined_range(start, end, htf_interval, start, end)
+        if cache.missing_range(symbol, ltf_interval, fetch_start, fetch_end) is None:
+            data = cache.download(symbol, fetch_start, fetch_end, ltf_interval)
+            return split_higher_timeframe(data, start, end, htf_interval, start, end)[0]
+    return cache.download(symbol, start, end, htf_interval)
+
+
+# -----------------------------
+# Zone Window Loading
+# -----------------------------
+
+def merge_windows(windows):
+    """
+    Sorts [start, end) windows and merges the ones that overlap or touch.
+    """
+    merged = []
+    for start, end in sorted((pd.Timestamp(start), pd.Timestamp(end)) for start, end in windows):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def load_windows(symbol, interval, windows):
+    """
+    Returns the ``interval`` bars of ``symbol`` that fall inside any of the [start, end)
+    ``windows``, fetching only those ranges.
+
+    Overlapping windows are merged first, so no bar is fetched or returned twice. Windows
+    are served from the symbol's cache entry when it already covers them. Any other window
+    gets a cache entry of its own (see window_key): the main entry keeps one contiguous
+    range and would fill in the gaps between windows, which is exactly the data this
+    function avoids, while a repeat scan of the same windows stays on disk.
+    """
+    windows = merge_windows(windows)
+    if not windows:
+        return pd.DataFrame()
+
+    cache = ohlcv_cache.get_cache()
+    start, end = windows[0][0], windows[-1][1]
+    if cache.missing_range(symbol, interval, start, end) is None:
+        data = cache.download(symbol, start, end, interval)
+        parts = [slice_range(data, window_start, window_end) for window_start, window_end in windows]
+    else:
+        # Window entries are fetched as ``interval`` bars, whatever key they are stored under
+        def fetch(symbol, fetch_start, fetch_end, _key):
+            return cache.fetch(symbol, fetch_start, fetch_end, interval)
+
+        parts = []
+        for window_start, window_end in windows:
+            if cache.missing_range(symbol, interval, window_start, window_end) is None:
+                parts.append(cache.download(symbol, window_start, window_end, interval))
+            else:
+                key = window_key(interval, window_start, window_end)
+                parts.append(cache.download(symbol, window_start, window_end, key, fetch=fetch))
+
+    parts = [part for part in parts if not part.empty]
+    if not parts:
+        return pd.DataFrame()
+    return pd.concat(parts)
+
+
+def window_key(interval, start, end):
+    """
+    The cache interval key load_windows() stores the ``interval`` bars of one merged
+    [start, end) window under.
+    """
+    return f"{interval}-window-{pd.Timestamp(start):%Y%m%d%H%M}-{pd.Timestamp(end):%Y%m%d%H%M}"
+
+
+def window_segments(index, windows, inclusive=True):
+    """
+    Returns the bars of ``index`` inside ``windows`` as sorted (start, stop) position ranges
+    into ``index``. Windows are [start, end] like .loc, or [start, end) with inclusive=False.
+
+    Windows that share bars are merged into one segment; windows that do not stay separate
+    segments even when they are adjacent, so a detector run per segment never builds a zone
+    across two windows. Every bar appears in at most one segment.
+    """
+    index = pd.DatetimeIndex(index)
+    ranges = []
+    for start, end in windows:
+        first = index.searchsorted(_align_to(index, start), side='left')
+        stop = index.searchsorted(_align_to(index, end), side='right' if inclusive else 'left')
+        if first < stop:
+            ranges.append((int(first), int(stop)))
+
+    segments = []
+    for first, stop in sorted(ranges):
+        if segments and first < segments[-1][1]:
+            segments[-1] = (segments[-1][0], max(segments[-1][1], stop))
+        else:
+            segments.append((first, stop))
+    return segments
+
+
+def segment_mask(length, segments):
+    """
+    Boolean mask over ``length`` bars that is True inside the (start, stop) ``segments``.
+    """
+    edges = np.zeros(length + 1, dtype=np.int64)
+    for start, stop in segments:
+        edges[start] += 1
+        edges[stop] -= 1
+    return np.cumsum(edges[:-1]) > 0
+
+
+def _align_to(index, timestamp):
+    # Naive window bounds are exchange-local dates, like the higher timeframe labels
+    timestamp = pd.Timestamp(timestamp)
+    if index.tz is not None and timestamp.tzinfo is None:
+        return timestamp.tz_localize(EXCHANGE_TZ).tz_convert(index.tz)
+    if index.tz is None and timestamp.tzinfo is not None:
+        return timestamp.tz_convert(EXCHANGE_TZ).tz_localize(None)
+    return timestamp
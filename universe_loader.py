@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+import fetch_scheduler
+import market_data
+import ohlcv_cache
+
+# -----------------------------
+# Batched Universe Loading
+# -----------------------------
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+DEFAULT_CHUNK_SIZE = 20
+
+# Chunks downloaded concurrently
+DEFAULT_WORKERS = 4
+
+
+class SymbolBars:
+    """
+    Bars of one symbol as plain NumPy arrays. The arrays are views into the block that was
+    downloaded for the whole chunk, so splitting a batch never copies the price data.
+    """
+    def __init__(self, symbol, index, open_price, high, low, close, volume):
+        self.symbol = symbol
+        self.index = index
+        self.open_price = open_price
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def empty(self):
+        return len(self.index) == 0
+
+    def to_frame(self):
+        """
+        Builds a yfinance-shaped DataFrame for code that still works on frames.
+        """
+        return pd.DataFrame({
+            'Open': self.open_price,
+            'High': self.high,
+            'Low': self.low,
+            'Close': self.close,
+            'Volume': self.volume,
+        }, index=self.index)
+
+    @classmethod
+    def from_frame(cls, symbol, data):
+        columns = {field: _column(data, field) for field in FIELDS}
+        return cls(symbol, pd.DatetimeIndex(data.index), columns['Open'], columns['High'],
+                   columns['Low'], columns['Close'], columns['Volume'])
+
+
+def _column(data, field):
+    if field not in data.columns:
+        return np.full(len(data), np.nan)
+    return data[field].to_numpy(dtype=np.float64)
+
+
+# -----------------------------
+# Splitting and Loading
+# -----------------------------
+
+def split_batch(wide, symbols):
+    """
+    Splits a wide multi-ticker frame into one SymbolBars per symbol.
+
+    The frame is converted to a single float64 block once; every symbol's fields are column
+    views into that block. Rows where a symbol did not trade (before listing, after delisting)
+    are trimmed by slicing, so only symbols with gaps in the middle of their history pay for
+    a masked copy.
+    """
+    result = {}
+    if wide.empty:
+        return result
+
+    if not isinstance(wide.columns, pd.MultiIndex):
+        # yfinance returns flat columns when a chunk holds a single symbol
+        wide = pd.concat({symbols[0]: wide}, axis=1)
+
+    block = wide.to_numpy(dtype=np.float64)
+    index = pd.DatetimeIndex(wide.index)
+    positions = {column: k for k, column in enumerate(wide.columns)}
+
+    for symbol in symbols:
+        if (symbol, 'Close') not in positions:
+            continue
+        fields = [
+            block[:, positions[(symbol, field)]] if (symbol, field) in positions else np.full(len(index), np.nan)
+            for field in FIELDS
+        ]
+        traded = ~np.isnan(fields[3])
+        rows = np.flatnonzero(traded)
+        if len(rows) == 0:
+            result[symbol] = SymbolBars(symbol, index[:0], *[field[:0] for field in fields])
+            continue
+
+        first, last = rows[0], rows[-1] + 1
+        if last - first == len(rows):
+            result[symbol] = SymbolBars(symbol, index[first:last], *[field[first:last] for field in fields])
+        else:
+            result[symbol] = SymbolBars(symbol, index[traded], *[field[traded] for field in fields])
+    return result
+
+
+def chunked(symbols, chunk_size):
+    for k in range(0, len(symbols), chunk_size):
+        yield symbols[k:k + chunk_size]
+
+
+def load_universe(symbols, start, end, interval="1d", chunk_size=DEFAULT_CHUNK_SIZE, provider=None, cache=None,
+                  use_cache=True, scheduler=None):
+    """
+    Yields SymbolBars for every symbol in ``symbols``, requesting them ``chunk_size`` at a time.
+    Pass market_data.FrameProvider(frames) as ``provider`` to exercise chunking offline.
+
+    With the cache enabled, symbols whose bars are already on disk are served locally and only
+    the rest of each chunk is downloaded, over the smallest span that covers what they miss.
+    Symbols that return no bars in the range are yielded as empty SymbolBars so callers can
+    report them; with the cache enabled, a symbol the provider leaves out of its response
+    altogether is a fetch failure and ends up in scheduler.failures.
+
+    Chunks are fetched concurrently through ``scheduler`` (a FetchScheduler) and yielded as
+    each one lands, so bars do not come back in ``symbols`` order. The symbols of a chunk that
+    still fails after retries are retried one by one, and only the symbols that fail on their
+    own are skipped and left in scheduler.failures.
+    """
+    provider = provider or market_data.get_provider()
+    scheduler = scheduler or fetch_scheduler.FetchScheduler(max_workers=DEFAULT_WORKERS)
+    if use_cache:
+        cache = cache or ohlcv_cache.get_cache()
+        start, end = cache.request_range(start, end)
+    else:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+
+    def load_chunk(chunk):
+        if use_cache:
+            return _load_cached_chunk(list(chunk), start, end, interval, provider, cache)
+        bars = split_batch(provider.fetch_bars_batch(list(chunk), interval, start, end), list(chunk))
+        return [bars[symbol] if symbol in bars else SymbolBars.from_frame(symbol, pd.DataFrame()) for symbol in chunk]
+
+    chunks = [tuple(chunk) for chunk in chunked(list(symbols), chunk_size)]
+    for chunk, chunk_bars in scheduler.run(chunks, load_chunk):
+        for bars in chunk_bars:
+            yield bars
+
+    # One bad ticker should not cost the rest of its chunk
+    singles = []
+    for chunk in chunks:
+        if len(chunk) > 1 and chunk in scheduler.failures:
+            del scheduler.failures[chunk]
+            singles.extend((symbol,) for symbol in chunk)
+    for chunk, chunk_bars in scheduler.run(singles, load_chunk):
+        for bars in chunk_bars:
+            yield bars
+
+
+def _load_cached_chunk(chunk, start, end, interval, provider, cache):
+    missing = {}
+    for symbol in chunk:
+        span = cache.missing_range(symbol, interval, start, end)
+        if span is not None:
+            missing[symbol] = span
+
+    batch = {}
+    if missing:
+        fetch_start = min(span[0] for span in missing.values())
+        fetch_end = max(span[1] for span in missing.values())
+        batch = split_batch(provider.fetch_bars_batch(list(missing), interval, fetch_start, fetch_end), list(missing))
+
+    chunk_bars = []
+    for symbol in chunk:
+        fetched = batch.get(symbol)
+
+        def from_batch(symbol, fetch_start, fetch_end, interval, fetched=fetched):
+            if fetched is None:
+                # Not an empty result to cache: the symbol goes to the single-symbol retry and,
+                # failing that, into the scheduler's failure report
+                raise KeyError(f"{symbol} is missing from the batch response")
+            return market_data.slice_range(fetched.to_frame(), fetch_start, fetch_end)
+
+        data = cache.download(symbol, start, end, interval, fetch=from_batch)
+        chunk_bars.append(SymbolBars.from_frame(symbol, data))
+    return chunk_bars
@@ -0,0 +1,174 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+import ohlcv_store
+import universe_loader
+
+# -----------------------------
+# Process-Pool Universe Scanning
+# -----------------------------
+
+# Detection and outcome evaluation are CPU-bound, so one scan process per core
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+# How long a cancellable run waits for a scan before checking its cancel event again
+CANCEL_POLL_SECONDS = 0.2
+
+# Interval name under which a run's shared job arguments are written to its store
+SHARED_INTERVAL = 'scan'
+
+
+class UniverseScanner:
+    """
+    Runs a per-symbol scan function on a pool of processes and hands results back in
+    completion order.
+
+    ``scan_symbol`` is called as scan_symbol(symbol, *args) in a worker process, so it must be
+    a module-level function and its arguments must pickle (frames, arrays, tuples). Jobs are
+    submitted as soon as the job iterable produces them, so symbols are scanned while the
+    rest of the universe is still downloading. A symbol whose scan raises never stops the run:
+    the error is collected in ``failures`` (symbol -> exception).
+
+    Bar arguments (DataFrames and universe_loader.SymbolBars) are not pickled to the workers:
+    each run writes them to a temporary OHLCVStore and the worker maps them back from it, so
+    the bars travel through the shared page cache. Only their OHLCV columns are kept.
+    With share_bars=False every argument is pickled as it is.
+
+    With max_workers=1 the scan runs in this process, which is easier to debug.
+    """
+    def __init__(self, max_workers=DEFAULT_WORKERS, share_bars=True):
+        self.max_workers = max_workers
+        self.share_bars = share_bars
+        self.failures = {}
+
+    def run(self, jobs, scan_symbol, cancel=None):
+        """
+        Scans every (symbol, args) pair of ``jobs`` and yields (symbol, result) as each scan
+        finishes. Pass the results through ordered() for output that does not depend on timing.
+
+        ``cancel`` is an optional threading.Event. Once it is set no further job is taken,
+        scans that have not started are dropped and the run ends without their results.
+        """
+        cancelled = cancel.is_set if cancel is not None else (lambda: False)
+        if self.max_workers <= 1:
+            for symbol, args in jobs:
+                if cancelled():
+                    return
+                try:
+                    result = scan_symbol(symbol, *args)
+                except Exception as error:
+                    self.failures[symbol] = error
+                    continue
+                yield symbol, result
+            return
+
+        shared = SharedBars() if self.share_bars else None
+        try:
+            yield from self._run_pool(jobs, scan_symbol, cancel, cancelled, shared)
+        finally:
+            if shared is not None:
+                shared.close()
+
+    def _run_pool(self, jobs, scan_symbol, cancel, cancelled, shared):
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {}
+            for symbol, args in jobs:
+                if cancelled():
+                    break
+                if shared is not None:
+                    future = executor.submit(_scan_shared, scan_symbol, symbol, *shared.share(symbol, args))
+                else:
+                    future = executor.submit(scan_symbol, symbol, *args)
+                pending[future] = symbol
+                # Hand back whatever finished while this job was being prepared
+                yield from self._collect(pending, timeout=0)
+            timeout = None if cancel is None else CANCEL_POLL_SECONDS
+            while pending and not cancelled():
+                yield from self._collect(pending, timeout=timeout)
+            if cancelled():
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _collect(self, pending, timeout):
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            symbol = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as error:
+                self.failures[symbol] = error
+                continue
+            yield symbol, result
+
+    def failure_report(self):
+        if not self.failures:
+            return "All symbols scanned successfully."
+        lines = [f"{len(self.failures)} scan(s) failed:"]
+        for symbol, error in self.failures.items():
+            lines.append(f"{symbol}: {type(error).__name__}: {error}")
+        return "\n".join(lines)
+
+
+class StoredArgument:
+    """
+    A bar argument of a scan job, passed to the worker as a reference to its copy in an
+    OHLCVStore. load() maps it back as the type it was given as.
+    """
+    def __init__(self, root, key, kind):
+        self.root = root
+        self.key = key
+        self.kind = kind
+
+    def load(self):
+        stored = ohlcv_store.OHLCVStore(self.root).open(self.key, SHARED_INTERVAL)
+        if self.kind == 'bars':
+            # The arrays stay memory-mapped
+            return universe_loader.SymbolBars(stored.symbol, stored.index(), stored.open_price, stored.high,
+                                              stored.low, stored.close, stored.volume)
+        return stored.to_frame()
+
+
+class SharedBars:
+    """
+    The temporary store one scanner run shares its bar arguments through; close() removes it.
+    """
+    def __init__(self):
+        os.makedirs(ohlcv_store.STORE_DIR, exist_ok=True)
+        self.root = tempfile.mkdtemp(prefix='scan-', dir=ohlcv_store.STORE_DIR)
+        self.store = ohlcv_store.OHLCVStore(self.root)
+
+    def share(self, symbol, args):
+        shared = []
+        for position, arg in enumerate(args):
+            if isinstance(arg, pd.DataFrame):
+                kind, frame = 'frame', arg
+            elif isinstance(arg, universe_loader.SymbolBars):
+                kind, frame = 'bars', arg.to_frame()
+            else:
+                shared.append(arg)
+                continue
+            key = f"{symbol}-{position}"
+            self.store.write(key, SHARED_INTERVAL, frame)
+            shared.append(StoredArgument(self.root, key, kind))
+        return shared
+
+    def close(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def _scan_shared(scan_symbol, symbol, *args):
+    # Runs in the worker process: maps the shared bar arguments back before scanning
+    args = [arg.load() if isinstance(arg, StoredArgument) else arg for arg in args]
+    return scan_symbol(symbol, *args)
+
+
+def ordered(results, symbols):
+    """
+    Puts (symbol, result) pairs back in the order of ``symbols``, so CSVs and frames built
+    from a scan are the same however the workers finished. Unknown symbols go last, by name.
+    """
+    position = {symbol: k for k, symbol in reversed(list(enumerate(symbols)))}
+    return sorted(results, key=lambda item: (position.get(item[0], len(position)), str(item[0])))
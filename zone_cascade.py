@@ -0,0 +1,179 @@
+import json
+
+import pandas as pd
+
+import ohlcv_cache
+import timeframes
+import zone_detector
+import zone_mapping
+import zone_refresh
+import zone_store
+from candles import CandleSeries
+
+# -----------------------------
+# N-Level Timeframe Cascade
+# -----------------------------
+
+# (interval, detection parameters) from the coarsest level to the finest. Parameters are
+# the GUIs' eight values: leg-in body % range, base count range, base body % range and
+# leg-out body % range.
+DEFAULT_PARAMS = (50, 100, 1, 5, 0, 50, 50, 100)
+DEFAULT_LEVELS = [
+    ('1mo', DEFAULT_PARAMS),
+    ('1wk', DEFAULT_PARAMS),
+    ('1d', DEFAULT_PARAMS),
+    ('1h', DEFAULT_PARAMS),
+]
+
+
+def zone_window(index, zone):
+    """
+    The [start, end) time window a zone hands to the next level: its base candles, from the
+    first base bar up to the leg-out bar. Empty for a zone without base candles.
+    """
+    i, j = zone[0], zone[1]
+    return index[i + 1], index[j]
+
+
+def cascade_zones(symbol, levels, start, end, download=ohlcv_cache.download, load_windows=timeframes.load_windows,
+                  earliest_start=None):
+    """
+    Detects demand zones of ``symbol`` level by level, each level searching only inside the
+    base windows of the zones that survived the level above.
+
+    The first level loads [start, end) in full. Every finer level loads only the bars of the
+    surviving windows (load_windows fetches just those ranges), runs the detector on each
+    window separately and keeps the zones that lie inside a parent zone. A level without
+    zones ends the cascade, so the finest intervals are only fetched where every coarser
+    level agrees.
+
+    Every level starts no earlier than ``earliest_start(interval)``, by default the cache
+    provider's lookback: Yahoo only serves 1h bars for the last 730 days, so a 1h level of a
+    longer scan only searches the windows inside that span.
+
+    Returns a list of levels, each a list of zone dicts with the interval, leg-in/leg-out
+    times, zone bounds from the base, the position of the parent zone in the previous level
+    and the ancestry chain [(interval, leg-in time), ...] from the first level down to the
+    parent.
+    """
+    earliest_start = earliest_start or ohlcv_cache.get_cache().provider.earliest_start
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    results = []
+    parents = None
+    for level, (interval, params) in enumerate(levels):
+        level_start = max(start, earliest_start(interval) or start)
+        if level_start >= end:
+            break
+        if parents is None:
+            data = download(symbol, start=level_start, end=end, interval=interval)
+            windows = None
+        else:
+            windows = [window for window in (zone['window'] for zone in parents) if window[0] < window[1]]
+            windows = _clip(windows, level_start, end)
+            if not windows:
+                break
+            data = load_windows(symbol, interval, windows)
+        if data.empty:
+            break
+
+        candles = CandleSeries.from_frame(data)
+        index = pd.DatetimeIndex(data.index)
+        if windows is None:
+            demand_zones = zone_detector.detect_demand_zones(candles, *params)
+            positions = [None] * len(demand_zones)
+        else:
+            segments = timeframes.window_segments(index, windows, inclusive=False)
+            demand_zones = zone_detector.detect_demand_zones_in_segments(candles, segments, *params)
+            positions = level_parents(index, demand_zones, parents)
+
+        zones = []
+        for zone, parent in zip(demand_zones, positions):
+            if parent is not None and parent == zone_mapping.NO_PARENT:
+                continue
+            ancestry = []
+            if parent is not None:
+                ancestor = parents[parent]
+                ancestry = ancestor['ancestry'] + [(ancestor['interval'], ancestor['legin_time'])]
+            zones.append({
+                'level': level,
+                'interval': interval,
+                'legin_time': index[zone[0]],
+                'legout_time': index[zone[1]],
+                'zone_high': float(zone[2].high.max()),
+                'zone_low': float(zone[2].low.min()),
+                'parent': None if parent is None else int(parent),
+                'ancestry': ancestry,
+                'window': zone_window(index, zone),
+            })
+        results.append(zones)
+        if not zones:
+            break
+        parents = zones
+    return results
+
+
+def level_parents(index, zones, parents):
+    """
+    The position in ``parents`` (zone dicts of the level above) of the zone containing each
+    (i, j, ...) zone over ``index``, or zone_mapping.NO_PARENT.
+
+    Intraday bars carry a timezone while daily and coarser labels are naive session dates,
+    so both sides are compared as exchange-local, timezone-naive times.
+    """
+    local = timeframes.session_dates(index)
+    return zone_mapping.containing_parents(
+        local[[zone[0] for zone in zones]], local[[zone[1] for zone in zones]],
+        timeframes.session_dates([parent['legin_time'] for parent in parents]),
+        timeframes.session_dates([parent['legout_time'] for parent in parents]))
+
+
+def cascade_records(symbol, levels, results):
+    """
+    Zone store records of every level of cascade_zones(). The immediate parent fills the
+    higher timeframe columns and the whole chain goes to ``ancestry`` as JSON. A level's
+    parameter hash covers the parameters of every level down to it, since they all decided
+    which of its zones exist.
+    """
+    records = []
+    for level, zones in enumerate(results):
+        interval = levels[level][0]
+        rows = []
+        for zone in zones:
+            parent = results[level - 1][zone['parent']] if zone['parent'] is not None else None
+            rows.append({
+                "Symbol": symbol,
+                "Leg-In Time": zone['legin_time'],
+                "Leg-Out Time": zone['legout_time'],
+                "Zone High": zone['zone_high'],
+                "Zone Low": zone['zone_low'],
+                "Status": zone_refresh.OPEN_STATUS,
+                "Higher Timeframe Leg-In Time": parent['legin_time'] if parent else "N/A",
+                "Higher Timeframe Leg-Out Time": parent['legout_time'] if parent else "N/A",
+                "Higher Timeframe Zone High": parent['zone_high'] if parent else "N/A",
+                "Higher Timeframe Zone Low": parent['zone_low'] if parent else "N/A",
+                "Ancestry": json.dumps([[ancestor_interval, pd.Timestamp(time).isoformat()]
+                                        for ancestor_interval, time in zone['ancestry']]),
+            })
+        records.extend(zone_store.zone_records(rows, interval, [params for _, params in levels[:level + 1]]))
+    return records
+
+
+def scan_symbol(symbol, levels, start, end):
+    """
+    Runs the cascade for one symbol and returns its zone store records; a universe scan job.
+    """
+    return cascade_records(symbol, levels, cascade_zones(symbol, levels, start, end))
+
+
+def _clip(windows, start, end):
+    clipped = []
+    for window_start, window_end in windows:
+        window_start, window_end = max(_naive(window_start), start), min(_naive(window_end), end)
+        if window_start < window_end:
+            clipped.append((window_start, window_end))
+    return clipped
+
+
+def _naive(timestamp):
+    # Window bounds of intraday levels carry a timezone; the scan range is exchange-local
+    return timeframes.session_dates([timestamp])[0]
@@ -0,0 +1,206 @@
+import numpy as np
+
+# -----------------------------
+# Vectorized Rally-Base-Rally Detection
+# -----------------------------
+
+def base_run_lengths(base):
+    """
+    For every position, the number of consecutive base candles starting there (0 for a
+    candle that is not a base candle). One extra 0 is appended for the position after the end.
+    """
+    n = len(base)
+    stops = np.append(np.flatnonzero(~base), n)
+    positions = np.arange(n + 1)
+    return stops[np.searchsorted(stops, positions)] - positions
+
+
+def visited_legins(legin, base, run_lengths, max_base):
+    """
+    Returns the leg-in positions that the legacy detect_demand_zones loop actually visits.
+
+    The loop jumps from a leg-in over the base run that follows it, and only ever jumps over
+    base candles, so every leg-in that is not itself a base candle is visited. A candle that
+    is both a leg-in and a base candle may be jumped over; those are resolved by replaying
+    the loop inside their own base run, touching only the ambiguous candles of that run.
+    """
+    visited = legin & ~base
+    ambiguous = np.flatnonzero(legin & base)
+    if len(ambiguous) == 0:
+        return visited
+
+    non_base = np.flatnonzero(~base)
+    k = 0
+    while k < len(ambiguous):
+        # The base run [start, end) that holds the next ambiguous candle
+        before = np.searchsorted(non_base, ambiguous[k]) - 1
+        start = non_base[before] + 1 if before >= 0 else 0
+        end = start + run_lengths[start]
+
+        # Enter the run the way the loop does: over the jump of a preceding leg-in, or one step at a time
+        if start > 0 and legin[start - 1]:
+            position = start + min(end - start, max_base)
+        else:
+            position = start
+        while k < len(ambiguous) and ambiguous[k] < end:
+            if ambiguous[k] >= position:
+                position = ambiguous[k]
+                visited[position] = True
+                position += 1 + min(end - (position + 1), max_base)
+            k += 1
+    return visited
+
+
+DEMAND = 1
+SUPPLY = -1
+
+
+def find_zones(candles, legin, base, legout, min_base, max_base):
+    """
+    Finds rally-base-rally demand zones and drop-base-drop supply zones in one pass.
+
+    ``legin``, ``base`` and ``legout`` mark the candles that pass each body test. A candidate
+    is a leg-in followed by up to ``max_base`` base candles (at least ``min_base``) and a
+    leg-out. After every leg-in the scan resumes at the candle following its base run,
+    exactly like the legacy detect_demand_zones loop, so both sides share one scan.
+
+    A candidate is a demand zone when its leg-out is bullish and closes above the leg-in high
+    and the highest base high, and a supply zone when its leg-out is bearish and closes below
+    the leg-in low and the lowest base low. With no base candles the base high counts as
+    -inf and the base low as +inf.
+
+    Returns the (legin_index, legout_index, side) arrays of the zones, in order, where side is
+    DEMAND or SUPPLY.
+    """
+    legout = np.asarray(legout, dtype=bool)
+    starts, ends, base_counts = zone_candidates(candles, legin, base, max_base)
+    keep = (base_counts >= min_base) & legout[ends]
+    starts, ends, base_counts = starts[keep], ends[keep], base_counts[keep]
+    sides, _, _ = classify_candidates(candles, starts, ends, base_counts)
+    keep = sides != 0
+    return starts[keep], ends[keep], sides[keep]
+
+
+def zone_candidates(candles, legin, base, max_base, run_lengths=None):
+    """
+    The leg-in/base half of find_zones(), before any leg-out test: returns the
+    (legin_index, legout_index, base_count) arrays for every leg-in the scan visits whose
+    leg-out candle exists. ``run_lengths`` may be passed in when base_run_lengths(base) is
+    already known.
+    """
+    n = len(candles)
+    if n < 3:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty
+
+    legin = np.asarray(legin, dtype=bool)
+    base = np.asarray(base, dtype=bool)
+    if run_lengths is None:
+        run_lengths = base_run_lengths(base)
+
+    starts = np.flatnonzero(visited_legins(legin, base, run_lengths, max_base)[:n - 2])
+    base_counts = np.minimum(run_lengths[starts + 1], max_base)
+    ends = starts + 1 + base_counts
+    keep = ends < n
+    return starts[keep], ends[keep], base_counts[keep]
+
+
+def classify_candidates(candles, starts, ends, base_counts):
+    """
+    Applies the direction-specific leg-out rules of find_zones() to candidates (the leg-out
+    body test is left to the caller). Returns (sides, base_high, base_low): side is DEMAND,
+    SUPPLY or 0, and the base extremes are -inf / +inf for a candidate without base candles.
+    """
+    n = len(candles)
+    close = candles.close[ends]
+    demand = (candles.direction[ends] > 0) & (close > candles.high[starts])
+    supply = (candles.direction[ends] < 0) & (close < candles.low[starts])
+    base_high = np.full(len(starts), -np.inf)
+    base_low = np.full(len(starts), np.inf)
+
+    # Base extremes of the remaining candidates, gathered over a (zones x longest base) window
+    rows = np.flatnonzero((demand | supply) & (base_counts > 0))
+    if len(rows):
+        offsets = np.arange(int(base_counts[rows].max()))
+        window = np.minimum(starts[rows, None] + 1 + offsets, n - 1)
+        in_base = offsets < base_counts[rows, None]
+        base_high[rows] = np.where(in_base, candles.high[window], -np.inf).max(axis=1)
+        base_low[rows] = np.where(in_base, candles.low[window], np.inf).min(axis=1)
+
+    demand &= close > base_high
+    supply &= close < base_low
+    sides = np.where(demand, DEMAND, np.where(supply, SUPPLY, 0)).astype(np.int8)
+    return sides, base_high, base_low
+
+
+def find_rally_base_rally(candles, legin, base, legout, min_base, max_base):
+    """
+    The demand side of find_zones(): returns the (legin_index, legout_index) arrays of the
+    rally-base-rally zones, in order.
+    """
+    starts, ends, sides = find_zones(candles, legin, base, legout, min_base, max_base)
+    demand = sides == DEMAND
+    return starts[demand], ends[demand]
+
+
+def rally_base_rally_zones(candles, legin, base, legout, min_base, max_base):
+    """
+    Same as find_rally_base_rally(), returned as (i, j, base_candles) tuples where
+    base_candles is a CandleSeries view of the base.
+    """
+    starts, ends = find_rally_base_rally(candles, legin, base, legout, min_base, max_base)
+    return [(int(i), int(j), candles[i + 1:j]) for i, j in zip(starts, ends)]
+
+
+def detect_demand_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+                        min_legout_pct, max_legout_pct):
+    """
+    Vectorized equivalent of the GUIs' detect_demand_zones: every body test is an inclusive
+    range on the body percentage.
+    """
+    body_pct = candles.body_pct
+    legin = (min_legin_pct <= body_pct) & (body_pct <= max_legin_pct)
+    base = (min_base_pct <= body_pct) & (body_pct <= max_base_pct)
+    legout = (min_legout_pct <= body_pct) & (body_pct <= max_legout_pct)
+    return rally_base_rally_zones(candles, legin, base, legout, min_base, max_base)
+
+
+def detect_demand_zones_in_segments(candles, segments, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct,
+                                    max_base_pct, min_legout_pct, max_legout_pct):
+    """
+    detect_demand_zones() run separately on every (start, stop) position range of ``candles``
+    (see timeframes.window_segments), so no zone spans two segments. The returned zone
+    positions index ``candles`` itself.
+    """
+    zones = []
+    for start, stop in segments:
+        for i, j, base_candles in detect_demand_zones(candles[start:stop], min_legin_pct, max_legin_pct, min_base,
+                                                      max_base, min_base_pct, max_base_pct, min_legout_pct,
+                                                      max_legout_pct):
+            zones.append((i + start, j + start, base_candles))
+    return zones
+
+
+def detect_zones(candles, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+                 min_legout_pct, max_legout_pct):
+    """
+    Like detect_demand_zones(), but classifies the candles once and returns both sides as
+    (demand_zones, supply_zones) lists of (i, j, base_candles) tuples.
+    """
+    body_pct = candles.body_pct
+    legin = (min_legin_pct <= body_pct) & (body_pct <= max_legin_pct)
+    base = (min_base_pct <= body_pct) & (body_pct <= max_base_pct)
+    legout = (min_legout_pct <= body_pct) & (body_pct <= max_legout_pct)
+    return split_zones(candles, *find_zones(candles, legin, base, legout, min_base, max_base))
+
+
+def split_zones(candles, starts, ends, sides):
+    """
+    Turns find_zones() arrays into (demand_zones, supply_zones) lists of (i, j, base_candles) tuples.
+    """
+    demand_zones = []
+    supply_zones = []
+    for i, j, side in zip(starts, ends, sides):
+        zones = demand_zones if side == DEMAND else supply_zones
+        zones.append((int(i), int(j), candles[i + 1:j]))
+    return demand_zones, supply_zones
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+
+# -----------------------------
+# Sorted-Interval Zone Mapping
+# -----------------------------
+
+NO_PARENT = -1
+
+
+def containing_parents(child_starts, child_ends, parent_starts, parent_ends, child_groups=None, parent_groups=None):
+    """
+    For every child interval, the position of the first parent interval that contains it
+    (parent_start <= child_start and child_end <= parent_end), or NO_PARENT.
+
+    Parents must be in order of start within each group, as the detectors return them. The
+    parents starting at or before a child's start are then a prefix of that order, and the
+    first of them reaching its end is found by binary search over the running maximum of
+    the parent ends: O((children + parents) log parents) instead of children x parents.
+
+    ``child_groups`` / ``parent_groups`` (for example the symbol of each zone) restrict
+    children to parents of the same group, so one call maps a whole universe. Bounds may be
+    bar positions or timestamps.
+    """
+    child_starts, child_ends, parent_starts, parent_ends = (
+        _as_int64(values) for values in (child_starts, child_ends, parent_starts, parent_ends))
+    result = np.full(len(child_starts), NO_PARENT, dtype=np.intp)
+    if len(child_starts) == 0 or len(parent_starts) == 0:
+        return result
+
+    order = np.arange(len(parent_starts))
+    if child_groups is not None or parent_groups is not None:
+        # Key every bound by its group: ranks of all bounds, offset by group, keep groups apart
+        codes, _ = pd.factorize(np.concatenate([np.asarray(parent_groups, dtype=object),
+                                                np.asarray(child_groups, dtype=object)]))
+        parent_codes, child_codes = codes[:len(parent_starts)], codes[len(parent_starts):]
+        bounds = np.concatenate([parent_starts, parent_ends, child_starts, child_ends])
+        _, ranks = np.unique(bounds, return_inverse=True)
+        ranks = np.split(ranks, np.cumsum([len(parent_starts), len(parent_ends), len(child_starts)]))
+        width = len(bounds) + 1
+        parent_starts = parent_codes * width + ranks[0]
+        parent_ends = parent_codes * width + ranks[1]
+        child_starts = child_codes * width + ranks[2]
+        child_ends = child_codes * width + ranks[3]
+        order = np.argsort(parent_starts, kind='stable')
+        parent_starts, parent_ends = parent_starts[order], parent_ends[order]
+
+    # Parents [0, prefix) start at or before the child; the first of all parents reaching
+    # the child's end is where the running maximum of the ends first reaches it
+    prefix = np.searchsorted(parent_starts, child_starts, side='right')
+    first = np.searchsorted(np.maximum.accumulate(parent_ends), child_ends, side='left')
+    found = first < prefix
+    result[found] = order[first[found]]
+    return result
+
+
+def parent_zones(zones, index, parents, parent_index):
+    """
+    The first zone of ``parents`` containing each (i, j, ...) zone of ``zones``, or
+    None, where i and j index ``index`` and the parents' bars index ``parent_index``. A zone
+    spans the times of its leg-in and leg-out bars.
+    """
+    if not zones:
+        return []
+    index = pd.DatetimeIndex(index)
+    parent_index = pd.DatetimeIndex(parent_index)
+    positions = containing_parents(index[[zone[0] for zone in zones]], index[[zone[1] for zone in zones]],
+                                   parent_index[[zone[0] for zone in parents]],
+                                   parent_index[[zone[1] for zone in parents]])
+    return [parents[k] if k != NO_PARENT else None for k in positions]
+
+
+def _as_int64(values):
+    # Timestamps (with or without a timezone) compare as nanoseconds, bar positions as they are.
+    # Indexes may hold any datetime unit, so they are converted rather than read as asi8
+    values = pd.Index(values) if not isinstance(values, np.ndarray) else values
+    if isinstance(values, pd.DatetimeIndex):
+        return values.values.astype('datetime64[ns]').view(np.int64)
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]').view(np.int64)
+    return values.astype(np.int64)
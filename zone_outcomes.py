@@ -0,0 +1,104 @@
+import numpy as np
+
+# -----------------------------
+# Batch Zone Outcome Evaluation
+# -----------------------------
+
+FRESH = 0
+TESTED = 1
+TARGET = 2
+
+STATUS_LABELS = {FRESH: 'Fresh', TESTED: 'Tested', TARGET: 'Target Achieved'}
+STATUS_COLORS = {FRESH: 'green', TESTED: 'blue', TARGET: 'pink'}
+
+
+def evaluate_zones(candles, zone_highs, zone_lows, starts):
+    """
+    Resolves the outcome of many zones over one CandleSeries at once.
+
+    For each zone the search starts at ``starts``. It finds the first bar that trades into
+    [zone_low, zone_high], then from that bar on the first bar that either reaches the 1:2
+    target (zone_high + 2 * height) or trades below zone_low. The target wins when both
+    happen on the same bar. Returns an array of FRESH / TESTED / TARGET, matching the
+    check_zone_tested_and_target loops.
+
+    Every search is a lookup in the series' cached range index, so no zone scans bars.
+    """
+    return advance_zones(candles, zone_highs, zone_lows, starts)[0]
+
+
+def evaluate_supply_zones(candles, zone_highs, zone_lows, starts):
+    """
+    The supply-side mirror of evaluate_zones(): after the first touch of [zone_low, zone_high]
+    a zone reaches its target at zone_low - 2 * height and is broken by a bar trading above
+    zone_high. The target wins when both happen on the same bar.
+    """
+    return advance_zones(candles, zone_highs, zone_lows, starts, supply=True)[0]
+
+
+def advance_zones(candles, zone_highs, zone_lows, starts, touched=None, supply=False):
+    """
+    evaluate_zones(), or evaluate_supply_zones() with supply=True, that also returns the bar
+    of each zone's first touch (len(candles) when it was not touched).
+
+    ``touched`` marks zones that were already touched before ``starts`` without reaching the
+    target or breaking: their search for either starts right at ``starts``. A FRESH zone can
+    so be carried forward over only the bars that arrived since it was last evaluated, with
+    the same outcome as evaluating it over the whole history.
+    """
+    n = len(candles)
+    zone_highs = np.asarray(zone_highs, dtype=np.float64)
+    zone_lows = np.asarray(zone_lows, dtype=np.float64)
+    heights = zone_highs - zone_lows
+    targets = zone_lows - 2 * heights if supply else zone_highs + 2 * heights
+    outcomes = np.full(len(zone_highs), FRESH, dtype=np.int8)
+    if n == 0 or len(zone_highs) == 0:
+        return outcomes, np.full(len(zone_highs), n, dtype=np.intp)
+
+    index = candles.range_index
+    touch = index.first_overlap(starts, zone_lows, zone_highs)
+    if touched is not None:
+        starts = np.broadcast_to(np.asarray(starts, dtype=np.intp), touch.shape)
+        touch = np.where(np.asarray(touched, dtype=bool), np.minimum(starts, n), touch)
+    zones = np.flatnonzero(touch < n)
+
+    if supply:
+        target_bar = index.first_low_at_or_below(touch[zones], targets[zones])
+        broken_bar = index.first_high_above(touch[zones], zone_highs[zones])
+    else:
+        target_bar = index.first_high_at_or_above(touch[zones], targets[zones])
+        broken_bar = index.first_low_below(touch[zones], zone_lows[zones])
+    exits = np.minimum(target_bar, broken_bar)
+    resolved = exits < n
+    outcomes[zones[resolved]] = np.where(target_bar[resolved] == exits[resolved], TARGET, TESTED)
+    return outcomes, touch
+
+
+def zone_statuses(demand_zones, candles, labels=STATUS_LABELS, starts=None):
+    """
+    Evaluates (i, j, base_candles) demand zones against ``candles`` and returns one label per
+    zone. Zone bounds are the highest high and lowest low of the base; by default each search
+    starts on the candle after the leg-out.
+    """
+    if not demand_zones:
+        return []
+    zone_highs = [zone[2].high.max() for zone in demand_zones]
+    zone_lows = [zone[2].low.min() for zone in demand_zones]
+    if starts is None:
+        starts = [zone[1] + 1 for zone in demand_zones]
+    outcomes = evaluate_zones(candles, zone_highs, zone_lows, starts)
+    return [labels[outcome] for outcome in outcomes]
+
+
+def supply_zone_statuses(supply_zones, candles, labels=STATUS_LABELS, starts=None):
+    """
+    zone_statuses() for (i, j, base_candles) supply zones.
+    """
+    if not supply_zones:
+        return []
+    zone_highs = [zone[2].high.max() for zone in supply_zones]
+    zone_lows = [zone[2].low.min() for zone in supply_zones]
+    if starts is None:
+        starts = [zone[1] + 1 for zone in supply_zones]
+    outcomes = evaluate_supply_zones(candles, zone_highs, zone_lows, starts)
+    return [labels[outcome] for outcome in outcomes]
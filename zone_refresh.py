@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+import ohlcv_cache
+import timeframes
+import zone_outcomes
+import zone_store
+from candles import CandleSeries
+from market_data import empty_bars, is_intraday
+
+# -----------------------------
+# Incremental Zone Status Refresh
+# -----------------------------
+
+# Tested and Target Achieved are final; only Fresh zones can still change
+OPEN_STATUS = zone_outcomes.STATUS_LABELS[zone_outcomes.FRESH]
+
+# Daily bars pick the sessions an intraday zone has to be advanced over
+SESSION_INTERVAL = '1d'
+
+
+def refresh_zones(store, symbols=None, timeframe=None, end=None, download=ohlcv_cache.download,
+                  load_windows=timeframes.load_windows):
+    """
+    Advances every Fresh zone in ``store`` over the bars it has not been evaluated on yet and
+    writes back its status, first touch and last evaluated bar. Tested and Target Achieved
+    zones are never loaded.
+
+    A zone continues after its ``evaluated_until`` bar, or after its leg-out when it was never
+    refreshed, so a daily update only reads the bars since the last run. Bars are loaded once
+    per (symbol, timeframe), from the earliest bar any of its open zones still needs. Intraday
+    zones only load the sessions active_sessions() picks, through ``load_windows``.
+
+    Returns {label: count} of the new statuses of the zones that were advanced.
+    """
+    zones = store.zones(symbol=symbols, timeframe=timeframe, status=OPEN_STATUS)
+    groups = {}
+    for zone in zones:
+        groups.setdefault((zone['symbol'], zone['timeframe']), []).append(zone)
+
+    counts = dict.fromkeys(zone_outcomes.STATUS_LABELS.values(), 0)
+    for (symbol, zone_timeframe), group in groups.items():
+        for status in advance_group(symbol, zone_timeframe, group, end, download, load_windows):
+            counts[status] += 1
+        store.update_progress(group)
+    return counts
+
+
+def advance_group(symbol, timeframe, zones, end=None, download=ohlcv_cache.download,
+                  load_windows=timeframes.load_windows):
+    """
+    Advances the open zones of one symbol and timeframe in place (status, touched_at,
+    evaluated_until) and returns their new status labels.
+    """
+    resume_times = [pd.Timestamp(zone['evaluated_until'] or zone['legout_time']) for zone in zones]
+    fetch_start = min(_naive(time) for time in resume_times).normalize()
+    if is_intraday(timeframe) and load_windows is not None:
+        sessions = download(symbol, start=fetch_start, end=end, interval=SESSION_INTERVAL)
+        windows = active_sessions(zones, resume_times, sessions, end)
+        data = load_windows(symbol, timeframe, windows) if windows else empty_bars()
+    else:
+        data = download(symbol, start=fetch_start, end=end, interval=timeframe)
+    if data.empty:
+        return [zone['status'] for zone in zones]
+
+    candles = CandleSeries.from_frame(data)
+    index = pd.DatetimeIndex(data.index)
+    starts = np.array([index.searchsorted(_align(time, index), side='right') for time in resume_times], dtype=np.intp)
+    highs = np.array([zone['zone_high'] for zone in zones], dtype=np.float64)
+    lows = np.array([zone['zone_low'] for zone in zones], dtype=np.float64)
+    touched = np.array([zone['touched_at'] is not None for zone in zones], dtype=bool)
+    supply = np.array([zone['side'] == 'supply' for zone in zones], dtype=bool)
+
+    outcomes = np.full(len(zones), zone_outcomes.FRESH, dtype=np.int8)
+    touch = np.full(len(zones), len(candles), dtype=np.intp)
+    for side in (False, True):
+        rows = np.flatnonzero(supply == side)
+        if len(rows):
+            outcomes[rows], touch[rows] = zone_outcomes.advance_zones(candles, highs[rows], lows[rows], starts[rows],
+                                                                      touched[rows], supply=side)
+
+    last_bar = index[-1]
+    labels = []
+    for zone, outcome, touch_bar, start in zip(zones, outcomes, touch, starts):
+        if start < len(candles):
+            zone['status'] = zone_outcomes.STATUS_LABELS[outcome]
+            if zone['touched_at'] is None and touch_bar < len(candles):
+                zone['touched_at'] = index[touch_bar]
+            zone['evaluated_until'] = last_bar
+        labels.append(zone['status'])
+    return labels
+
+
+def active_sessions(zones, resume_times, sessions, end=None):
+    """
+    The [day, next day) windows of the daily bars ``sessions`` in which an intraday bar could
+    touch, break or reach the target of one of ``zones``, counting from each zone's resume time.
+
+    An untouched zone starts on the first session whose range reaches it. From then on, a
+    session whose range lies strictly between a demand zone's high and its target (below the
+    low and above the target for supply) moves the zone neither way. Skipping the sessions
+    every zone can skip leaves the outcomes unchanged, since the intraday bars of a session
+    trade inside its daily range.
+    """
+    if sessions.empty:
+        return []
+    days = timeframes.session_dates(sessions.index).normalize()
+    day_highs = sessions['High'].to_numpy(dtype=np.float64)
+    day_lows = sessions['Low'].to_numpy(dtype=np.float64)
+
+    highs = np.array([zone['zone_high'] for zone in zones], dtype=np.float64)[:, None]
+    lows = np.array([zone['zone_low'] for zone in zones], dtype=np.float64)[:, None]
+    supply = np.array([zone['side'] == 'supply' for zone in zones], dtype=bool)[:, None]
+    touched = np.array([zone['touched_at'] is not None for zone in zones], dtype=bool)
+    heights = highs - lows
+    quiet = np.where(supply,
+                     (day_highs < lows) & (day_lows > lows - 2 * heights),
+                     (day_lows > highs) & (day_highs < highs + 2 * heights))
+
+    positions = np.arange(len(days))
+    pending = positions >= days.searchsorted(
+        timeframes.session_dates(pd.DatetimeIndex(resume_times)).normalize())[:, None]
+    overlaps = pending & (day_lows <= highs) & (day_highs >= lows)
+    first_touch = np.where(overlaps.any(axis=1), overlaps.argmax(axis=1), len(days))
+    pending &= touched[:, None] | (positions >= first_touch[:, None])
+    active = (pending & ~quiet).any(axis=0)
+
+    windows = [(day, day + pd.Timedelta(days=1)) for day in days[active]]
+    if end is not None:
+        windows = [(start, min(stop, pd.Timestamp(end))) for start, stop in windows]
+    return windows
+
+
+def _naive(timestamp):
+    if timestamp.tzinfo is not None:
+        return timestamp.tz_localize(None)
+    return timestamp
+
+
+def _align(timestamp, index):
+    # Stored times and bar times may differ in having a timezone
+    if index.tz is None:
+        return _naive(timestamp)
+    if timestamp.tzinfo is None:
+        return timestamp.tz_localize(index.tz)
+    return timestamp.tz_convert(index.tz)
+
+
+if __name__ == "__main__":
+    with zone_store.ZoneStore() as store:
+        counts = refresh_zones(store)
+    print(", ".join(f"{label}: {count}" for label, count in counts.items()))
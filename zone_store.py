@@ -0,0 +1,310 @@
+import sqlite3
+
+import pandas as pd
+
+import scan_jobs
+import zone_outcomes
+
+# -----------------------------
+# SQLite Zone Store
+# -----------------------------
+
+ZONE_DB = 'zones.db'
+
+# The CSV the scans used to append to. Its rows are imported into the store once, and it is
+# rewritten from the store (in its own column names) after every save
+ZONE_CSV = 'demand_zone_data.csv'
+
+# Zones imported from a CSV carry no detection parameters; they share this parameter set
+LEGACY_PARAMS = 'legacy-csv'
+
+# Stored columns, in table order. A zone is identified by (symbol, timeframe, legin_time,
+# params_hash): rescanning with the same parameters updates its row instead of adding one.
+COLUMNS = [
+    'symbol', 'timeframe', 'legin_time', 'params_hash', 'side', 'legout_time', 'zone_high', 'zone_low',
+    'status', 'htf_legin_time', 'htf_legout_time', 'htf_zone_high', 'htf_zone_low', 'touched_at', 'evaluated_until',
+    'ancestry', 'updated_at',
+]
+KEY_COLUMNS = ['symbol', 'timeframe', 'legin_time', 'params_hash']
+TIME_COLUMNS = ['legin_time', 'legout_time', 'htf_legin_time', 'htf_legout_time', 'touched_at', 'evaluated_until']
+
+# Columns added after the first release of the store, with their types; older databases get them on open
+ADDED_COLUMNS = {'touched_at': 'TEXT', 'evaluated_until': 'TEXT', 'ancestry': 'TEXT'}
+
+# Scan row column -> store column, for the rows the scans used to append to CSV
+ROW_COLUMNS = {
+    "Symbol": 'symbol',
+    "Stock": 'symbol',
+    "Leg-In Time": 'legin_time',
+    "Leg-In Date": 'legin_time',
+    "Leg-Out Time": 'legout_time',
+    "Leg-Out Date": 'legout_time',
+    "Zone High": 'zone_high',
+    "Zone High (Upper Body Lowest)": 'zone_high',
+    "Zone Low": 'zone_low',
+    "Status": 'status',
+    "Zone Status": 'status',
+    "Higher Timeframe Leg-In Time": 'htf_legin_time',
+    "Higher Timeframe Leg-Out Time": 'htf_legout_time',
+    "Higher Timeframe Zone High": 'htf_zone_high',
+    "Higher Timeframe Zone Low": 'htf_zone_low',
+    "Ancestry": 'ancestry',
+}
+
+# Columns of ZONE_CSV, in file order
+CSV_COLUMNS = [
+    "Symbol", "Leg-In Time", "Leg-Out Time", "Zone High", "Zone Low", "Status", "Higher Timeframe Leg-In Time",
+    "Higher Timeframe Leg-Out Time", "Higher Timeframe Zone High", "Higher Timeframe Zone Low",
+]
+
+# Status spellings used by some scans -> the zone_outcomes label stored for them
+STATUS_ALIASES = {"Achieved Target": zone_outcomes.STATUS_LABELS[zone_outcomes.TARGET]}
+
+# Refresh progress survives a rescan that does not know it
+KEEP_COLUMNS = ['touched_at', 'evaluated_until']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS zones (
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    legin_time TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    side TEXT NOT NULL DEFAULT 'demand',
+    legout_time TEXT,
+    zone_high REAL,
+    zone_low REAL,
+    status TEXT,
+    htf_legin_time TEXT,
+    htf_legout_time TEXT,
+    htf_zone_high REAL,
+    htf_zone_low REAL,
+    touched_at TEXT,
+    evaluated_until TEXT,
+    ancestry TEXT,
+    updated_at TEXT,
+    PRIMARY KEY (symbol, timeframe, legin_time, params_hash)
+);
+CREATE INDEX IF NOT EXISTS zones_symbol ON zones (symbol, timeframe);
+CREATE INDEX IF NOT EXISTS zones_status ON zones (status);
+CREATE INDEX IF NOT EXISTS zones_legin_time ON zones (legin_time);
+CREATE TABLE IF NOT EXISTS imported_files (
+    path TEXT PRIMARY KEY,
+    imported_at TEXT
+);
+"""
+
+
+def params_hash(params):
+    """
+    Hash of a detection parameter set; zones found with different parameters are kept apart.
+    """
+    return scan_jobs.settings_key(params)
+
+
+def zone_records(rows, timeframe, params, side='demand'):
+    """
+    Converts scan rows (the dicts the scans used to write to CSV) into store records.
+    Columns the store does not know are dropped; "N/A" and missing values become NULL, and
+    status spellings are mapped onto the zone_outcomes labels.
+    """
+    key = params_hash(params)
+    records = []
+    for row in rows:
+        record = dict.fromkeys(COLUMNS)
+        for column, value in row.items():
+            if column in ROW_COLUMNS:
+                record[ROW_COLUMNS[column]] = value
+        record['status'] = STATUS_ALIASES.get(record['status'], record['status'])
+        record.update(timeframe=timeframe, params_hash=key, side=side)
+        records.append(record)
+    return records
+
+
+class ZoneStore:
+    """
+    Detected zones in one SQLite table, with upserts keyed on (symbol, timeframe, leg-in
+    time, params hash) and indexes on symbol, status and leg-in time.
+
+    Times are stored as ISO text, so they sort and compare as text. A connection belongs to
+    the thread that opened it: open the store where it is used (for example inside a scan
+    worker) and close it, or use it as a context manager.
+
+        with ZoneStore() as store:
+            store.upsert(zone_records(rows, "1d", params))
+            fresh = store.zones(symbol="TCS.NS", status="Fresh")
+    """
+    def __init__(self, path=ZONE_DB):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        existing = {row['name'] for row in self.connection.execute("PRAGMA table_info(zones)")}
+        with self.connection:
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in existing:
+                    self.connection.execute(f"ALTER TABLE zones ADD COLUMN {column} {column_type}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def upsert(self, records):
+        """
+        Inserts or updates every record in one transaction and returns how many were written.
+        """
+        updated_at = pd.Timestamp.now().isoformat(timespec='seconds')
+        values = [[_value(column, record.get(column)) for column in COLUMNS[:-1]] + [updated_at]
+                  for record in records]
+        if not values:
+            return 0
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        updates = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, zones.{column})" if column in KEEP_COLUMNS
+            else f"{column} = excluded.{column}"
+            for column in COLUMNS if column not in KEY_COLUMNS
+        )
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT INTO zones ({', '.join(COLUMNS)}) VALUES ({placeholders}) "
+                f"ON CONFLICT ({', '.join(KEY_COLUMNS)}) DO UPDATE SET {updates}",
+                values,
+            )
+        return len(values)
+
+    def update_progress(self, records):
+        """
+        Writes back the status, first touch and last evaluated bar time of zones advanced by
+        zone_refresh. Records are matched on the key columns, as returned by zones().
+        """
+        updated_at = pd.Timestamp.now().isoformat(timespec='seconds')
+        values = [(_value('status', record['status']), _value('touched_at', record['touched_at']),
+                   _value('evaluated_until', record['evaluated_until']), updated_at)
+                  + tuple(record[column] for column in KEY_COLUMNS)
+                  for record in records]
+        with self.connection:
+            self.connection.executemany(
+                "UPDATE zones SET status = ?, touched_at = ?, evaluated_until = ?, updated_at = ? "
+                f"WHERE {' AND '.join(f'{column} = ?' for column in KEY_COLUMNS)}",
+                values,
+            )
+        return len(values)
+
+    def zones(self, symbol=None, timeframe=None, status=None, side=None, params=None, since=None, until=None):
+        """
+        Stored zones as a list of dicts, ordered by symbol and leg-in time. Every filter is
+        optional; symbol and status also take a list of values, and since/until bound the
+        leg-in time (inclusive).
+        """
+        sql, arguments = self._select(symbol, timeframe, status, side, params, since, until)
+        return [dict(row) for row in self.connection.execute(sql, arguments)]
+
+    def frame(self, **filters):
+        """
+        Same as zones(), as a DataFrame with the time columns parsed.
+        """
+        frame = pd.DataFrame(self.zones(**filters), columns=COLUMNS)
+        for column in TIME_COLUMNS:
+            frame[column] = pd.to_datetime(frame[column])
+        return frame
+
+    def symbols(self, timeframe=None):
+        sql = "SELECT DISTINCT symbol FROM zones"
+        arguments = []
+        if timeframe is not None:
+            sql += " WHERE timeframe = ?"
+            arguments.append(timeframe)
+        return [row[0] for row in self.connection.execute(sql + " ORDER BY symbol", arguments)]
+
+    def import_csv(self, path=ZONE_CSV, timeframe='1d', params=LEGACY_PARAMS):
+        """
+        Imports the zone rows of a scan CSV once: a path that was imported before is skipped.
+        Rows repeating a zone (same symbol and leg-in time) collapse into the last of them.
+        Returns how many zones were written.
+        """
+        if self.connection.execute("SELECT 1 FROM imported_files WHERE path = ?", (path,)).fetchone():
+            return 0
+        try:
+            rows = pd.read_csv(path, dtype=str, keep_default_na=False)
+        except FileNotFoundError:
+            rows = pd.DataFrame()
+        for column in rows.columns:
+            if ROW_COLUMNS.get(column) in TIME_COLUMNS:
+                # The scans wrote pandas timestamps; files edited in a spreadsheet come back day-first
+                iso = rows[column].str.match(r'\d{4}-')
+                times = pd.to_datetime(rows[column].where(iso), errors='coerce', format='ISO8601')
+                times = times.fillna(pd.to_datetime(rows[column].where(~iso), errors='coerce', dayfirst=True,
+                                                    format='mixed'))
+                rows[column] = times.astype(object).where(times.notna(), "N/A")
+        written = self.upsert(zone_records(rows.to_dict('records'), timeframe, params))
+        with self.connection:
+            self.connection.execute("INSERT INTO imported_files (path, imported_at) VALUES (?, ?)",
+                                    (path, pd.Timestamp.now().isoformat(timespec='seconds')))
+        return written
+
+    def export_csv(self, path=ZONE_CSV, **filters):
+        """
+        Writes the matching zones to ``path`` in the scans' CSV columns, replacing the file
+        atomically. A zone stored under several parameter sets is written once, from the row
+        updated last.
+        """
+        frame = pd.DataFrame(self.zones(**filters), columns=COLUMNS)
+        frame = frame.sort_values('updated_at', kind='stable')
+        frame = frame.drop_duplicates(['symbol', 'timeframe', 'legin_time'], keep='last').sort_index()
+        columns = {column: ROW_COLUMNS[column] for column in CSV_COLUMNS}
+        frame = frame[list(columns.values())].set_axis(list(columns), axis=1)
+        with scan_jobs.atomic_output(path) as file:
+            frame.to_csv(file, index=False)
+        return len(frame)
+
+    def _select(self, symbol, timeframe, status, side, params, since, until):
+        conditions = []
+        arguments = []
+        for column, value in (('symbol', symbol), ('timeframe', timeframe), ('status', status), ('side', side)):
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                conditions.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                arguments.extend(value)
+            else:
+                conditions.append(f"{column} = ?")
+                arguments.append(value)
+        if params is not None:
+            conditions.append("params_hash = ?")
+            arguments.append(params_hash(params))
+        if since is not None:
+            conditions.append("legin_time >= ?")
+            arguments.append(_time_text(since))
+        if until is not None:
+            conditions.append("legin_time <= ?")
+            arguments.append(_time_text(until))
+        sql = "SELECT * FROM zones"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        return sql + " ORDER BY symbol, legin_time", arguments
+
+
+def _missing(value):
+    return value is None or (isinstance(value, str) and value in ("", "N/A"))
+
+
+def _time_text(value):
+    if _missing(value):
+        return None
+    return pd.Timestamp(value).isoformat()
+
+
+def _value(column, value):
+    # SQLite only binds plain Python values; numpy scalars and timestamps are converted here
+    if column in TIME_COLUMNS:
+        return _time_text(value)
+    if _missing(value):
+        return None
+    if column in ('zone_high', 'zone_low', 'htf_zone_high', 'htf_zone_low'):
+        return float(value)
+    return str(value)
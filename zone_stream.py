@@ -0,0 +1,133 @@
+import pandas as pd
+
+from candles import CandleSeries
+from zone_detector import DEMAND, SUPPLY
+
+# -----------------------------
+# Streaming Zone Detection
+# -----------------------------
+
+class StreamingZoneDetector:
+    """
+    Rally-base-rally / drop-base-drop detection over bars that arrive one at a time.
+
+    The detector keeps only the state of the legacy scan: the leg-in it is collecting a base
+    for and that base (at most ``max_base`` candles), so each bar costs O(1). A zone is
+    emitted by the bar that closes it as a qualifying leg-out, and afterwards the scan goes
+    on from that bar exactly like detect_demand_zones does.
+
+    After any number of bars, ``demand_zones`` and ``supply_zones`` are the
+    (i, j, base_candles) zones zone_detector.detect_zones() returns for the same bars, with
+    positions counted from the first bar fed in. The batch scan only looks at a leg-in once
+    two bars follow it, so a zone without base candles (min_base 0) is held back until the
+    bar after its leg-out.
+
+        detector = StreamingZoneDetector(50, 100, 1, 5, 0, 50, 50, 100)
+        for side, (i, j, base_candles) in detector.extend(bars):
+            ...
+    """
+    def __init__(self, min_legin_pct, max_legin_pct, min_base, max_base, min_base_pct, max_base_pct,
+                 min_legout_pct, max_legout_pct):
+        self.legin_range = (min_legin_pct, max_legin_pct)
+        self.base_range = (min_base_pct, max_base_pct)
+        self.legout_range = (min_legout_pct, max_legout_pct)
+        self.min_base = min_base
+        self.max_base = max_base
+
+        self.count = 0
+        self.last_time = None
+        self.demand_zones = []
+        self.supply_zones = []
+        # (position, bar) of the leg-in whose base is being collected, and the base bars so far
+        self.legin = None
+        self.base = []
+        # A zone without base candles, waiting for the bar the batch scan needs to see it
+        self.held = None
+
+    def update(self, open_price, high, low, close, time=None):
+        """
+        Feeds the next closed bar and returns the [(side, zone)] it completed, where side is
+        zone_detector.DEMAND or SUPPLY and zone an (i, j, base_candles) tuple.
+        """
+        bar = (float(open_price), float(high), float(low), float(close), time)
+        position = self.count
+        self.count += 1
+        self.last_time = time
+
+        events = []
+        if self.held is not None:
+            events.append(self._emit(*self.held))
+            self.held = None
+
+        body_pct = _body_pct(bar)
+        if self.legin is not None:
+            if len(self.base) < self.max_base and _within(body_pct, self.base_range):
+                self.base.append(bar)
+                return events
+            # This bar ends the base, so it is the leg-out candidate
+            side = self._side(bar, body_pct)
+            if side:
+                zone = (self.legin[0], position, _series(self.base))
+                if self.base:
+                    events.append(self._emit(side, zone))
+                else:
+                    self.held = (side, zone)
+            self.legin = None
+            self.base = []
+
+        # The scan continues at this bar, which may start the next pattern itself
+        if _within(body_pct, self.legin_range):
+            self.legin = (position, bar)
+        return events
+
+    def extend(self, data):
+        """
+        Feeds every bar of ``data`` (a DataFrame with Open/High/Low/Close columns, or a
+        CandleSeries) and returns the [(side, zone)] they completed. Bars at or before the
+        last one already fed are skipped, so a rolling buffer can be passed in whole.
+        """
+        candles = data if isinstance(data, CandleSeries) else CandleSeries.from_frame(data)
+        times = candles.time if candles.time is not None else [None] * len(candles)
+        start = 0
+        if self.last_time is not None and candles.time is not None:
+            start = pd.DatetimeIndex(candles.time).searchsorted(self.last_time, side='right')
+
+        events = []
+        for k in range(start, len(candles)):
+            events.extend(self.update(candles.open_price[k], candles.high[k], candles.low[k], candles.close[k],
+                                      times[k]))
+        return events
+
+    def _side(self, bar, body_pct):
+        if len(self.base) < self.min_base or not _within(body_pct, self.legout_range):
+            return 0
+        _, legin_high, legin_low, _, _ = self.legin[1]
+        open_price, _, _, close, _ = bar
+        if close > open_price and close > legin_high and all(close > base[1] for base in self.base):
+            return DEMAND
+        if close < open_price and close < legin_low and all(close < base[2] for base in self.base):
+            return SUPPLY
+        return 0
+
+    def _emit(self, side, zone):
+        (self.demand_zones if side == DEMAND else self.supply_zones).append(zone)
+        return side, zone
+
+
+def _body_pct(bar):
+    # Same arithmetic as CandleSeries.body_pct, so the range tests agree with the batch detector
+    open_price, high, low, close, _ = bar
+    candle_range = high - low
+    if candle_range == 0:
+        return 0.0
+    return (abs(close - open_price) / candle_range) * 100
+
+
+def _within(value, bounds):
+    return bounds[0] <= value <= bounds[1]
+
+
+def _series(bars):
+    times = [bar[4] for bar in bars]
+    return CandleSeries([bar[0] for bar in bars], [bar[1] for bar in bars], [bar[2] for bar in bars],
+                        [bar[3] for bar in bars], None if any(time is None for time in times) else pd.DatetimeIndex(times))